@@ -0,0 +1,52 @@
+"""Compares the cost of rendering keys with a large photo and a small icon as their background image"""
+import io
+
+from common import temporary_database, time_calls
+
+ITERATIONS = 200
+
+
+def make_image(size, image_format):
+    from PIL import Image
+
+    data = io.BytesIO()
+    Image.effect_noise(size, 64).convert('RGB').save(data, format=image_format)
+    return data.getvalue()
+
+
+def main():
+    with temporary_database():
+        from button_image import ButtonImage
+        from deck import VirtualDeck
+        from image_store import ImageStore
+
+        deck = VirtualDeck('Bench Virtual', cols=2, rows=1, populate_buttons=False)
+        deck.populate_default_buttons()
+
+        images = (
+            ('4000x3000 JPEG photo', make_image((4000, 3000), 'JPEG')),
+            ('72x72 PNG icon', make_image((72, 72), 'PNG'))
+        )
+
+        print(f'Rendering a key with a background image (mean of {ITERATIONS} renders, caches cleared each time)')
+        print(f'{"":<24}{"Upload size":>14}{"Stored size":>14}{"Upload ms":>12}{"Render ms":>12}')
+
+        for label, data in images:
+            upload_ms = time_calls(lambda: ImageStore.store(data), 5)
+            image_hash = ImageStore.store(data)
+            stored_size = len(ImageStore.get_bytes(image_hash))
+
+            button = deck.buttons[0]
+            button.style.background_image = image_hash
+
+            def render():
+                ButtonImage.render_cache.clear()
+                ImageStore.decoded_cache.clear()
+                return button.button_image.image
+
+            render_ms = time_calls(render, ITERATIONS)
+            print(f'{label:<24}{len(data):>14,}{stored_size:>14,}{upload_ms:>12.2f}{render_ms:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
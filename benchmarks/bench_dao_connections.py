@@ -0,0 +1,43 @@
+"""Compares opening a new SQLite connection per DAO call with the pooled ConnectionManager, when loading an XL deck"""
+import sqlite3 as sl
+from unittest.mock import patch
+
+from common import populate_deck, temporary_database, time_calls
+
+ITERATIONS = 200
+
+
+def main():
+    from dao.dao import Dao
+    from dao.deck_dao import DeckDao
+    from deck import XLDeck
+
+    with temporary_database() as db_name:
+        populate_deck(XLDeck('BENCHXL00001'))
+        deck_dao = DeckDao()
+
+        # Before: every DAO call opens a brand new connection
+        opened = []
+
+        def connect_per_call():
+            opened.append(1)
+            return sl.connect(db_name)
+
+        with patch.object(Dao, 'get_db_conn', staticmethod(connect_per_call)):
+            before_ms = time_calls(lambda: deck_dao.get_by_id('BENCHXL00001'), ITERATIONS)
+        before_opens = len(opened) / ITERATIONS
+
+        # After: every DAO call on this thread re-uses one pooled connection
+        Dao.connection_manager.close_all()
+        opened_before = Dao.connection_manager.connections_opened
+        after_ms = time_calls(lambda: deck_dao.get_by_id('BENCHXL00001'), ITERATIONS)
+        after_opens = (Dao.connection_manager.connections_opened - opened_before) / ITERATIONS
+
+    print(f'Loading an XL deck ({ITERATIONS} iterations)')
+    print(f'{"":<26}{"connections/load":>18}{"ms/load":>10}')
+    print(f'{"connection per call":<26}{before_opens:>18.2f}{before_ms:>10.2f}')
+    print(f'{"ConnectionManager":<26}{after_opens:>18.2f}{after_ms:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Measures the memory allocated while loading decks from the database, with and without throwaway default buttons"""
+import gc
+import tracemalloc
+
+from common import populate_deck, temporary_database
+
+ITERATIONS = 20
+
+
+def measure_peak(func):
+    """Returns the mean peak memory (in bytes) allocated while calling func, over ITERATIONS calls"""
+    total = 0
+    tracemalloc.start()
+
+    for _ in range(0, ITERATIONS):
+        gc.collect()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - baseline
+
+    tracemalloc.stop()
+    return total / ITERATIONS
+
+
+def count_buttons(func):
+    """Returns the number of Button objects constructed while calling func"""
+    import button
+
+    constructed = 0
+    original_init = button.Button.__init__
+
+    def counting_init(self, *args, **kwargs):
+        nonlocal constructed
+        constructed += 1
+        original_init(self, *args, **kwargs)
+
+    button.Button.__init__ = counting_init
+    try:
+        func()
+    finally:
+        button.Button.__init__ = original_init
+
+    return constructed
+
+
+def main():
+    with temporary_database():
+        from dao.button_dao import ButtonDao
+        from dao.deck_dao import DeckDao
+        from deck import XLDeck, VirtualDeck
+
+        def load_with_defaults(deck_id):
+            # The previous hydration path - build the deck with default buttons, then replace them with the saved ones
+            row = DeckDao.get_db_conn().execute('SELECT * FROM deck WHERE id=?;', (deck_id,)).fetchone()
+            deck = DeckDao.build_deck(dict(row), populate_buttons=True)
+            deck.buttons = ButtonDao().get_for_deck(deck)
+            return deck
+
+        def load(deck_id):
+            return DeckDao().get_by_id(deck_id)
+
+        populate_deck(XLDeck('BENCHXL00001'))
+        populate_deck(VirtualDeck('Bench Virtual', cols=16, rows=16))
+
+        print(f'Loading a deck (peak memory is the mean of {ITERATIONS} loads)')
+        print(f'{"":<50}{"Peak KiB":>10}{"Buttons":>10}')
+
+        for label, deck_id in (('XL (32 keys)', 'BENCHXL00001'), ('Virtual 16x16 (256 keys)', 'Bench Virtual')):
+            for path, func in (('default buttons first', load_with_defaults), ('direct hydration', load)):
+                peak = measure_peak(lambda: func(deck_id))
+                buttons = count_buttons(lambda: func(deck_id))
+                print(f'{label + ", " + path:<50}{peak / 1024:>10.1f}{buttons:>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Compares the per-press overhead of walking a button's actions with running its precompiled ActionPlan"""
+import logging
+
+from common import time_calls
+
+ITERATIONS = 20000
+
+
+class NullController:
+    """Stands in for the pynput keyboard controller, so that only the overhead of a press is measured, not the OS"""
+
+    def __init__(self):
+        self.events = 0
+
+    def press(self, key):
+        self.events += 1
+
+    def release(self, key):
+        self.events += 1
+
+
+def main():
+    from action import TextAction, MultiKeyPressAction
+    from button import Button
+    from deck import VirtualDeck
+    from input.key import Key
+
+    # Pressing keys is logged at INFO - keep the benchmark's output readable
+    logging.disable(logging.INFO)
+    Key.controller = NullController()
+
+    button = Button(0, VirtualDeck('BENCHMACRO01'))
+
+    def make_actions():
+        # A typical macro: open a terminal tab, then type a command a few words at a time
+        return [MultiKeyPressAction('CTRL;SHIFT;t', button, 0),
+                TextAction('git ', button, 1),
+                TextAction('log ', button, 2),
+                TextAction('--oneline', button, 3),
+                MultiKeyPressAction('ENTER', button, 4),
+                MultiKeyPressAction('CTRL;l', button, 5)]
+
+    def walk_actions(actions):
+        for action in actions:
+            action.execute()
+
+    def press_after_edit():
+        # Freshly loaded (or edited) actions - key names have not been resolved yet
+        walk_actions(make_actions())
+
+    def compile_and_press_after_edit():
+        button.actions = make_actions()
+        button.execute_actions()
+
+    walked_actions = make_actions()
+    walk_actions(walked_actions)
+    button.actions = make_actions()
+
+    print(f'Per-press overhead of a 6 action macro (mean of {ITERATIONS} presses, keyboard I/O excluded)')
+    print(f'{"":<28}{"Actions us":>12}{"Plan us":>12}{"Speed-up":>10}')
+
+    rows = (
+        ('Press after edit (compiles)', press_after_edit, compile_and_press_after_edit),
+        ('Repeated presses', lambda: walk_actions(walked_actions), button.execute_actions)
+    )
+
+    for label, before, after in rows:
+        before_us = time_calls(before, ITERATIONS) * 1000
+        after_us = time_calls(after, ITERATIONS) * 1000
+        print(f'{label:<28}{before_us:>12.2f}{after_us:>12.2f}{before_us / after_us:>9.2f}x')
+
+
+if __name__ == '__main__':
+    main()
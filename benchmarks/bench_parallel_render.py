@@ -0,0 +1,66 @@
+"""Compares rendering every key of a deck serially and on the render thread pool, for 15, 32 and 64 key layouts"""
+import os
+
+from common import time_calls
+
+ITERATIONS = 10
+PARALLEL_WORKERS = 4
+
+
+class FakeDeckInterface:
+    """Stands in for a StreamDeck device, so that rendering includes the scaling & encoding for real hardware"""
+
+    def __init__(self, key_size: int, image_format: str):
+        self._key_image_format = {
+            'size': (key_size, key_size),
+            'format': image_format,
+            'flip': (True, True),
+            'rotation': 0
+        }
+
+    def key_image_format(self):
+        return self._key_image_format
+
+
+def main():
+    from button_image import ButtonImage
+    from deck import Deck, OriginalDeck, XLDeck
+    from image_store import ImageStore
+
+    class LargeDeck(XLDeck):
+        cols = 8
+        rows = 8
+
+    layouts = (
+        ('Original (15 keys, 72px BMP)', OriginalDeck('BENCHORIG001'), FakeDeckInterface(72, 'BMP')),
+        ('XL (32 keys, 96px JPEG)', XLDeck('BENCHXL00001'), FakeDeckInterface(96, 'JPEG')),
+        ('8x8 (64 keys, 96px JPEG)', LargeDeck('BENCHLARGE01'), FakeDeckInterface(96, 'JPEG'))
+    )
+
+    for _, deck, deck_interface in layouts:
+        Deck.sessions.register(f'bench-{deck.id}', deck.id, device=deck_interface)
+        for button in deck.buttons:
+            # Long enough to need wrapping onto several lines
+            button.style.label = f'Key number {button.position} of {deck.get_num_buttons()}'
+
+    def render_all(deck):
+        ButtonImage.render_cache.clear()
+        ButtonImage.native_cache.clear()
+        ImageStore.decoded_cache.clear()
+        return deck.render_buttons()
+
+    print(f'Rendering every key of a deck, with empty caches (mean of {ITERATIONS} renders, {os.cpu_count()} CPUs)')
+    print(f'{"":<32}{"Serial ms":>12}{f"{PARALLEL_WORKERS} threads ms":>16}{"Speed-up":>10}')
+
+    for label, deck, _ in layouts:
+        Deck.configure_rendering(1)
+        serial_ms = time_calls(lambda: render_all(deck), ITERATIONS)
+
+        Deck.configure_rendering(PARALLEL_WORKERS)
+        parallel_ms = time_calls(lambda: render_all(deck), ITERATIONS)
+
+        print(f'{label:<32}{serial_ms:>12.1f}{parallel_ms:>16.1f}{serial_ms / parallel_ms:>9.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Shared setup for the Stream Deck X benchmarks. Run any benchmark from the root of the repository, e.g.:
+
+    python benchmarks/bench_dao_connections.py
+"""
+import contextlib
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+# Set PYTHONPATH, the same way tests/run_tests.py does
+sys.path.insert(0, str(pathlib.Path(__file__).parent.absolute().parent.absolute().joinpath('streamdeckx')))
+
+
+@contextlib.contextmanager
+def temporary_database():
+    """Creates an empty Stream Deck X database in a temporary directory, and points every DAO at it"""
+    from dao.dao import Dao
+    import streamdeckx
+
+    original_cwd = os.getcwd()
+    original_db_name = Dao.db_name
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            streamdeckx.connect_to_database()
+            Dao.db_name = os.path.join(temp_dir, 'sdx_db.db')
+            yield Dao.db_name
+        finally:
+            Dao.connection_manager.close_all()
+            Dao.db_name = original_db_name
+            os.chdir(original_cwd)
+
+
+def populate_deck(deck, actions_per_button: int = 2):
+    """Saves the given deck to the database, along with some actions on every button"""
+    from action import TextAction
+    from dao.action_dao import ActionDao
+    from dao.deck_dao import DeckDao
+
+    DeckDao().create(deck)
+
+    action_dao = ActionDao()
+    for button in deck.buttons:
+        for order in range(0, actions_per_button):
+            action_dao.create(TextAction(f'text {order}', button, order))
+
+
+def time_calls(func, iterations: int):
+    """Calls func the given number of times, returning the mean time per call in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(0, iterations):
+        func()
+
+    return (time.perf_counter() - start) * 1000 / iterations
@@ -2,9 +2,10 @@ import logging
 import os
 from abc import ABC, abstractmethod
 import functools
+import math
 import time
 
-from input.key import Key
+from input.key import Key, KEYS
 
 
 class Action(ABC):
@@ -79,11 +80,9 @@ class TextAction(Action):
 
     def execute(self):
         logging.info(f'Printing: {self.text}')
-        from pynput.keyboard import Controller
+        keyboard = Key.controller
 
-        keyboard = Controller()
-
-        # Press and release space
+        # Press and release each character
         for char in self.text:
             keyboard.press(char)
             keyboard.release(char)
@@ -92,8 +91,6 @@ class TextAction(Action):
 class MultiKeyPressAction(Action):
     """Class for an action where multiple keys are pressed at once"""
 
-    all_keys = Key.get_all_keys()
-
     @property
     def action_type(self):
         return 'MULTIKEY'
@@ -144,12 +141,16 @@ class MultiKeyPressAction(Action):
 
     @staticmethod
     def _get_key(text):
-        for key in MultiKeyPressAction.all_keys:
-            if key.name == text:
-                return key
+        return KEYS.get(text)
 
 
 class DelayAction(Action):
+    """
+    Class for an action that waits before the next action. The parameter is a number of seconds (e.g. '5' or '0.25'),
+    or a number of milliseconds with an 'ms' suffix (e.g. '250ms').
+
+    When run by the ActionExecutor, a delay does not tie up a thread - see ActionExecutor._step.
+    """
 
     @property
     def action_type(self):
@@ -157,15 +158,48 @@ class DelayAction(Action):
 
     def __init__(self, parameter: str, button, order: int, action_id: int = None):
         super().__init__(parameter, button, order, action_id=action_id)
-        self.delay_time = int(parameter)
+        self.delay_ms = DelayAction._parse_delay_ms(parameter)
+
+    @property
+    def delay_time(self):
+        """Length of this delay, in seconds"""
+        return self.delay_ms / 1000
 
     @property
     def display_value(self):
-        return f'{self.delay_time} seconds'
+        if self.delay_ms % 1000 == 0:
+            return f'{self.delay_ms // 1000} seconds'
+
+        return f'{self.delay_ms} ms'
 
     def execute(self):
         time.sleep(self.delay_time)
 
+    @staticmethod
+    def _parse_delay_ms(parameter):
+        """
+        Args:
+            parameter (str): Length of the delay - in seconds, or in milliseconds if it ends with 'ms'
+
+        Returns:
+            int: Length of the delay, in milliseconds
+
+        Raises:
+            ValueError: If the parameter is not a finite, non-negative number
+        """
+        text = str(parameter).strip().lower()
+        is_ms = text.endswith('ms')
+
+        try:
+            delay = float(text[:-2] if is_ms else text)
+        except ValueError:
+            raise ValueError(f'Invalid delay: {parameter!r} is not a number') from None
+
+        if not math.isfinite(delay) or delay < 0:
+            raise ValueError(f'Invalid delay: {parameter!r} must be a finite number, zero or greater')
+
+        return round(delay if is_ms else delay * 1000)
+
 
 class ApplicationAction(Action):
     """Class for an action that launches an application"""
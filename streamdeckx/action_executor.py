@@ -0,0 +1,230 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+
+from action_plan import DelayStep
+from timer_scheduler import TimerScheduler
+
+
+class ConcurrencyPolicy(Enum):
+    """What to do when a button is pressed while its actions from a previous press are still running"""
+
+    QUEUE = 'Run again once the current run finishes'
+    DROP = 'Ignore the new press'
+    RESTART = 'Cancel the current run, then run again'
+
+    @staticmethod
+    def get_by_name(name):
+        for policy in ConcurrencyPolicy:
+            if policy.name == name:
+                return policy
+
+
+class ActionExecutor:
+    """
+    Runs the actions of pressed buttons on a pool of worker threads, so that the thread reporting key presses (the
+    StreamDeck library's read thread) never waits for an action to finish.
+
+    Each button's runs are strictly sequential - a button is never running twice at once - while different buttons
+    run concurrently. What happens when a button is pressed again mid-run is decided by its ConcurrencyPolicy.
+
+    Runs step through the button's precompiled ActionPlan. Delays don't occupy a worker: when a run reaches a delay,
+    the rest of the run is handed to a TimerScheduler, and picked up again by a worker once the delay has passed (or as
+    soon as the run is cancelled).
+    """
+
+    MAX_WORKERS = 8
+
+    def __init__(self, max_workers: int = MAX_WORKERS, policy: ConcurrencyPolicy = ConcurrencyPolicy.QUEUE):
+        """
+        Constructor for ActionExecutor class.
+
+        Args:
+            max_workers (int): Maximum number of buttons whose actions can run at the same time (default: 8)
+            policy (ConcurrencyPolicy): Default policy for presses of a button that is still running (default: QUEUE)
+        """
+        self.max_workers = max_workers
+        self.policy = policy
+        self.presses = 0
+        self.dropped = 0
+        self._runs = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pool = None
+        self._scheduler = TimerScheduler()
+
+    @property
+    def waiting_count(self):
+        """Number of runs currently waiting on a delay (none of which are using a worker thread)"""
+        return len(self._scheduler)
+
+    @property
+    def running_count(self):
+        with self._lock:
+            return len(self._runs)
+
+    def submit(self, button, policy: ConcurrencyPolicy = None):
+        """
+        Schedules the actions of a pressed button to run, and returns straight away.
+
+        Args:
+            button (Button): Button that was pressed
+            policy (ConcurrencyPolicy): Policy to apply if the button is still running (default: this executor's)
+
+        Returns:
+            bool: True if the press will be acted upon, False if it was dropped
+        """
+        policy = policy or self.policy
+        key = ActionExecutor._get_key(button)
+
+        with self._lock:
+            self.presses += 1
+            run = self._runs.get(key)
+
+            if run is None:
+                run = _ButtonRun(button)
+                self._runs[key] = run
+                self._get_pool().submit(self._step, key, run)
+                return True
+
+            if policy == ConcurrencyPolicy.DROP:
+                self.dropped += 1
+                logging.debug(f'Dropping press of button {key} - its actions are still running')
+                return False
+
+            run.button = button
+            if policy == ConcurrencyPolicy.RESTART:
+                self._cancel_run(key, run)
+                run.pending = 1
+            else:
+                run.pending += 1
+
+            return True
+
+    def cancel(self, button):
+        """
+        Cancels the running (and any queued) runs of the given button.
+
+        Args:
+            button (Button): Button to cancel
+
+        Returns:
+            bool: True if the button was running, False otherwise
+        """
+        key = ActionExecutor._get_key(button)
+
+        with self._lock:
+            run = self._runs.get(key)
+            if run is None:
+                return False
+
+            run.pending = 0
+            self._cancel_run(key, run)
+            return True
+
+    def is_running(self, button):
+        with self._lock:
+            return ActionExecutor._get_key(button) in self._runs
+
+    def wait_until_idle(self, timeout: float = None):
+        """
+        Waits until no button's actions are running or queued.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait (default: wait indefinitely)
+
+        Returns:
+            bool: True if the executor is idle, False if the timeout expired first
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._runs, timeout=timeout)
+
+    def cancel_all(self):
+        """Cancels every running and queued run, e.g. when shutting down"""
+        with self._lock:
+            for key, run in self._runs.items():
+                run.pending = 0
+                self._cancel_run(key, run)
+
+    def shutdown(self, wait: bool = True):
+        self.cancel_all()
+
+        with self._lock:
+            pool = self._pool
+            self._pool = None
+
+        if pool:
+            pool.shutdown(wait=wait)
+
+    def _get_pool(self):
+        # Must be called with the lock held
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ActionWorker')
+
+        return self._pool
+
+    def _cancel_run(self, key, run):
+        # Must be called with the lock held
+        run.cancel_event.set()
+
+        if run.timer is not None and run.timer.cancel():
+            # The run was waiting on a delay - wake it up now, so that it notices it has been cancelled
+            run.timer = None
+            self._get_pool().submit(self._step, key, run)
+
+    def _resume(self, key, run):
+        # Called on the scheduler's thread when a delay has passed
+        with self._lock:
+            run.timer = None
+            self._get_pool().submit(self._step, key, run)
+
+    def _step(self, key, run):
+        """Executes the steps of a run, up to its next delay (or its end)"""
+        steps = run.steps
+
+        while run.index < len(steps) and not run.cancel_event.is_set():
+            step = steps[run.index]
+            run.index += 1
+
+            if isinstance(step, DelayStep):
+                with self._lock:
+                    if not run.cancel_event.is_set():
+                        run.timer = self._scheduler.call_later(step.delay_time, lambda: self._resume(key, run))
+                        return
+                break
+
+            try:
+                step.execute()
+            except Exception:
+                logging.exception(f'Step {step} of button {key} failed')
+
+        with self._lock:
+            if run.pending > 0:
+                run.pending -= 1
+                run.restart()
+                self._get_pool().submit(self._step, key, run)
+                return
+
+            del self._runs[key]
+            self._idle.notify_all()
+
+    @staticmethod
+    def _get_key(button):
+        return button.deck.id, button.position
+
+
+class _ButtonRun:
+    """Book-keeping for a button whose actions are running"""
+
+    def __init__(self, button):
+        self.button = button
+        self.pending = 0
+        self.timer = None
+        self.restart()
+
+    def restart(self):
+        # Pick up the button's latest actions, in case they were edited since the last run
+        self.steps = self.button.action_plan.steps
+        self.index = 0
+        self.cancel_event = threading.Event()
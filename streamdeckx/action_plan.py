@@ -0,0 +1,136 @@
+import logging
+import time
+
+from action import DelayAction, MultiKeyPressAction, TextAction
+from input.key import Key
+
+
+class ActionPlan:
+    """
+    Immutable, ready-to-run form of a button's actions, compiled once whenever the actions change (see
+    Button.action_plan) rather than on every press.
+
+    Compiling resolves key names to Key objects, merges adjacent text into a single step and drops steps that would do
+    nothing (or could never work), so that running the plan does little more than send input to the OS.
+    """
+
+    def __init__(self, steps: tuple):
+        """
+        Constructor for ActionPlan class.
+
+        Args:
+            steps (tuple): Steps to run, in order - each has an execute() method
+        """
+        self.steps = tuple(steps)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def __repr__(self):
+        return f'ActionPlan({", ".join(repr(step) for step in self.steps)})'
+
+    @staticmethod
+    def compile(actions: list):
+        """
+        Compiles a list of actions into a plan.
+
+        Args:
+            actions (list): Actions to compile, in order
+
+        Returns:
+            ActionPlan: Plan that runs the given actions
+        """
+        steps = []
+
+        for action in actions:
+            step = ActionPlan._compile_action(action)
+            if step is None:
+                continue
+
+            if isinstance(step, TextStep) and steps and isinstance(steps[-1], TextStep):
+                # Typed straight after one another anyway, so type them in one go
+                steps[-1] = TextStep(steps[-1].text + step.text)
+                continue
+
+            steps.append(step)
+
+        return ActionPlan(steps)
+
+    @staticmethod
+    def _compile_action(action):
+        if isinstance(action, TextAction):
+            return TextStep(action.text) if action.text else None
+
+        if isinstance(action, MultiKeyPressAction):
+            if not action.key_presses or None in action.keys:
+                logging.warning(f'Skipping key press {action} of button {action.button} - unknown key')
+                return None
+
+            return KeyComboStep(action.keys)
+
+        if isinstance(action, DelayAction):
+            return DelayStep(action.delay_time) if action.delay_ms else None
+
+        # Any other action runs as is
+        return action
+
+
+class TextStep:
+    """Types some text"""
+
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __repr__(self):
+        return f'TextStep({self.text!r})'
+
+    def execute(self):
+        logging.info('Printing: %s', self.text)
+        controller = Key.controller
+
+        for char in self.text:
+            controller.press(char)
+            controller.release(char)
+
+
+class KeyComboStep:
+    """Presses some keys at once, then releases them in reverse order"""
+
+    __slots__ = ('names', 'pkeys')
+
+    def __init__(self, keys: list):
+        self.names = '+'.join(key.name for key in keys)
+        self.pkeys = tuple(key.pkey for key in keys)
+
+    def __repr__(self):
+        return f'KeyComboStep({self.names})'
+
+    def execute(self):
+        logging.info('Pressing: %s', self.names)
+        controller = Key.controller
+
+        for pkey in self.pkeys:
+            controller.press(pkey)
+
+        for pkey in reversed(self.pkeys):
+            controller.release(pkey)
+
+
+class DelayStep:
+    """Waits before the next step. When run by the ActionExecutor, waiting does not tie up a thread."""
+
+    __slots__ = ('delay_time',)
+
+    def __init__(self, delay_time: float):
+        self.delay_time = delay_time
+
+    def __repr__(self):
+        return f'DelayStep({self.delay_time})'
+
+    def execute(self):
+        time.sleep(self.delay_time)
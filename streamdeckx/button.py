@@ -1,13 +1,22 @@
+import logging
+from urllib.parse import quote
+
+from action_executor import ConcurrencyPolicy
+from action_plan import ActionPlan
 from button_image import ButtonImage
 from button_style import ButtonStyle
 from dao.button_dao import ButtonDao
+from image_store import ImageStore
 
 
 class Button:
 
     button_dao = ButtonDao()
 
-    def __init__(self, position: int, deck, btn_id: int = None, style: ButtonStyle = None):
+    DEFAULT_CONCURRENCY_POLICY = ConcurrencyPolicy.QUEUE
+
+    def __init__(self, position: int, deck, btn_id: int = None, style: ButtonStyle = None,
+                 concurrency_policy: ConcurrencyPolicy = None):
         """
         Constructor for Button class.
 
@@ -17,10 +26,14 @@ class Button:
             deck (Deck): Deck object that this Button belongs to
             btn_id (int): Database ID of the button (default: None)
             style (ButtonStyle): Style of the Button (text/image/font/etc.)
+            concurrency_policy (ConcurrencyPolicy): What to do when this button is pressed while its actions are
+                still running (default: QUEUE)
         """
         self.position = position
         self.deck = deck
         self.id = btn_id
+        self.concurrency_policy = concurrency_policy if concurrency_policy else Button.DEFAULT_CONCURRENCY_POLICY
+        self._html = None
         self.actions = []
         self.style = style if style else ButtonStyle('text', font='Roboto-Regular.ttf', label=f'{self.position}')
         self.button_image = ButtonImage(self.style, self.deck)
@@ -37,18 +50,62 @@ class Button:
     def __hash__(self):
         return hash(self.position)
 
+    @property
+    def actions(self):
+        return self._actions
+
+    @actions.setter
+    def actions(self, actions: list):
+        self._actions = actions
+        self._action_plan = None
+
+    @property
+    def action_plan(self):
+        """
+        This button's actions, compiled into an ActionPlan. Compiled on first use after the actions change, then reused
+        for every press.
+
+        Returns:
+            ActionPlan: Plan that runs this button's actions
+        """
+        if self._action_plan is None:
+            self._action_plan = ActionPlan.compile(self._actions)
+
+        return self._action_plan
+
     @property
     def html(self):
         """
-        Generates the HTML for displaying this button on the page
+        Generates the HTML for displaying this button on the page. The HTML is cached until this button's style is
+        changed (see invalidate_html).
 
         Returns:
             str: HTML representing this button
         """
-        html = f'<span id="{self.position}" class="btn" onclick="openConfig({self.position})">' \
-               f'<img id="{self.position}-img" height="72" width="72" src="data:image/PNG;base64, {self.button_image.image_bytes.decode("utf-8")}">' \
+        if self._html is not None:
+            return self._html
+
+        self._html = f'<span id="{self.position}" class="btn" onclick="openConfig({self.position})">' \
+               f'<img id="{self.position}-img" height="72" width="72" src="{self.image_url}">' \
                f'</span>'
-        return html
+        return self._html
+
+    def invalidate_html(self):
+        """Forgets the cached HTML of this button, and of its deck"""
+        self._html = None
+        self.deck.invalidate_html()
+
+    @property
+    def image_url(self):
+        """
+        URL of this button's image. The URL includes the image's render digest, so it changes whenever the image does -
+        browsers can cache each URL forever, and only download images that have actually changed.
+
+        Returns:
+            str: URL of this button's image
+        """
+        # Virtual deck IDs are free text - slashes are left as they are, since the route takes the ID as a path
+        return f'/api/v1/decks/{quote(self.deck.id)}/keys/{self.position}.png?v={self.render_digest}'
 
     def set_text(self, text: str):
         """
@@ -58,9 +115,7 @@ class Button:
             text (str): Text to apply to this Button
         """
         self.style.label = text
-
-        if self.deck.__class__.__name__ != 'VirtualDeck':
-            self.update_key_image()
+        self._style_changed()
 
         # Update in database
         Button.button_dao.update(self)
@@ -75,8 +130,7 @@ class Button:
         """
         self.style.text_color = text_color
         self.style.background_color = background_color
-
-        self.update_key_image()
+        self._style_changed()
 
         Button.button_dao.update(self)
 
@@ -88,26 +142,67 @@ class Button:
             font_size (int): Size of the font to be used on this button
         """
         self.style.font_size = font_size
-        self.update_key_image()
+        self._style_changed()
 
         Button.button_dao.update(self)
 
-    def set_background_image(self, background_image: str):
-        self.style.background_image = background_image
-        self.update_key_image()
+    def set_concurrency_policy(self, concurrency_policy: ConcurrencyPolicy):
+        """
+        Sets what happens when this button is pressed while its actions from a previous press are still running.
+
+        Args:
+            concurrency_policy (ConcurrencyPolicy): Policy to apply to later presses
+        """
+        self.concurrency_policy = concurrency_policy
 
         Button.button_dao.update(self)
 
+    def set_background_image(self, image_data: bytes, keep_original: bool = False):
+        """
+        Sets the background image of this button. The image is scaled down to the size of a key and stored once (by
+        its hash), no matter how many buttons use it.
+
+        Args:
+            image_data (bytes): Contents of the image file
+            keep_original (bool): Whether to also store the original, full-size image (default: False)
+
+        Raises:
+            InvalidImageError: If the image data cannot be read as an image
+        """
+        self.style.background_image = ImageStore.store(image_data, keep_original=keep_original)
+        self._style_changed()
+
+        Button.button_dao.update(self)
+
+    def _style_changed(self):
+        # Bring everything showing this button's image up to date - its physical key, the cached HTML and any browsers
+        self.update_key_image()
+        self.invalidate_html()
+        self.publish_image()
+
     def add_action(self, action):
         """Add an action to this Button"""
-        self.actions.append(action)
+        self._actions.append(action)
+        self._action_plan = None
 
-    def execute_actions(self):
-        if not self.actions:
-            return
-        
-        for action in self.actions:
-            action.execute()
+    def remove_action(self, action):
+        """Remove an action from this Button"""
+        self._actions.remove(action)
+        self._action_plan = None
+
+    def execute_actions(self, cancel_event=None):
+        """
+        Executes every action of this Button, in order, by running its ActionPlan.
+
+        Args:
+            cancel_event (threading.Event): If given, stops before the next action once this event is set
+        """
+        for step in self.action_plan.steps:
+            if cancel_event is not None and cancel_event.is_set():
+                logging.debug(f'Cancelled the remaining actions of button {self.position}')
+                return
+
+            step.execute()
 
     def serialize(self):
         """Converts this button into its JSON representation, suitable for returning from an API"""
@@ -116,13 +211,56 @@ class Button:
             "position": self.position
         }
 
-    def update_key_image(self):
+    @property
+    def render_digest(self):
+        """Digest of this button's rendered content - changes whenever the image shown on the key would change"""
+        return self.button_image.render_digest
+
+    @property
+    def is_dirty(self):
+        """
+        Whether the image on this button's physical key is out of date.
+
+        Returns:
+            bool: True if the key needs its image re-sent, False otherwise (always False for virtual decks)
+        """
+        if self.deck.__class__.__name__ == 'VirtualDeck':
+            return False
+
+        return self.deck.key_image_digests.get(self.position) != self.render_digest
+
+    def publish_image(self):
+        """
+        Tells everyone watching this button's deck (see DeckEventBroadcaster) where to find its new image.
+        """
+        self.deck.events.publish(self.deck.id, 'image', lambda: {
+            'key': self.position,
+            'hash': self.render_digest,
+            'url': self.image_url
+        })
+
+    def update_key_image(self, force: bool = False, image=None):
+        """
+        Sends this button's image to its physical key, if the key is not already showing it. The image is written in
+        the background, by the deck's KeyImageWriter, so this returns without waiting for the device.
+
+        Args:
+            force (bool): Send the image even if the key should already be showing it (default: False)
+            image: This button's key image, already rendered in the deck's native format (e.g. by
+                Deck.render_buttons). If not given, the image will be rendered here.
+        """
         if self.deck.__class__.__name__ != 'VirtualDeck':
+            digest = self.render_digest
+            if not force and self.deck.key_image_digests.get(self.position) == digest:
+                return
+
             # Generate the custom key with the requested image and label.
-            image = self.button_image.render_key_image()
+            if image is None:
+                image = self.button_image.render_key_image()
 
             # Update requested key with the generated image.
-            self.deck.deck_interface.set_key_image(self.position, image)
+            self.deck.key_writer.enqueue(self.position, image)
+            self.deck.key_image_digests[self.position] = digest
 
 
 class ButtonMissingIdError(Exception):
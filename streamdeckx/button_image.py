@@ -1,25 +1,98 @@
-import base64
+import hashlib
 import io
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 from StreamDeck.ImageHelpers import PILHelper
 
+from font_registry import FontRegistry
+from image_store import ImageStore
+from render_cache import RenderCache
+
 
 class ButtonImage:
 
+    VIRTUAL_KEY_SIZE = (100, 100)
+
+    render_cache = RenderCache()
+
+    # Final key image payloads, already scaled, rotated and encoded the way the hardware needs them
+    native_cache = RenderCache()
+
+    # Rendered images encoded as PNGs, for the web UI - by render digest
+    png_cache = RenderCache()
+
     def __init__(self, style, deck):
         self.style = style
         self.deck = deck
         self._image_size = 0
 
+    @property
+    def key_image_format(self):
+        """
+        Gets the size & format of the key images on this button's deck.
+
+        Returns:
+            dict: Key image format, as given by the StreamDeck library (or an equivalent for virtual decks)
+        """
+        if self.deck.__class__.__name__ == 'VirtualDeck':
+            # VirtualDeck has no deck_interface
+            return {'size': ButtonImage.VIRTUAL_KEY_SIZE, 'format': None}
+
+        if not self.deck.deck_interface:
+            return {'size': None, 'format': None}
+
+        return self.deck.deck_interface.key_image_format()
+
+    @property
+    def render_digest(self):
+        """
+        Digest of every input that affects the rendered image - the style of the button, and the size & format of
+        the key it will be shown on. Buttons with the same render digest render identically.
+
+        Returns:
+            str: SHA-256 hex digest
+        """
+        image_format = self.key_image_format
+        key_description = f'{self.style.digest}|{image_format["size"]}|{image_format["format"]}'
+        return hashlib.sha256(key_description.encode('utf-8')).hexdigest()
+
+    @property
+    def native_digest(self):
+        """
+        Digest of every input that affects the native payload sent to the key - the render digest, and the model of
+        the deck (which determines how the image is rotated, flipped and encoded).
+
+        Returns:
+            str: SHA-256 hex digest
+        """
+        key_description = f'{self.render_digest}|{self.deck.__class__.type.name}'
+        return hashlib.sha256(key_description.encode('utf-8')).hexdigest()
+
     @property
     def image(self):
+        """
+        Gets the rendered image for this button. Rendered images are shared between all buttons with the same render
+        digest, so callers must not modify the returned image.
+
+        Returns:
+            PIL.Image.Image: Rendered image
+        """
+        digest = self.render_digest
+        image = ButtonImage.render_cache.get(digest)
+
+        if image is None:
+            image = self._render()
+            ButtonImage.render_cache.put(digest, image, RenderCache.image_size(image))
+
+        self._image_size = image.size[0]
+        return image
+
+    def _render(self):
         background = Image.new('RGB', (100, 100), self.style.rgb_background_color)
-        if self.style.background_image:
-            background_image = Image.open(io.BytesIO(base64.b64decode(self.style.background_image))).convert('RGBA')
-            background_image.load()
-            background_image_scaled = background_image.resize((100, 100))
-            background.paste(background_image_scaled, mask=background_image_scaled.split()[3])
+        background_image = ImageStore.get_image(self.style.background_image) if self.style.background_image else None
+        if background_image:
+            # Already RGBA and scaled to the key size by the ImageStore, so it can be pasted as-is
+            background.paste(background_image, mask=background_image)
 
         if self.deck.__class__.__name__ == 'VirtualDeck':
             # VirtualDeck has no deck_interface
@@ -35,29 +108,47 @@ class ButtonImage:
         return image
 
     @property
-    def image_bytes(self):
+    def png_bytes(self):
         """
-        Returns the image in its 64-bit encoded bytes format.
+        Gets the rendered image for this button, encoded as a PNG. Each distinct image is only encoded once.
 
         Returns:
-            bytes: Image
+            bytes: PNG image
         """
-        import base64
-        image = self.image
+        digest = self.render_digest
+        png = ButtonImage.png_cache.get(digest)
 
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format='PNG')
-        return base64.b64encode(img_byte_arr.getvalue())
+        if png is None:
+            img_byte_arr = io.BytesIO()
+            self.image.save(img_byte_arr, format='PNG')
+            png = img_byte_arr.getvalue()
+            ButtonImage.png_cache.put(digest, png, len(png))
+
+        return png
 
     def render_key_image(self):
+        """
+        Gets the image for this button, in the format its deck's hardware expects. Native payloads are shared between
+        all buttons with the same native digest, so re-sending a key only re-encodes it if it has changed.
+
+        Returns:
+            bytes: Native image payload (or a PIL image, for virtual decks)
+        """
         if self.deck.__class__.__name__ == 'VirtualDeck':
             # VirtualDeck has no deck_interface
             return self.image
-        else:
-            return PILHelper.to_native_format(self.deck.deck_interface, self.image)
+
+        digest = self.native_digest
+        payload = ButtonImage.native_cache.get(digest)
+
+        if payload is None:
+            payload = PILHelper.to_native_format(self.deck.deck_interface, self.image)
+            ButtonImage.native_cache.put(digest, payload, len(payload))
+
+        return payload
 
     def draw_text(self, draw):
-        font = ImageFont.truetype(self.style.font_path, self.style.font_size)
+        font = FontRegistry.get_font(self.style.font_path, self.style.font_size)
         text_lines = self.get_split_text(font)
         max_width = ButtonImage.get_max_width(text_lines, font)
 
@@ -109,12 +200,7 @@ class ButtonImage:
 
     @staticmethod
     def get_text_dimensions(text_string, font):
-        ascent, descent = font.getmetrics()
-
-        text_width = font.getmask(text_string).getbbox()[2]
-        text_height = font.getmask(text_string).getbbox()[3] + descent
-
-        return text_width, text_height
+        return FontRegistry.get_text_dimensions(text_string, font)
 
 
 class ImageLine:
@@ -1,4 +1,5 @@
 import functools
+import hashlib
 import os
 
 
@@ -13,6 +14,7 @@ class ButtonStyle:
         self.label = label
         self.background_color = background_color
         self.text_color = text_color
+        # Hash of the background image (see ImageStore), rather than the image itself
         self.background_image = background_image
 
     def __str__(self):
@@ -44,6 +46,22 @@ class ButtonStyle:
     def __hash__(self):
         return hash(f'{self.name}{self.background_image}{self.font}{self.label}')
 
+    @property
+    def digest(self):
+        """
+        Stable digest of every attribute of this style that affects how a button is rendered.
+
+        Returns:
+            str: SHA-256 hex digest
+        """
+        hasher = hashlib.sha256()
+        # The background image is referred to by the hash of its content, so it doesn't need hashing again here
+        for value in (self.font, self.font_size, self.label, self.background_color, self.text_color, self.background_image or None):
+            hasher.update(repr(value).encode('utf-8'))
+            hasher.update(b'\0')
+
+        return hasher.hexdigest()
+
     @functools.cached_property
     def font_path(self):
         if not self.font:
@@ -52,8 +70,18 @@ class ButtonStyle:
         return os.path.join(ButtonStyle.ASSETS_PATH, self.font)
 
     @property
-    def background_image_decoded(self):
-        return self.background_image.decode("utf-8")
+    def background_image_url(self):
+        """
+        URL of the stored background image. Images are stored by the hash of their content, so the URL always refers to
+        the same image, and browsers can cache it forever.
+
+        Returns:
+            str: URL of the background image, or None if there is no background image
+        """
+        if not self.background_image:
+            return None
+
+        return f'/api/v1/images/{self.background_image}.png'
 
     @property
     def rgb_background_color(self):
@@ -1,6 +1,7 @@
 import logging
 import sqlite3 as sl
 
+from action_executor import ConcurrencyPolicy
 from button_style import ButtonStyle
 from dao.action_dao import ActionDao
 from dao.dao import Dao
@@ -9,6 +10,15 @@ from dao.dao import Dao
 class ButtonDao(Dao):
     action_dao = ActionDao()
 
+    # Maximum number of decks to load buttons for in a single query (SQLite limits the number of bound parameters)
+    MAX_DECKS_PER_QUERY = 500
+
+    BUTTONS_WITH_ACTIONS_QUERY = 'SELECT button.*, action.id AS action_id, action.type AS action_type, ' \
+                                 'action.action_order AS action_order, action.parameter AS action_parameter ' \
+                                 'FROM button LEFT JOIN action ON action.button_id = button.id ' \
+                                 'WHERE button.deck_id IN ({}) ' \
+                                 'ORDER BY button.deck_id, button.position, action.action_order, action.id;'
+
     def get_by_id(self, button_id: int, deck=None):
         """
         Given a button ID, returns that button object
@@ -45,22 +55,37 @@ class ButtonDao(Dao):
         Returns:
             Button[]: List of Button objects
         """
+        buttons = self.get_for_decks([deck]).get(deck.id)
+        return buttons if buttons else None
+
+    def get_for_decks(self, decks):
+        """
+        Given a list of Deck objects, get all Buttons (and all of their Actions) that are on those Decks, using a single
+        joined query rather than one query per button.
+
+        Args:
+            decks (Deck[]): Deck objects to get all the buttons for
+
+        Returns:
+            dict: Deck ID -> list of Button objects, ordered by position. Decks without buttons are not included.
+        """
+        decks_by_id = {str(deck.id): deck for deck in decks}
+        deck_ids = list(decks_by_id.keys())
+        results = []
+
         conn = ButtonDao.get_db_conn()
 
         with conn:
             conn.row_factory = sl.Row
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM button WHERE deck_id=?;', (str(deck.id),))
 
-            results = cursor.fetchall()
-            if not results:
-                return None
+            for i in range(0, len(deck_ids), ButtonDao.MAX_DECKS_PER_QUERY):
+                chunk = deck_ids[i:i + ButtonDao.MAX_DECKS_PER_QUERY]
+                placeholders = ', '.join(['?'] * len(chunk))
+                cursor.execute(ButtonDao.BUTTONS_WITH_ACTIONS_QUERY.format(placeholders), tuple(chunk))
+                results += cursor.fetchall()
 
-        buttons = ButtonDao.get_objs_from_result(results, deck=deck)
-        for button in buttons:
-            db_actions = ButtonDao.action_dao.get_for_button(button)
-            button.actions = db_actions if db_actions else []
-        return buttons
+        return ButtonDao.get_objs_with_actions_from_result(results, decks_by_id)
 
     def create(self, button):
         """
@@ -98,8 +123,8 @@ class ButtonDao(Dao):
 
         with conn:
             cursor = conn.cursor()
-            cursor.execute('UPDATE button SET font = ?, font_size = ?, label = ?, background_color = ?, text_color = ?, background_image = ? WHERE id = ?;',
-                           (button.style.font, button.style.font_size, button.style.label, button.style.background_color, button.style.text_color, button.style.background_image, button.id))
+            cursor.execute('UPDATE button SET font = ?, font_size = ?, label = ?, background_color = ?, text_color = ?, background_image = ?, concurrency_policy = ? WHERE id = ?;',
+                           (button.style.font, button.style.font_size, button.style.label, button.style.background_color, button.style.text_color, button.style.background_image, button.concurrency_policy.name, button.id))
             logging.debug(f'Updating button ({button.id}): font = {button.style.font} | font_size = {button.style.font_size} | label = {button.style.label} | background_color = {button.style.background_color} | text_color = {button.style.text_color}')
             conn.commit()
 
@@ -126,6 +151,8 @@ class ButtonDao(Dao):
         background_color = result['background_color']
         text_color = result['text_color']
         background_image = result['background_image']
+        # Buttons that have never had a policy set (or rows from before the column existed) use the default
+        concurrency_policy = ConcurrencyPolicy.get_by_name(result.get('concurrency_policy'))
 
         if not deck:
             from dao.deck_dao import DeckDao
@@ -137,9 +164,45 @@ class ButtonDao(Dao):
         else:
             bs = None
 
-        button = Button(position, deck, style=bs, btn_id=btn_id)
+        button = Button(position, deck, style=bs, btn_id=btn_id, concurrency_policy=concurrency_policy)
         return button
 
+    @staticmethod
+    def get_objs_with_actions_from_result(results, decks_by_id):
+        """
+        Given the SQL results of BUTTONS_WITH_ACTIONS_QUERY (one row per action, or one row for a button without any
+        actions, ordered by button), assembles the Button objects along with all of their Actions.
+
+        Args:
+            results (list): List of SQL rows, each containing a button and (optionally) one of its actions
+            decks_by_id (dict): Deck ID -> Deck object, for every deck that appears in the results
+
+        Returns:
+            dict: Deck ID -> list of Button objects
+        """
+        buttons_by_deck = {}
+        button = None
+
+        for result in results:
+            row = dict(result)
+
+            if button is None or button.id != row['id']:
+                deck = decks_by_id[row['deck_id']]
+                button = ButtonDao.get_obj_from_result(row, deck=deck)
+                buttons_by_deck.setdefault(row['deck_id'], []).append(button)
+
+            if row['action_id'] is not None:
+                action_row = {
+                    'id': row['action_id'],
+                    'type': row['action_type'],
+                    'button_id': row['id'],
+                    'action_order': row['action_order'],
+                    'parameter': row['action_parameter']
+                }
+                button.add_action(ActionDao.get_obj_from_result(action_row, button=button))
+
+        return buttons_by_deck
+
     @staticmethod
     def get_objs_from_result(results, deck=None):
         """
@@ -0,0 +1,133 @@
+import logging
+import sqlite3 as sl
+import threading
+
+
+class ConnectionManager:
+    """
+    Small pool of long-lived SQLite connections, handed out one per thread.
+
+    The first DAO call on a thread leases a connection (re-using an idle one if possible) and every later DAO call on
+    that thread re-uses it. When the thread exits - e.g. at the end of a Flask request - its connection goes back into
+    the idle pool for the next thread, so connections are never used by two threads at once and are rarely re-opened.
+    """
+
+    MAX_IDLE_CONNECTIONS = 4
+
+    PRAGMAS = (
+        'PRAGMA journal_mode=WAL;',
+        'PRAGMA synchronous=NORMAL;',
+        'PRAGMA temp_store=MEMORY;',
+        'PRAGMA busy_timeout=5000;'
+    )
+
+    def __init__(self, max_idle_connections: int = MAX_IDLE_CONNECTIONS):
+        """
+        Constructor for ConnectionManager class.
+
+        Args:
+            max_idle_connections (int): Maximum number of unused connections to keep open, per database (default: 4)
+        """
+        self.max_idle_connections = max_idle_connections
+        self.connections_opened = 0
+        self._idle = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def get_connection(self, db_name: str):
+        """
+        Gets this thread's connection to the given database, leasing one from the pool if needed.
+
+        Args:
+            db_name (str): Path to the SQLite database file
+
+        Returns:
+            sqlite3.Connection: Connection to the database
+        """
+        leases = getattr(self._local, 'leases', None)
+        if leases is None:
+            leases = self._local.leases = {}
+
+        lease = leases.get(db_name)
+        if lease is None:
+            lease = _Lease(self, db_name, self._acquire(db_name))
+            leases[db_name] = lease
+
+        return lease.conn
+
+    def _acquire(self, db_name: str):
+        with self._lock:
+            idle = self._idle.get(db_name)
+            if idle:
+                return idle.pop()
+
+        return self._open(db_name)
+
+    def _release(self, db_name: str, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sl.Error:
+            return
+
+        with self._lock:
+            idle = self._idle.setdefault(db_name, [])
+            if len(idle) < self.max_idle_connections:
+                idle.append(conn)
+                return
+
+        conn.close()
+
+    def _open(self, db_name: str):
+        # Connections are handed from thread to thread (but never used by two at once), hence check_same_thread
+        conn = sl.connect(db_name, check_same_thread=False)
+        conn.row_factory = sl.Row
+
+        for pragma in ConnectionManager.PRAGMAS:
+            try:
+                conn.execute(pragma)
+            except sl.DatabaseError as e:
+                logging.warning(f'Could not apply "{pragma}" to {db_name}: {e}')
+
+        with self._lock:
+            self.connections_opened += 1
+
+        return conn
+
+    def release_current(self):
+        """Returns the calling thread's connections to the pool"""
+        leases = getattr(self._local, 'leases', None)
+        if leases:
+            for lease in list(leases.values()):
+                lease.release()
+            leases.clear()
+
+    def close_all(self):
+        """Closes the calling thread's connections and every idle connection"""
+        self.release_current()
+
+        with self._lock:
+            idle = self._idle
+            self._idle = {}
+
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+
+class _Lease:
+    """A connection on loan to one thread - returned to the pool when the thread's local storage is cleaned up"""
+
+    def __init__(self, manager: ConnectionManager, db_name: str, conn):
+        self.manager = manager
+        self.db_name = db_name
+        self.conn = conn
+
+    def release(self):
+        if self.conn is not None:
+            conn = self.conn
+            self.conn = None
+            self.manager._release(self.db_name, conn)
+
+    def __del__(self):
+        self.release()
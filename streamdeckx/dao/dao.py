@@ -1,11 +1,14 @@
 from abc import ABC, abstractmethod
-import sqlite3 as sl
+
+from dao.connection_manager import ConnectionManager
 
 
 class Dao(ABC):
 
     db_name = 'sdx_db.db'
 
+    connection_manager = ConnectionManager()
+
     @abstractmethod
     def get_by_id(self, obj_id):
         pass
@@ -20,4 +23,4 @@ class Dao(ABC):
 
     @staticmethod
     def get_db_conn():
-        return sl.connect(Dao.db_name)
+        return Dao.connection_manager.get_connection(Dao.db_name)
@@ -58,35 +58,67 @@ class DeckDao(Dao):
                 return None
 
         for result in results:
-            decks.append(self.get_obj_from_result(result, include_buttons=True))
+            decks.append(DeckDao.build_deck(dict(result), populate_buttons=False))
+
+        # Load the buttons of every deck at once, rather than deck-by-deck
+        buttons_by_deck = DeckDao.button_dao.get_for_decks(decks)
+        for deck in decks:
+            buttons = buttons_by_deck.get(deck.id)
+            if buttons:
+                deck.buttons = buttons
+            else:
+                deck.populate_default_buttons()
 
         return decks
 
     def get_obj_from_result(self, results, include_buttons=True):
-        from deck import XLDeck, OriginalDeck, VirtualDeck
         first_row = dict(results[0]) if isinstance(results, list) else dict(results)
 
+        # If the buttons are about to be loaded from the database, there's no point creating default ones first
+        deck = DeckDao.build_deck(first_row, populate_buttons=not include_buttons)
+
+        # Get buttons
+        if include_buttons:
+            button_dao = ButtonDao()
+            buttons = button_dao.get_for_deck(deck)
+            if buttons:
+                deck.buttons = buttons
+            else:
+                deck.populate_default_buttons()
+
+        return deck
+
+    @staticmethod
+    def build_deck(first_row, populate_buttons=True):
+        """
+        Builds the Deck object represented by a single row of the deck table.
+
+        Args:
+            first_row (dict): SQL result containing a single deck
+            populate_buttons (bool): Whether to give the deck default buttons. Pass False when the buttons are about to
+                be loaded from the database, so that no throwaway Button objects are created.
+
+        Returns:
+            Deck: Deck object represented by the SQL result
+        """
+        from deck import XLDeck, OriginalDeck, VirtualDeck
+
         deck_id = first_row['id']
         deck_type_name = first_row['type']
         deck_type = DeckTypes.get_by_name(deck_type_name)
 
         deck = None
         if deck_type == DeckTypes.XL:
-            deck = XLDeck(deck_id)
+            deck = XLDeck(deck_id, populate_buttons=populate_buttons)
 
         if deck_type == DeckTypes.ORIGINAL:
-            deck = OriginalDeck(deck_id)
+            deck = OriginalDeck(deck_id, populate_buttons=populate_buttons)
 
         if deck_type == DeckTypes.VIRTUAL:
             rows = first_row['num_rows']
             cols = first_row['num_cols']
-            deck = VirtualDeck(deck_id, rows=rows, cols=cols)
+            deck = VirtualDeck(deck_id, rows=rows, cols=cols, populate_buttons=populate_buttons)
 
         # TODO add handling for mini
 
-        # Get buttons
-        if include_buttons:
-            button_dao = ButtonDao()
-            deck.buttons = button_dao.get_for_deck(deck)
-
         return deck
@@ -0,0 +1,97 @@
+import hashlib
+import sqlite3 as sl
+
+from dao.dao import Dao
+
+
+class ImageDao(Dao):
+    """Content-addressed store for image data - each distinct image is stored once, keyed by its SHA-256 hash"""
+
+    def get_by_id(self, image_hash: str):
+        """
+        Given an image hash, returns the image data stored under it
+
+        Args:
+            image_hash (str): SHA-256 hex digest of the image data
+
+        Returns:
+            bytes: Image data, or None if no image is stored under this hash
+        """
+        conn = ImageDao.get_db_conn()
+
+        with conn:
+            conn.row_factory = sl.Row
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM image_blob WHERE hash=?;', (image_hash,))
+
+            result = cursor.fetchone()
+            if not result:
+                return None
+
+        return ImageDao.get_obj_from_result(result)
+
+    def get_original_hash(self, image_hash: str):
+        """
+        Given the hash of a (normalized) image, returns the hash of the original it was made from, if that was kept
+
+        Args:
+            image_hash (str): SHA-256 hex digest of the image data
+
+        Returns:
+            str: SHA-256 hex digest of the original image data, or None if the original was not kept
+        """
+        conn = ImageDao.get_db_conn()
+
+        with conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT original_hash FROM image_blob WHERE hash=?;', (image_hash,))
+
+            result = cursor.fetchone()
+            if not result:
+                return None
+
+        return result[0]
+
+    def create(self, data: bytes, original_hash: str = None):
+        """
+        Stores the given image data, unless an identical image is already stored.
+
+        Args:
+            data (bytes): Image data (e.g. the contents of a PNG file)
+            original_hash (str): Hash of the (already stored) original image this one was made from [optional]
+
+        Returns:
+            str: SHA-256 hex digest that the image is stored under
+        """
+        image_hash = ImageDao.get_hash(data)
+        conn = ImageDao.get_db_conn()
+
+        with conn:
+            cursor = conn.cursor()
+            cursor.execute('INSERT OR IGNORE INTO image_blob (hash, data, original_hash) VALUES (?, ?, ?);',
+                           (image_hash, sl.Binary(data), original_hash))
+
+            if original_hash:
+                # The same image may have been uploaded before, without keeping its original
+                cursor.execute('UPDATE image_blob SET original_hash = ? WHERE hash = ? AND original_hash IS NULL;',
+                               (original_hash, image_hash))
+            conn.commit()
+
+        return image_hash
+
+    @staticmethod
+    def get_hash(data: bytes):
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def get_obj_from_result(result):
+        """
+        Given a single SQL result containing a single image, get the image data
+
+        Args:
+            result (dict): SQL result containing a single image
+
+        Returns:
+            bytes: Image data
+        """
+        return bytes(result['data'])
@@ -0,0 +1,196 @@
+import base64
+import binascii
+import hashlib
+import logging
+import sqlite3 as sl
+
+
+class Migration:
+    """A single, numbered step in the evolution of the database schema"""
+
+    def __init__(self, version: int, description: str, statements: tuple):
+        """
+        Constructor for Migration class.
+
+        Args:
+            version (int): Schema version this migration brings the database to
+            description (str): Short, human-readable summary of the change
+            statements (tuple): Steps to execute, in order - either SQL statements, or functions that take the
+                connection (for changes that cannot be expressed in SQL alone)
+        """
+        self.version = version
+        self.description = description
+        self.statements = statements
+
+    def __repr__(self):
+        return f'Migration {self.version} ({self.description})'
+
+    def apply(self, conn):
+        for statement in self.statements:
+            if callable(statement):
+                statement(conn)
+            else:
+                conn.execute(statement)
+
+
+def _move_background_images_to_blobs(conn):
+    """Replaces the base64 image data stored on each button with the hash of that image in the image_blob table"""
+    rows = conn.execute('SELECT id, background_image FROM button WHERE background_image IS NOT NULL;').fetchall()
+
+    for button_id, background_image in rows:
+        if not background_image:
+            conn.execute('UPDATE button SET background_image = NULL WHERE id = ?;', (button_id,))
+            continue
+
+        try:
+            data = base64.b64decode(background_image, validate=True)
+        except (binascii.Error, ValueError):
+            logging.warning(f'Dropping unreadable background image of button {button_id}')
+            conn.execute('UPDATE button SET background_image = NULL WHERE id = ?;', (button_id,))
+            continue
+
+        image_hash = hashlib.sha256(data).hexdigest()
+        conn.execute('INSERT OR IGNORE INTO image_blob (hash, data) VALUES (?, ?);', (image_hash, sl.Binary(data)))
+        conn.execute('UPDATE button SET background_image = ? WHERE id = ?;', (image_hash, button_id))
+
+
+# Every schema change must be appended here as a new migration with the next version number - never edit one that
+# has already been released, as existing databases will not run it again.
+MIGRATIONS = (
+    Migration(1, 'Initial schema', (
+        """
+        CREATE TABLE IF NOT EXISTS deck (
+            id TEXT NOT NULL PRIMARY KEY,
+            name TEXT,
+            type TEXT,
+            num_cols INTEGER,
+            num_rows INTEGER
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS button (
+            id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+            deck_id TEXT NOT NULL REFERENCES deck(id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            font TEXT,
+            font_size INTEGER DEFAULT 16,
+            label TEXT,
+            background_color TEXT DEFAULT '#000000',
+            text_color TEXT DEFAULT '#ffffff',
+            background_image TEXT
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS action (
+            id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+            type TEXT NOT NULL,
+            button_id INTEGER NOT NULL REFERENCES button(id) ON DELETE CASCADE,
+            action_order INTEGER NOT NULL,
+            parameter TEXT
+        );
+        """
+    )),
+    Migration(2, 'Index buttons by deck and actions by button', (
+        'CREATE INDEX IF NOT EXISTS idx_button_deck_position ON button (deck_id, position);',
+        'CREATE INDEX IF NOT EXISTS idx_action_button_order ON action (button_id, action_order);',
+        'ANALYZE;'
+    )),
+    Migration(3, 'Store background images once, by hash', (
+        """
+        CREATE TABLE IF NOT EXISTS image_blob (
+            hash TEXT NOT NULL PRIMARY KEY,
+            data BLOB NOT NULL
+        );
+        """,
+        # button.background_image now holds the hash of an image_blob, rather than the image itself
+        _move_background_images_to_blobs
+    )),
+    Migration(4, 'Link normalized images to their originals', (
+        'ALTER TABLE image_blob ADD COLUMN original_hash TEXT REFERENCES image_blob(hash);',
+    )),
+    Migration(5, 'Store what each button does when pressed while running', (
+        # Name of a ConcurrencyPolicy - NULL for the default
+        'ALTER TABLE button ADD COLUMN concurrency_policy TEXT;',
+    ))
+)
+
+
+class SchemaMigrator:
+    """Brings a database up to the latest schema version by applying any migrations it has not yet seen"""
+
+    def __init__(self, migrations: tuple = MIGRATIONS):
+        """
+        Constructor for SchemaMigrator class.
+
+        Args:
+            migrations (tuple): Migrations to apply, in any order (default: MIGRATIONS)
+        """
+        self.migrations = sorted(migrations, key=lambda migration: migration.version)
+
+        versions = [migration.version for migration in self.migrations]
+        if len(set(versions)) != len(versions):
+            raise ValueError(f'Duplicate migration versions: {versions}')
+
+    @property
+    def latest_version(self):
+        return self.migrations[-1].version if self.migrations else 0
+
+    @staticmethod
+    def get_version(conn):
+        """
+        Args:
+            conn (sqlite3.Connection): Connection to the database
+
+        Returns:
+            int: Current schema version of the database (0 for a database that has never been migrated)
+        """
+        conn.execute('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL);')
+        row = conn.execute('SELECT MAX(version) FROM schema_version;').fetchone()
+        return row[0] or 0
+
+    def get_pending(self, conn):
+        """
+        Args:
+            conn (sqlite3.Connection): Connection to the database
+
+        Returns:
+            list: Migrations that have not yet been applied to the database, in order
+        """
+        current_version = SchemaMigrator.get_version(conn)
+        return [migration for migration in self.migrations if migration.version > current_version]
+
+    def migrate(self, conn):
+        """
+        Applies every pending migration. Each migration runs in its own transaction, so a failing migration leaves the
+        database at the last version that succeeded, with no partial changes.
+
+        Args:
+            conn (sqlite3.Connection): Connection to the database
+
+        Returns:
+            int: Schema version of the database after migrating
+        """
+        pending = self.get_pending(conn)
+        if not pending:
+            return self.latest_version
+
+        # Manage the transactions ourselves, as the sqlite3 module does not open one before DDL statements
+        isolation_level = conn.isolation_level
+        conn.isolation_level = None
+
+        try:
+            for migration in pending:
+                logging.info(f'Applying database {migration}...')
+                conn.execute('BEGIN;')
+                try:
+                    migration.apply(conn)
+                    conn.execute('INSERT INTO schema_version (version) VALUES (?);', (migration.version,))
+                    conn.execute('COMMIT;')
+                except Exception:
+                    conn.execute('ROLLBACK;')
+                    logging.exception(f'Could not apply database {migration}!')
+                    raise
+        finally:
+            conn.isolation_level = isolation_level
+
+        return pending[-1].version
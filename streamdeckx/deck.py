@@ -1,14 +1,21 @@
-import functools
 import logging
 import os
 import re
+import threading
 from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
 
 from StreamDeck.DeviceManager import DeviceManager
 
+from action_executor import ActionExecutor
 from button import Button
 from dao.deck_dao import DeckDao
+from deck_events import DeckEventBroadcaster
+from deck_registry import DeckRegistry
 from deck_types import DeckTypes
+from device_watcher import DeviceWatcher
+from key_writer import KeyImageWriter
+from session_registry import SessionRegistry
 
 ASSETS_PATH = os.path.join(os.path.dirname(__file__), "Assets")
 
@@ -20,23 +27,46 @@ class Deck(ABC):
 
     deck_dao = DeckDao()
 
-    instantiated_decks = []
-    mappings = []
+    registry = DeckRegistry()
+    sessions = SessionRegistry()
 
-    def __init__(self, deck_id: str, name: str = None, buttons: list = None, session_id: str = None):
+    # Runs the actions of pressed buttons, off the StreamDeck library's read thread
+    action_executor = ActionExecutor()
+
+    # Pushes key image changes and key presses to browsers watching a deck
+    events = DeckEventBroadcaster()
+
+    # Number of threads used to render key images - Pillow releases the GIL while scaling & encoding, so rendering a
+    # whole deck scales with the number of cores
+    RENDER_WORKERS = min(4, os.cpu_count() or 1)
+
+    _render_executor = None
+    _render_executor_lock = threading.Lock()
+
+    _virtual_decks_loaded = False
+    _virtual_decks_lock = threading.Lock()
+
+    def __init__(self, deck_id: str, name: str = None, buttons: list = None, session_id: str = None,
+                 populate_buttons: bool = True):
         # The 'deck_id' is actually the Stream Deck's Serial Number
         self.id = deck_id
         self.name = name
+        self._html = None
         self.buttons = buttons if buttons else []
         self._is_open = False
-        self.session_id = session_id
+        self._session_id = None
+
+        # Render digest of the image last written to each physical key, by position
+        self.key_image_digests = {}
 
-        if not self.buttons:
-            # Populate with the correct number of (empty) buttons
-            for i in range(0, self.get_num_buttons()):
-                self.add_button(i)
+        # Key images are written to the device in the background, by this writer's thread
+        self.key_writer = KeyImageWriter(self)
 
-        Deck.instantiated_decks.append(self)
+        if not self.buttons and populate_buttons:
+            self.populate_default_buttons()
+
+        Deck.registry.add(self)
+        self.session_id = session_id
 
     def __str__(self):
         return f'{self.name}'
@@ -51,34 +81,69 @@ class Deck(ABC):
 
         return self.id == other.id
 
+    @property
+    def session_id(self):
+        return self._session_id
+
+    @session_id.setter
+    def session_id(self, session_id: str):
+        # Keep the registry in sync, so that key presses on this session find this deck
+        previous_session_id = self._session_id
+        self._session_id = session_id
+
+        if session_id != previous_session_id:
+            Deck.registry.bind_session(self, session_id, previous_session_id=previous_session_id)
+
+    @property
+    def buttons(self):
+        return self._buttons
+
+    @buttons.setter
+    def buttons(self, buttons: list):
+        self._buttons = buttons
+        self._html = None
+
     def add_button(self, index):
-        self.buttons.append(Button(index, self))
+        self._buttons.append(Button(index, self))
+        self._html = None
+
+    def populate_default_buttons(self):
+        """Populates this deck with the correct number of (empty) buttons"""
+        self.buttons = []
+        for i in range(0, self.get_num_buttons()):
+            self.add_button(i)
 
     @staticmethod
     def key_change_callback(deck, key, state):
-        if not state:
-            # Button was released
-            return
-
         # Print new key state
         logging.debug("Deck {} Key {} = {}".format(deck.id(), key, state))
 
         deck = Deck._get_instantiated_deck_by_session_id(deck.id())
+        if not deck:
+            return
+
+        Deck.events.publish(deck.id, 'key', {'key': key, 'pressed': bool(state)})
+
+        if not state:
+            # Button was released
+            return
+
         button = deck.buttons[key]
-        button.execute_actions()
+        Deck.action_executor.submit(button, policy=button.concurrency_policy)
 
     def set_callbacks(self):
         self.deck_interface.set_key_callback(Deck.key_change_callback)
 
-    @functools.cached_property
+    @property
     def deck_interface(self):
-        decks = DeviceManager().enumerate()
+        """
+        Live device handle of this deck, as registered by discovery - so after the deck is re-plugged, this is the new
+        handle. Never enumerates devices.
 
-        for deck in decks:
-            serial_num = Deck._get_serial_from_session_id(deck.id())
-
-            if serial_num == self.id:
-                return deck
+        Returns:
+            StreamDeck: Device handle from the StreamDeck library, or None if this deck is not connected
+        """
+        return Deck.sessions.get_device(self.id)
 
     def open(self):
         if not self._is_open and self.deck_interface:
@@ -95,18 +160,67 @@ class Deck(ABC):
             return
 
         self.deck_interface.reset()
+        self.invalidate_key_images()
 
-    def update(self):
-        need_to_open = not self._is_open
+    def invalidate_key_images(self):
+        """Forgets what is shown on each physical key, so that the next update re-sends every key image"""
+        self.key_image_digests.clear()
+
+    @staticmethod
+    def configure_rendering(max_workers: int):
+        """
+        Sets the number of threads used to render key images.
 
-        if need_to_open:
-            self.open()
+        Args:
+            max_workers (int): Number of render threads - 1 renders every key on the calling thread
+        """
+        with Deck._render_executor_lock:
+            Deck.RENDER_WORKERS = max(1, max_workers)
 
-        for button in self.buttons:
-            button.update_key_image()
+            if Deck._render_executor:
+                Deck._render_executor.shutdown(wait=False)
+                Deck._render_executor = None
+
+    @staticmethod
+    def _get_render_executor():
+        with Deck._render_executor_lock:
+            if not Deck._render_executor:
+                Deck._render_executor = ThreadPoolExecutor(max_workers=Deck.RENDER_WORKERS,
+                                                           thread_name_prefix='KeyRender')
+
+            return Deck._render_executor
+
+    def render_buttons(self, buttons: list = None):
+        """
+        Renders the key images of the given buttons concurrently, on the shared render threads.
+
+        Args:
+            buttons (list): Buttons to render (default: every button on this deck)
 
-        if need_to_open:
-            self.close()
+        Returns:
+            list: (Button, image) tuples, in key order - images are in the deck's native format
+        """
+        buttons = sorted(self.buttons if buttons is None else buttons, key=lambda button: button.position)
+
+        if len(buttons) < 2 or Deck.RENDER_WORKERS < 2:
+            images = [button.button_image.render_key_image() for button in buttons]
+        else:
+            images = list(Deck._get_render_executor().map(lambda button: button.button_image.render_key_image(),
+                                                           buttons))
+
+        return list(zip(buttons, images))
+
+    def update(self):
+        """Sends the image of every button whose rendered content has changed since it was last sent to the deck"""
+        dirty_buttons = [button for button in self.buttons if button.is_dirty]
+
+        if not dirty_buttons:
+            # Nothing has changed - don't touch the device at all
+            return
+
+        # Render everything up front (in parallel), then queue the images up to be written in the background
+        for button, image in self.render_buttons(dirty_buttons):
+            button.update_key_image(image=image)
 
     def get_num_buttons(self):
         return self.__class__.cols * self.__class__.rows
@@ -122,15 +236,11 @@ class Deck(ABC):
 
     @staticmethod
     def _get_instantiated_deck_by_session_id(deck_id):
-        for deck in Deck.instantiated_decks:
-            if deck.session_id == deck_id:
-                return deck
+        return Deck.registry.get_by_session(deck_id)
 
     @staticmethod
     def _get_serial_from_session_id(session_id: str):
-        for mapping in Deck.mappings:
-            if mapping['session_id'] == session_id:
-                return mapping['serial_number']
+        return Deck.sessions.get_serial(session_id)
 
     @staticmethod
     def get_virtual_decks():
@@ -142,6 +252,58 @@ class Deck(ABC):
 
         return virtual_decks
 
+    @staticmethod
+    def get_active_decks():
+        """
+        Gets every deck that can be used right now - virtual decks, and the physical decks found by discovery (the
+        DeviceWatcher, or a rescan). Reads the in-memory registry only: never enumerates USB devices.
+
+        Returns:
+            list: Active Deck objects
+        """
+        Deck._load_virtual_decks()
+        return Deck.registry.get_active()
+
+    @staticmethod
+    def get_active_by_id(deck_id: str):
+        """
+        Looks up an active deck (see get_active_decks) by its ID, without enumerating USB devices.
+
+        Args:
+            deck_id (str): ID (serial number) of the deck
+
+        Returns:
+            Deck: Deck object, or None if there is no such active deck
+        """
+        Deck._load_virtual_decks()
+        return Deck.registry.get_active_by_id(deck_id)
+
+    @staticmethod
+    def add_virtual_deck(deck):
+        """
+        Saves a newly created virtual deck, and makes it active.
+
+        Args:
+            deck (VirtualDeck): Virtual deck to add
+        """
+        Deck.deck_dao.create(deck)
+        Deck.registry.pin(deck)
+
+    @staticmethod
+    def _load_virtual_decks():
+        # Virtual decks only change through this app, so they are loaded from the database once and then kept in memory
+        if Deck._virtual_decks_loaded:
+            return
+
+        with Deck._virtual_decks_lock:
+            if Deck._virtual_decks_loaded:
+                return
+
+            for virtual_deck in Deck.get_virtual_decks():
+                Deck.registry.pin(virtual_deck)
+
+            Deck._virtual_decks_loaded = True
+
     @staticmethod
     def get_connected(update_images: bool = False):
         decks = DeviceManager().enumerate()
@@ -150,74 +312,209 @@ class Deck(ABC):
         deck_objs += Deck.get_virtual_decks()
 
         for deck in decks:
-            deck_id = deck.id()
-
-            if not any(deck_id == mapping['session_id'] for mapping in Deck.mappings):
-                # If this is a new/unrecognized session, get its serial number
-                deck.open()
-                serial_num = deck.get_serial_number()[:12]
-                logging.debug(f'Found deck with {serial_num=}')
-                deck.close()
-            else:
-                # We must already have the serial number
-                serial_num = Deck._get_serial_from_session_id(deck_id)
-
-            Deck.mappings.append({'session_id': deck_id, 'serial_number': serial_num})
-
-            # Check to see if we have already instantiated this deck
-            instantiated_deck = Deck._get_instantiated_deck_by_session_id(deck_id)
-
-            # If we haven't already instantiated it, we need to get it from the database
-            if not instantiated_deck:
-                instantiated_deck = Deck.deck_dao.get_by_id(serial_num)
-
-            if instantiated_deck:
-                instantiated_deck.session_id = deck_id
-                deck_objs.append(instantiated_deck)
-                if update_images:
-                    instantiated_deck.update()
-                continue
+            deck_obj = Deck._get_deck_for_device(deck, update_images=update_images)
 
-            if deck.deck_type() == DeckTypes.XL.value:
-                deck_obj = XLDeck(serial_num, session_id=deck_id)
-                Deck.deck_dao.create(deck_obj)
-                deck_objs.append(deck_obj)
-                if update_images:
-                    deck_obj.update()
-            elif deck.deck_type() == DeckTypes.ORIGINAL.value:
-                deck_obj = OriginalDeck(serial_num, session_id=deck_id)
-                Deck.deck_dao.create(deck_obj)
+            if deck_obj:
                 deck_objs.append(deck_obj)
-                if update_images:
-                    deck_obj.update()
-            else:
-                print(f'Unsupported deck type "{deck.deck_type()}"!')
+
+        # Clean up after any devices that have been unplugged since the last enumeration, so that their decks are no
+        # longer active
+        for session_id in Deck.sessions.get_stale(deck.id() for deck in decks):
+            # Closes the old handle, then forgets the session
+            Deck.disconnect_device(session_id)
 
         return deck_objs
 
+    @staticmethod
+    def _get_deck_for_device(deck, update_images: bool = False):
+        """
+        Gets the Deck object for the given physical device, loading it from (or creating it in) the database if it
+        has not been seen before.
+
+        Args:
+            deck (StreamDeck): Device object from the StreamDeck library
+            update_images (bool): Whether to push any changed key images to the device (default: False)
+
+        Returns:
+            Deck: Deck object for this device, or None if the device type is not supported
+        """
+        deck_id = deck.id()
+
+        if deck_id not in Deck.sessions:
+            # If this is a new/unrecognized session, get its serial number
+            deck.open()
+            serial_num = deck.get_serial_number()[:12]
+            logging.debug(f'Found deck with {serial_num=}')
+            deck.close()
+
+            previous_session_id = Deck.sessions.get_session(serial_num)
+            if previous_session_id is not None and previous_session_id != deck_id:
+                # Re-plugged into a different port - clean up after the old session first, while its handle is still
+                # registered, so that the deck is opened (and its key images sent) afresh with the new handle
+                logging.info(f'Deck {serial_num} moved from {previous_session_id} to {deck_id}')
+                previous_deck = Deck._get_instantiated_deck_by_session_id(previous_session_id)
+                if previous_deck:
+                    previous_deck.disconnect()
+
+            # From now on, this is the handle used for the device (see deck_interface)
+            Deck.sessions.register(deck_id, serial_num, device=deck)
+        else:
+            # We must already have the serial number
+            serial_num = Deck._get_serial_from_session_id(deck_id)
+            Deck._replace_dead_device(deck, serial_num)
+
+        # Check to see if we have already instantiated this deck (possibly under a previous session)
+        instantiated_deck = Deck._get_instantiated_deck_by_session_id(deck_id)
+        if not instantiated_deck:
+            instantiated_deck = Deck.registry.get_by_id(serial_num)
+
+        # If we haven't already instantiated it, we need to get it from the database
+        if not instantiated_deck:
+            instantiated_deck = Deck.deck_dao.get_by_id(serial_num)
+
+        if instantiated_deck:
+            instantiated_deck.session_id = deck_id
+            if update_images:
+                instantiated_deck.update()
+            return instantiated_deck
+
+        if deck.deck_type() == DeckTypes.XL.value:
+            deck_obj = XLDeck(serial_num, session_id=deck_id)
+        elif deck.deck_type() == DeckTypes.ORIGINAL.value:
+            deck_obj = OriginalDeck(serial_num, session_id=deck_id)
+        else:
+            print(f'Unsupported deck type "{deck.deck_type()}"!')
+            return None
+
+        Deck.deck_dao.create(deck_obj)
+        if update_images:
+            deck_obj.update()
+        return deck_obj
+
+    @staticmethod
+    def _replace_dead_device(deck, serial_num: str):
+        """
+        Registers the given handle for a known session if the registered handle is dead - e.g. because the device was
+        re-plugged into the same port, and so came back with the same session ID.
+
+        Args:
+            deck (StreamDeck): Device object from the StreamDeck library
+            serial_num (str): Serial number of the device
+        """
+        registered = Deck.sessions.get_device(serial_num)
+        if registered is deck:
+            return
+
+        instantiated_deck = Deck._get_instantiated_deck_by_session_id(deck.id())
+        opened = bool(instantiated_deck and instantiated_deck._is_open)
+        if registered is not None and DeviceWatcher.is_alive(registered, opened=opened):
+            return
+
+        logging.info(f'Deck {serial_num} was re-plugged - switching to its new device handle')
+        if instantiated_deck:
+            # Closes the dead handle, and makes the next update re-send every key image
+            instantiated_deck.disconnect()
+
+        Deck.sessions.register(deck.id(), serial_num, device=deck)
+
+    @staticmethod
+    def connect_device(deck):
+        """
+        Sets up a newly connected physical device - looks up its serial number, opens it, registers its callbacks and
+        pushes its key images.
+
+        Args:
+            deck (StreamDeck): Device object from the StreamDeck library
+
+        Returns:
+            Deck: Deck object for this device, or None if the device type is not supported
+        """
+        deck_obj = Deck._get_deck_for_device(deck)
+
+        if deck_obj:
+            deck_obj.activate()
+            deck_obj.update()
+
+        return deck_obj
+
+    @staticmethod
+    def disconnect_device(session_id: str):
+        """
+        Cleans up after a physical device has been unplugged.
+
+        Args:
+            session_id (str): Session ID (device path) of the device that was unplugged
+        """
+        deck_obj = Deck._get_instantiated_deck_by_session_id(session_id)
+
+        if deck_obj:
+            # Before forgetting the session, which also forgets the device handle
+            deck_obj.disconnect()
+            deck_obj.session_id = None
+
+        Deck.sessions.remove(session_id)
+
+    def activate(self):
+        """Opens this deck and registers its key callbacks, if that has not already been done"""
+        if self._is_open:
+            return
+
+        self.open()
+        self.deck_interface.set_brightness(100)
+        self.set_callbacks()
+
+    def disconnect(self):
+        """Cleans up after this deck's device has been unplugged, so that it starts afresh when it is reconnected"""
+        deck_interface = self.deck_interface
+        if self._is_open and deck_interface:
+            try:
+                deck_interface.close()
+            except Exception as e:
+                logging.debug(f'Could not close unplugged deck {self.id}: {e}')
+
+        self._is_open = False
+        self.key_writer.clear()
+        self.invalidate_key_images()
+
+        # Image URLs depend on the device's key format, which is looked up again on reconnect
+        for button in self.buttons:
+            button.invalidate_html()
+
     @staticmethod
     def scan():
-        connected_decks = Deck.get_connected(update_images=True)
+        connected_decks = Deck.get_connected()
 
         for conn_deck in connected_decks:
             if isinstance(conn_deck, VirtualDeck):
                 continue
 
-            conn_deck.open()
-            conn_deck.deck_interface.set_brightness(100)
-            conn_deck.set_callbacks()
+            # Open the deck before queueing its key images, as connect_device does
+            conn_deck.activate()
+            conn_deck.update()
 
     @property
     def html(self):
-        html = ''
-        position = 0
-        for row in range(0, self.__class__.rows):
-            html += '<br/>'
-            for column in range(0, self.__class__.cols):
-                html += self.buttons[position].html
-                position += 1
+        """
+        Generates the HTML for displaying this deck's grid of buttons. The HTML is cached until one of the buttons
+        changes (see Button.invalidate_html) or the buttons are replaced.
+
+        Returns:
+            str: HTML representing this deck
+        """
+        if self._html is not None:
+            return self._html
+
+        rows = []
+        for row in range(0, self.rows):
+            first_position = row * self.cols
+            rows.append(''.join(button.html for button in self.buttons[first_position:first_position + self.cols]))
 
-        return html
+        self._html = ''.join(f'<br/>{row}' for row in rows)
+        return self._html
+
+    def invalidate_html(self):
+        """Forgets the cached HTML of this deck (but not of its buttons)"""
+        self._html = None
 
 
 class XLDeck(Deck):
@@ -225,8 +522,9 @@ class XLDeck(Deck):
     cols = 8
     rows = 4
 
-    def __init__(self, deck_id: str, buttons: list = None, session_id: str = None):
-        super().__init__(deck_id, name=str(self.__class__.type.value), buttons=buttons, session_id=session_id)
+    def __init__(self, deck_id: str, buttons: list = None, session_id: str = None, populate_buttons: bool = True):
+        super().__init__(deck_id, name=str(self.__class__.type.value), buttons=buttons, session_id=session_id,
+                         populate_buttons=populate_buttons)
 
 
 class OriginalDeck(Deck):
@@ -234,8 +532,9 @@ class OriginalDeck(Deck):
     cols = 5
     rows = 3
 
-    def __init__(self, deck_id: str, buttons: list = None, session_id: str = None):
-        super().__init__(deck_id, name=str(self.__class__.type.value), buttons=buttons, session_id=session_id)
+    def __init__(self, deck_id: str, buttons: list = None, session_id: str = None, populate_buttons: bool = True):
+        super().__init__(deck_id, name=str(self.__class__.type.value), buttons=buttons, session_id=session_id,
+                         populate_buttons=populate_buttons)
 
 
 class MiniDeck(Deck):
@@ -243,33 +542,24 @@ class MiniDeck(Deck):
     cols = 3
     rows = 2
 
-    def __init__(self, deck_id: str, buttons: list = None, session_id: str = None):
-        super().__init__(deck_id, name=str(self.__class__.type.value), buttons=buttons, session_id=session_id)
+    def __init__(self, deck_id: str, buttons: list = None, session_id: str = None, populate_buttons: bool = True):
+        super().__init__(deck_id, name=str(self.__class__.type.value), buttons=buttons, session_id=session_id,
+                         populate_buttons=populate_buttons)
 
 
 class VirtualDeck(Deck):
     type = DeckTypes.VIRTUAL
 
-    def __init__(self, deck_id: str, cols: int = 5, rows: int = 5, buttons: list = None, session_id: str = None):
+    def __init__(self, deck_id: str, cols: int = 5, rows: int = 5, buttons: list = None, session_id: str = None,
+                 populate_buttons: bool = True):
         self.cols = cols
         self.rows = rows
-        super().__init__(deck_id, name=deck_id, buttons=buttons, session_id=session_id)
+        super().__init__(deck_id, name=deck_id, buttons=buttons, session_id=session_id,
+                         populate_buttons=populate_buttons)
 
     def get_num_buttons(self):
         return self.cols * self.rows
 
-    @property
-    def html(self):
-        html = ''
-        position = 0
-        for row in range(0, self.rows):
-            html += '<br/>'
-            for column in range(0, self.cols):
-                html += self.buttons[position].html
-                position += 1
-
-        return html
-
 
 class NoSuchDeckException(Exception):
     """Raised when a given deck cannot be found"""
@@ -0,0 +1,156 @@
+import itertools
+import json
+import queue
+import threading
+
+
+class DeckEventBroadcaster:
+    """
+    Pushes per-key changes of decks (new key images, key presses & releases) to everyone watching them - e.g. browsers
+    connected to /deckEvents - as Server-Sent Events.
+
+    Each event is serialized once, however many subscribers there are, and only if anyone is subscribed to its deck.
+    Every subscriber has its own bounded queue, so a slow subscriber never holds up the others (or the publisher): one
+    that falls too far behind is sent a single 'resync' event instead, telling it to reload the whole deck.
+    """
+
+    QUEUE_SIZE = 256
+
+    # Tells a subscriber that it has missed events, and should reload the whole deck
+    RESYNC = 'event: resync\ndata: {}\n\n'
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        """
+        Constructor for DeckEventBroadcaster class.
+
+        Args:
+            queue_size (int): Maximum number of events held for a subscriber that is not keeping up (default: 256)
+        """
+        self.queue_size = queue_size
+        self.published = 0
+        self._subscriptions = {}
+        self._event_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscriber_count(self, deck_id: str = None):
+        """
+        Args:
+            deck_id (str): Only count subscribers to this deck (default: count every subscriber)
+
+        Returns:
+            int: Number of subscribers
+        """
+        with self._lock:
+            if deck_id is not None:
+                return len(self._subscriptions.get(deck_id, ()))
+
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def subscribe(self, deck_id: str):
+        """
+        Starts receiving the events of a deck.
+
+        Args:
+            deck_id (str): ID of the deck to watch
+
+        Returns:
+            DeckSubscription: Subscription to read events from - must be passed to unsubscribe once finished with
+        """
+        subscription = DeckSubscription(deck_id, self.queue_size)
+
+        with self._lock:
+            self._subscriptions.setdefault(deck_id, set()).add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.deck_id)
+            if subscriptions is None:
+                return
+
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.deck_id]
+
+    def publish(self, deck_id: str, event_type: str, data):
+        """
+        Sends an event to every subscriber of a deck.
+
+        Args:
+            deck_id (str): ID of the deck the event happened on
+            event_type (str): Type of event (e.g. 'image' or 'key')
+            data (dict or callable): Event data - or a function returning it, which is only called if anyone is
+                subscribed (e.g. to avoid encoding an image nobody will see)
+
+        Returns:
+            str: The serialized event, or None if nobody is subscribed to the deck
+        """
+        with self._lock:
+            subscriptions = tuple(self._subscriptions.get(deck_id, ()))
+
+        if not subscriptions:
+            return None
+
+        if callable(data):
+            data = data()
+
+        message = DeckEventBroadcaster.format_event(next(self._event_ids), event_type, data)
+        for subscription in subscriptions:
+            subscription.put(message)
+
+        self.published += 1
+        return message
+
+    @staticmethod
+    def format_event(event_id: int, event_type: str, data: dict):
+        """
+        Args:
+            event_id (int): ID of the event (sent back by browsers as Last-Event-ID when they reconnect)
+            event_type (str): Type of event
+            data (dict): Event data, which must be serializable to JSON
+
+        Returns:
+            str: Event in the Server-Sent Events wire format
+        """
+        return f'id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+class DeckSubscription:
+    """The events of one deck, queued up for one subscriber"""
+
+    def __init__(self, deck_id: str, queue_size: int):
+        self.deck_id = deck_id
+        self.resyncs = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+
+    def put(self, message: str):
+        with self._lock:
+            try:
+                self._queue.put_nowait(message)
+                return
+            except queue.Full:
+                pass
+
+            # Too far behind to catch up event by event - drop everything queued and have it reload the whole deck
+            while not self._queue.empty():
+                self._queue.get_nowait()
+
+            self._queue.put_nowait(DeckEventBroadcaster.RESYNC)
+            self.resyncs += 1
+
+    def get(self, timeout: float = None):
+        """
+        Waits for the next event.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait (default: wait indefinitely)
+
+        Returns:
+            str: The next serialized event, or None if the timeout expired first
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
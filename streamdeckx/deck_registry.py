@@ -0,0 +1,134 @@
+import threading
+import weakref
+
+
+class DeckRegistry:
+    """
+    Index of instantiated Deck objects, by deck ID (serial number) and by session ID.
+
+    Decks bound to a session (i.e. connected physical decks) are held strongly, since the StreamDeck library's key
+    callbacks need to find them, as are pinned decks (i.e. virtual decks, which are always available). Together these
+    are the 'active' decks that requests are served from. All other decks - such as the temporary decks the DAO builds
+    - are held weakly and disappear from the registry as soon as nothing else refers to them.
+    """
+
+    def __init__(self):
+        self._by_id = weakref.WeakValueDictionary()
+        self._by_session = {}
+        self._pinned = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def add(self, deck):
+        """
+        Registers a newly instantiated deck. A deck that is bound to a session (or pinned) is never replaced by another
+        instance with the same ID.
+
+        Args:
+            deck (Deck): Deck to register
+        """
+        with self._lock:
+            existing = self._by_id.get(deck.id)
+            if existing is None or not self._is_active(existing):
+                self._by_id[deck.id] = deck
+
+    def pin(self, deck):
+        """
+        Keeps the given deck active (and makes it the canonical instance for its ID) until it is removed - for decks
+        that are not bound to a session, such as virtual decks.
+
+        Args:
+            deck (Deck): Deck to pin
+        """
+        with self._lock:
+            self._pinned[deck.id] = deck
+            self._by_id[deck.id] = deck
+
+    def bind_session(self, deck, session_id: str, previous_session_id: str = None):
+        """
+        Binds the given deck to a session, making it the canonical instance for its ID.
+
+        Args:
+            deck (Deck): Deck that is connected
+            session_id (str): Session ID (device path) of the physical device, or None to unbind it
+            previous_session_id (str): Session ID the deck was previously bound to, if any
+        """
+        with self._lock:
+            if previous_session_id is not None and self._by_session.get(previous_session_id) is deck:
+                del self._by_session[previous_session_id]
+
+            if session_id is not None:
+                self._by_session[session_id] = deck
+                self._by_id[deck.id] = deck
+
+    def get_by_session(self, session_id: str):
+        """
+        Args:
+            session_id (str): Session ID (device path) of a physical device
+
+        Returns:
+            Deck: Deck bound to the session, or None
+        """
+        return self._by_session.get(session_id)
+
+    def get_active(self):
+        """
+        Returns:
+            list: Every pinned deck, then every deck bound to a session
+        """
+        with self._lock:
+            decks = list(self._pinned.values())
+            seen_ids = set(self._pinned)
+
+            for deck in self._by_session.values():
+                if deck.id not in seen_ids:
+                    seen_ids.add(deck.id)
+                    decks.append(deck)
+
+            return decks
+
+    def get_active_by_id(self, deck_id: str):
+        """
+        Args:
+            deck_id (str): ID (serial number) of a deck
+
+        Returns:
+            Deck: The deck, if it is pinned or bound to a session - otherwise None
+        """
+        deck = self._by_id.get(deck_id)
+        if deck is not None and self._is_active(deck):
+            return deck
+
+        return None
+
+    def _is_active(self, deck):
+        return deck.session_id is not None or self._pinned.get(deck.id) is deck
+
+    def get_by_id(self, deck_id: str):
+        """
+        Args:
+            deck_id (str): ID (serial number) of a deck
+
+        Returns:
+            Deck: Canonical instance of the deck, or None if there is no live instance
+        """
+        return self._by_id.get(deck_id)
+
+    def remove(self, deck):
+        """
+        Removes every reference this registry holds to the given deck.
+
+        Args:
+            deck (Deck): Deck to remove
+        """
+        with self._lock:
+            if deck.session_id is not None and self._by_session.get(deck.session_id) is deck:
+                del self._by_session[deck.session_id]
+
+            if self._pinned.get(deck.id) is deck:
+                del self._pinned[deck.id]
+
+            if self._by_id.get(deck.id) is deck:
+                del self._by_id[deck.id]
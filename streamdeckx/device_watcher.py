@@ -0,0 +1,273 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+from StreamDeck.DeviceManager import DeviceManager
+
+try:
+    import pyudev
+except ImportError:
+    pyudev = None  # Hotplug events are only available on Linux, with pyudev installed
+
+
+class DeviceWatcherBackend(ABC):
+    """Source of 'devices may have been added or removed' events for the DeviceWatcher"""
+
+    @abstractmethod
+    def wait_for_event(self, timeout: float):
+        """
+        Blocks until a device event arrives, the timeout expires, or wake() is called.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait
+
+        Returns:
+            bool: True if a device event arrived, False otherwise
+        """
+        pass
+
+    @abstractmethod
+    def wake(self):
+        """Interrupts any pending wait_for_event call"""
+        pass
+
+
+class PollingBackend(DeviceWatcherBackend):
+    """Backend that never reports events, so the DeviceWatcher falls back to polling at its poll interval"""
+
+    def __init__(self):
+        self._wake = threading.Event()
+
+    def wait_for_event(self, timeout: float):
+        self._wake.wait(timeout)
+        self._wake.clear()
+        return False
+
+    def wake(self):
+        self._wake.set()
+
+
+class UdevBackend(DeviceWatcherBackend):
+    """Backend that reports USB add/remove events for Elgato devices, using udev (Linux only)"""
+
+    # USB vendor ID of Elgato, as it appears in the udev 'PRODUCT' property (vendor/product/revision, in hex)
+    ELGATO_PRODUCT_PREFIX = 'fd9/'
+
+    def __init__(self):
+        context = pyudev.Context()
+        self._monitor = pyudev.Monitor.from_netlink(context)
+        self._monitor.filter_by(subsystem='usb', device_type='usb_device')
+        self._monitor.start()
+        self._wake = threading.Event()
+
+    def wait_for_event(self, timeout: float):
+        remaining = timeout
+
+        # Poll in short slices so that wake() is honoured promptly
+        while remaining > 0 and not self._wake.is_set():
+            poll_time = min(remaining, 0.5)
+            device = self._monitor.poll(timeout=poll_time)
+            remaining -= poll_time
+
+            if device is not None and UdevBackend._is_elgato_device(device):
+                return True
+
+        self._wake.clear()
+        return False
+
+    def wake(self):
+        self._wake.set()
+
+    @staticmethod
+    def _is_elgato_device(device):
+        return device.get('PRODUCT', '').startswith(UdevBackend.ELGATO_PRODUCT_PREFIX)
+
+
+class FakeBackend(DeviceWatcherBackend):
+    """Backend whose events are raised manually by calling trigger() - used for testing"""
+
+    def __init__(self):
+        self._pending = False
+        self._woken = False
+        self._condition = threading.Condition()
+
+    def trigger(self):
+        """Simulates a device being plugged in or unplugged"""
+        with self._condition:
+            self._pending = True
+            self._condition.notify_all()
+
+    def wait_for_event(self, timeout: float):
+        with self._condition:
+            self._condition.wait_for(lambda: self._pending or self._woken, timeout=timeout)
+            event = self._pending
+            self._pending = False
+            self._woken = False
+            return event
+
+    def wake(self):
+        with self._condition:
+            self._woken = True
+            self._condition.notify_all()
+
+
+class DeviceWatcher:
+    """
+    Keeps track of which physical Stream Decks are plugged in.
+
+    Devices are only enumerated when the backend reports a device event, or when the poll interval expires. The poll
+    interval starts at min_poll_interval, doubles every time a check finds that nothing has changed (up to
+    max_poll_interval) and resets as soon as something does change. Only devices that were actually added or removed
+    are passed on to the on_added/on_removed callbacks.
+
+    A device that is re-plugged into the same port between two checks usually comes back with the same session ID, so
+    a session whose previous handle is dead (see is_alive) is reported as removed, then added again with its new handle.
+    """
+
+    def __init__(self, on_added, on_removed, backend: DeviceWatcherBackend = None, enumerate_devices=None,
+                 min_poll_interval: float = 2, max_poll_interval: float = 30):
+        """
+        Constructor for DeviceWatcher class.
+
+        Args:
+            on_added (callable): Called with the StreamDeck device object of every newly connected device
+            on_removed (callable): Called with the session ID (device path) of every disconnected device
+            backend (DeviceWatcherBackend): Source of device events (default: udev if available, otherwise polling)
+            enumerate_devices (callable): Returns all connected StreamDeck devices (default: DeviceManager().enumerate)
+            min_poll_interval (float): Shortest time between checks, in seconds (default: 2)
+            max_poll_interval (float): Longest time between checks, in seconds (default: 30)
+        """
+        self.on_added = on_added
+        self.on_removed = on_removed
+        self.backend = backend if backend else DeviceWatcher.get_default_backend()
+        self.enumerate_devices = enumerate_devices if enumerate_devices else lambda: DeviceManager().enumerate()
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.poll_interval = min_poll_interval
+        self.known_devices = {}
+        self._opened_session_ids = set()
+        self._stopped = threading.Event()
+
+    @property
+    def known_session_ids(self):
+        return set(self.known_devices)
+
+    @staticmethod
+    def get_default_backend():
+        """
+        Gets the best available backend for this platform.
+
+        Returns:
+            DeviceWatcherBackend: UdevBackend if pyudev is available and working, otherwise PollingBackend
+        """
+        if pyudev:
+            try:
+                return UdevBackend()
+            except Exception as e:
+                logging.warning(f'Could not monitor udev for device events ({e}) - falling back to polling.')
+
+        return PollingBackend()
+
+    @staticmethod
+    def is_alive(device, opened: bool = False):
+        """
+        Args:
+            device (StreamDeck): Device handle from the StreamDeck library
+            opened (bool): Whether the handle has been opened, and so should still be open (default: False)
+
+        Returns:
+            bool: False if the device the handle belongs to has gone away - even if another device has since appeared
+                at the same path - True otherwise
+        """
+        try:
+            if not device.connected():
+                return False
+
+            # connected() only checks for a device at the same path - but the StreamDeck library closes a handle as
+            # soon as reading from it fails, e.g. because its device was unplugged. Older releases of the library
+            # (before 0.9) can't tell whether a handle is open, so for those, connected() has to do.
+            is_open = getattr(device, 'is_open', None)
+            return not opened or is_open is None or bool(is_open())
+        except Exception:
+            return False
+
+    def check(self):
+        """
+        Enumerates the connected devices and reports any that were added or removed since the last check.
+
+        Returns:
+            bool: True if any device was added or removed, False otherwise
+        """
+        devices = {device.id(): device for device in self.enumerate_devices()}
+
+        replaced = [session_id for session_id, device in devices.items()
+                    if session_id in self.known_devices and self._is_replaced(session_id, device)]
+        removed = [session_id for session_id in self.known_devices if session_id not in devices] + replaced
+        added = [device for session_id, device in devices.items()
+                 if session_id not in self.known_devices or session_id in replaced]
+
+        for session_id in removed:
+            logging.info(f'Deck disconnected: {session_id}')
+            self.known_devices.pop(session_id, None)
+            self._opened_session_ids.discard(session_id)
+            self.on_removed(session_id)
+
+        for device in added:
+            logging.info(f'Deck connected: {device.id()}')
+            try:
+                self.on_added(device)
+            except Exception:
+                # Leave it unknown, so that the next check retries it
+                logging.exception(f'Could not set up deck {device.id()}')
+                continue
+
+            self.known_devices[device.id()] = device
+            if DeviceWatcher._is_open(device):
+                self._opened_session_ids.add(device.id())
+
+        return bool(added or removed)
+
+    def _is_replaced(self, session_id: str, device):
+        known_device = self.known_devices[session_id]
+        if known_device is device:
+            return False
+
+        # The StreamDeck library hands out a new handle on every enumeration, so only a dead handle means a new device
+        return not DeviceWatcher.is_alive(known_device, opened=session_id in self._opened_session_ids)
+
+    @staticmethod
+    def _is_open(device):
+        try:
+            return bool(device.is_open())
+        except Exception:
+            return False
+
+    def _safe_check(self):
+        try:
+            return self.check()
+        except Exception:
+            # Never let one failed enumeration kill the watcher
+            logging.exception('Failed to check for connected decks')
+            return False
+
+    def run(self):
+        """Watches for device changes until stop() is called. Blocks the calling thread."""
+        self._safe_check()
+
+        while not self._stopped.is_set():
+            event = self.backend.wait_for_event(self.poll_interval)
+
+            if self._stopped.is_set():
+                break
+
+            changed = self._safe_check()
+
+            if event or changed:
+                self.poll_interval = self.min_poll_interval
+            else:
+                self.poll_interval = min(self.poll_interval * 2, self.max_poll_interval)
+
+    def stop(self):
+        """Stops a running watcher"""
+        self._stopped.set()
+        self.backend.wake()
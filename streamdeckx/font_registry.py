@@ -0,0 +1,103 @@
+import functools
+import io
+import threading
+
+from PIL import ImageFont
+
+
+class FontRegistry:
+    """
+    Process-wide registry of loaded fonts.
+
+    Each font file is read from disk once, and each (font file, size) pair is parsed once; every later request for the
+    same font is served from memory. Text measurements are memoized per font, so re-measuring the same label (which
+    happens constantly while wrapping text) is a dictionary lookup. All methods are safe to call from any thread.
+    """
+
+    MAX_MEASUREMENTS = 4096
+
+    _font_data = {}
+    _fonts = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_font(font_path: str, font_size: int):
+        """
+        Gets the font for the given file & size, loading it on first use.
+
+        Args:
+            font_path (str): Path to the TrueType font file
+            font_size (int): Size of the font
+
+        Returns:
+            PIL.ImageFont.FreeTypeFont: Font object, shared by every caller
+        """
+        key = (font_path, font_size)
+        font = FontRegistry._fonts.get(key)
+        if font is not None:
+            return font
+
+        with FontRegistry._lock:
+            # Another thread may have loaded this font while we were waiting for the lock
+            font = FontRegistry._fonts.get(key)
+            if font is None:
+                font = ImageFont.truetype(io.BytesIO(FontRegistry._get_font_data(font_path)), font_size)
+                FontRegistry._fonts[key] = font
+
+        return font
+
+    @staticmethod
+    def _get_font_data(font_path: str):
+        # Callers must already hold FontRegistry._lock
+        font_data = FontRegistry._font_data.get(font_path)
+        if font_data is None:
+            with open(font_path, 'rb') as font_file:
+                font_data = font_file.read()
+            FontRegistry._font_data[font_path] = font_data
+
+        return font_data
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def get_metrics(font):
+        """
+        Gets the (ascent, descent) metrics of the given font.
+
+        Args:
+            font (PIL.ImageFont.FreeTypeFont): Font to measure
+
+        Returns:
+            tuple: (ascent, descent)
+        """
+        return font.getmetrics()
+
+    @staticmethod
+    @functools.lru_cache(maxsize=MAX_MEASUREMENTS)
+    def get_text_dimensions(text_string: str, font):
+        """
+        Measures the given string when drawn in the given font.
+
+        Args:
+            text_string (str): Text to measure
+            font (PIL.ImageFont.FreeTypeFont): Font the text will be drawn in
+
+        Returns:
+            tuple: (width, height) of the text, in pixels
+        """
+        _, descent = FontRegistry.get_metrics(font)
+
+        bbox = font.getmask(text_string).getbbox()
+        if not bbox:
+            # Nothing visible (e.g. an empty string or only whitespace)
+            return 0, descent
+
+        return bbox[2], bbox[3] + descent
+
+    @staticmethod
+    def clear():
+        """Forgets every loaded font & measurement, forcing them to be re-loaded on next use"""
+        with FontRegistry._lock:
+            FontRegistry._fonts.clear()
+            FontRegistry._font_data.clear()
+            FontRegistry.get_metrics.cache_clear()
+            FontRegistry.get_text_dimensions.cache_clear()
@@ -0,0 +1,130 @@
+import io
+import logging
+
+from PIL import Image, UnidentifiedImageError
+
+from dao.image_dao import ImageDao
+from render_cache import RenderCache
+
+
+class ImageStore:
+    """
+    Stores button background images by content hash, and keeps recently used ones decoded in memory.
+
+    Buttons only ever refer to an image by its hash, so an icon used on many keys (or many decks) is stored once and
+    decoded once, no matter how many buttons show it. Images are normalized when they are stored - converted to RGBA
+    and scaled to KEY_IMAGE_SIZE - so rendering a key costs the same whatever the size of the uploaded file.
+    """
+
+    # Every key image is drawn on a canvas of this size (see ButtonImage), before being scaled to the deck's keys -
+    # so no deck can make use of a larger background image
+    KEY_IMAGE_SIZE = (100, 100)
+
+    DECODED_CACHE_BYTES = 16 * 1024 * 1024
+
+    image_dao = ImageDao()
+    decoded_cache = RenderCache(max_bytes=DECODED_CACHE_BYTES)
+
+    @staticmethod
+    def store(data: bytes, keep_original: bool = False):
+        """
+        Normalizes and stores the given image.
+
+        Args:
+            data (bytes): Image data (e.g. the contents of an uploaded PNG or JPEG file)
+            keep_original (bool): Whether to also store the original image data (default: False)
+
+        Returns:
+            str: Hash to refer to the (normalized) image by
+        """
+        normalized_data = ImageStore.normalize(data)
+
+        original_hash = ImageStore.image_dao.create(data) if keep_original else None
+        return ImageStore.image_dao.create(normalized_data, original_hash=original_hash)
+
+    @staticmethod
+    def normalize(data: bytes):
+        """
+        Decodes the given image, converts it to RGBA and scales it to KEY_IMAGE_SIZE.
+
+        Args:
+            data (bytes): Image data, in any format supported by Pillow
+
+        Returns:
+            bytes: Normalized image, as a PNG
+        """
+        try:
+            image = Image.open(io.BytesIO(data))
+            # For JPEGs, decode straight at a reduced scale, rather than decoding every pixel of a large photo
+            image.draft('RGB', ImageStore.KEY_IMAGE_SIZE)
+            image = ImageStore._to_key_image(image)
+        except (UnidentifiedImageError, OSError) as e:
+            raise InvalidImageError(f'Could not read image: {e}') from e
+
+        normalized = io.BytesIO()
+        image.save(normalized, format='PNG')
+        return normalized.getvalue()
+
+    @staticmethod
+    def _to_key_image(image):
+        image = image.convert('RGBA')
+
+        if image.size != ImageStore.KEY_IMAGE_SIZE:
+            image = image.resize(ImageStore.KEY_IMAGE_SIZE, Image.LANCZOS)
+
+        return image
+
+    @staticmethod
+    def get_bytes(image_hash: str):
+        """
+        Args:
+            image_hash (str): Hash of a stored image
+
+        Returns:
+            bytes: Stored image data, or None if there is no such image
+        """
+        return ImageStore.image_dao.get_by_id(image_hash)
+
+    @staticmethod
+    def get_original_bytes(image_hash: str):
+        """
+        Args:
+            image_hash (str): Hash of a stored image
+
+        Returns:
+            bytes: Original image data, if it was kept when the image was stored - otherwise the normalized image data
+        """
+        original_hash = ImageStore.image_dao.get_original_hash(image_hash)
+        return ImageStore.get_bytes(original_hash or image_hash)
+
+    @staticmethod
+    def get_image(image_hash: str):
+        """
+        Gets the decoded, RGBA version of a stored image, at KEY_IMAGE_SIZE. Decoded images are shared, so callers must
+        not modify the returned image.
+
+        Args:
+            image_hash (str): Hash of a stored image
+
+        Returns:
+            PIL.Image.Image: Decoded image, or None if there is no such image
+        """
+        image = ImageStore.decoded_cache.get(image_hash)
+        if image is not None:
+            return image
+
+        data = ImageStore.get_bytes(image_hash)
+        if data is None:
+            logging.warning(f'Could not find background image {image_hash}')
+            return None
+
+        # Images stored before normalization was introduced may still need scaling - but only the first time
+        image = ImageStore._to_key_image(Image.open(io.BytesIO(data)))
+
+        ImageStore.decoded_cache.put(image_hash, image, RenderCache.image_size(image))
+        return image
+
+
+class InvalidImageError(Exception):
+    """Raised when uploaded image data cannot be read as an image"""
+    pass
@@ -1,4 +1,6 @@
+import json
 import string
+from types import MappingProxyType
 
 try:
     from pynput.keyboard import Key as pkey
@@ -127,6 +129,11 @@ class Key:
 
     @staticmethod
     def get_all_keys():
+        """
+        Builds every supported key. Building keys is relatively expensive - look keys up in KEYS instead.
+
+        :return: List of Keys
+        """
         return Key.get_function_keys() + Key.get_alpha_keys() + Key.get_num_keys() + Key.get_special_keys()
 
 
@@ -150,9 +157,102 @@ class KeyGroup:
 
     @staticmethod
     def get_all():
+        """
+        Builds every group of keys. Building keys is relatively expensive - use KEYS.groups instead.
+
+        :return: List of KeyGroups
+        """
         special_keys = KeyGroup('Special', Key.get_special_keys())
         alpha_keys = KeyGroup('Alpha', Key.get_alpha_keys())
         num_keys = KeyGroup('Numbers', Key.get_num_keys())
         function_keys = KeyGroup('Function', Key.get_function_keys())
 
         return [special_keys, alpha_keys, num_keys, function_keys]
+
+
+class KeyRegistry:
+    """
+    Immutable lookup table of every supported key, built once (see KEYS).
+
+    Keys can be looked up by name in constant time - either by their exact name, case-insensitively (e.g. 'ctrl' for
+    'CTRL') or by a common alias (e.g. 'CONTROL' or 'DEL').
+    """
+
+    ALIASES = {
+        'CONTROL': 'CTRL',
+        'OPTION': 'ALT',
+        'COMMAND': 'CMD',
+        'WIN': 'CMD',
+        'SUPER': 'CMD',
+        'DEL': 'DELETE',
+        'ESCAPE': 'ESC',
+        'RETURN': 'ENTER',
+        'INS': 'INSERT',
+        'PGUP': 'PAGE UP',
+        'PGDN': 'PAGE DOWN',
+        'UP': 'UP ARROW',
+        'DOWN': 'DOWN ARROW',
+        'LEFT': 'LEFT ARROW',
+        'RIGHT': 'RIGHT ARROW'
+    }
+
+    def __init__(self, groups: list):
+        """
+        Constructor for KeyRegistry class.
+
+        :param groups: KeyGroups containing every supported key
+        """
+        self.groups = tuple(groups)
+
+        by_name = {}
+        group_names = {}
+        for group in self.groups:
+            for key in group.keys:
+                by_name.setdefault(key.name, key)
+                group_names.setdefault(key.name, group.name)
+
+        by_alias = {}
+        for name, key in by_name.items():
+            by_alias.setdefault(name.casefold(), key)
+        for alias, name in KeyRegistry.ALIASES.items():
+            if name in by_name:
+                by_alias.setdefault(alias.casefold(), by_name[name])
+
+        self.keys = tuple(by_name.values())
+        self.by_name = MappingProxyType(by_name)
+        self.group_names = MappingProxyType(group_names)
+        self._by_alias = MappingProxyType(by_alias)
+
+        # What /api/v1/keys serves - it never changes, so serialize it once
+        self.json = json.dumps({'groups': [group.json() for group in self.groups]}).encode('utf-8')
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def get(self, name: str):
+        """
+        Looks up a key by its name, or by one of its aliases.
+
+        :param name: Name of the key (e.g. 'CTRL', 'ctrl' or 'CONTROL')
+        :return: Key, or None if there is no such key
+        """
+        key = self.by_name.get(name)
+        if key is not None:
+            return key
+
+        return self._by_alias.get(name.casefold())
+
+    def get_group_name(self, name: str):
+        """
+        :param name: Name of the key (or one of its aliases)
+        :return: Name of the KeyGroup the key belongs to, or None if there is no such key
+        """
+        key = self.get(name)
+        return self.group_names.get(key.name) if key else None
+
+
+# Every supported key, built once at import
+KEYS = KeyRegistry(KeyGroup.get_all())
@@ -0,0 +1,133 @@
+import logging
+import threading
+
+
+class KeyImageWriter:
+    """
+    Writes key images to a physical deck on a dedicated thread, so that callers (e.g. Flask request threads) never
+    wait for USB.
+
+    Pending writes are held per key, so if a key is updated several times before its image reaches the device, only
+    the latest image is written (last write wins). Every write that is pending when the writer thread wakes up is sent
+    in one batch, in key order.
+
+    The writer never opens or closes the device itself - that is up to the deck (see Deck.activate). Images that can't
+    be written, because the deck isn't open or the write fails, are forgotten from the deck's key_image_digests, so
+    that the next update sends them again.
+    """
+
+    # Seconds the writer thread waits for more work before exiting - it is restarted by the next write
+    IDLE_TIMEOUT = 30
+
+    def __init__(self, deck, idle_timeout: float = IDLE_TIMEOUT):
+        """
+        Constructor for KeyImageWriter class.
+
+        Args:
+            deck (Deck): Physical deck to write key images to
+            idle_timeout (float): Seconds to keep the writer thread alive without any writes (default: 30)
+        """
+        self.deck = deck
+        self.idle_timeout = idle_timeout
+        self.writes_requested = 0
+        self.writes_sent = 0
+        self._pending = {}
+        self._writing = False
+        self._thread = None
+        self._condition = threading.Condition()
+
+    @property
+    def pending_count(self):
+        with self._condition:
+            return len(self._pending)
+
+    def enqueue(self, position: int, image):
+        """
+        Queues the given image to be written to a key, replacing any image still waiting to be written to that key.
+
+        Args:
+            position (int): Position of the key
+            image (bytes): Key image, in the deck's native format
+        """
+        with self._condition:
+            self._pending[position] = image
+            self.writes_requested += 1
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f'KeyWriter-{self.deck.id}', daemon=True)
+                self._thread.start()
+
+            self._condition.notify_all()
+
+    def clear(self):
+        """Drops every write that has not yet been sent, e.g. because the device has been unplugged"""
+        with self._condition:
+            self._pending.clear()
+            self._condition.notify_all()
+
+    def flush(self, timeout: float = None):
+        """
+        Waits until every queued write has been sent to the device.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait (default: wait indefinitely)
+
+        Returns:
+            bool: True if everything was written, False if the timeout expired first
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._writing, timeout=timeout)
+
+    def _take_batch(self):
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._pending, timeout=self.idle_timeout):
+                # Idle - let this thread exit (enqueue starts a new one when needed)
+                self._thread = None
+                return None
+
+            batch = self._pending
+            self._pending = {}
+            self._writing = True
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+
+            try:
+                self._write(batch)
+            except Exception as e:
+                # Most likely the device was unplugged mid-write - the watcher will clean up after it
+                logging.warning(f'Could not write key image(s) to deck {self.deck.id}: {e}')
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
+
+    def _write(self, batch: dict):
+        positions = sorted(batch)
+
+        deck_interface = self.deck.deck_interface
+        if not deck_interface or not self.deck._is_open:
+            logging.debug(f'Not writing {len(batch)} key image(s) to deck {self.deck.id} - it is not open')
+            self._forget(positions)
+            return
+
+        for index, position in enumerate(positions):
+            try:
+                deck_interface.set_key_image(position, batch[position])
+            except Exception:
+                self._forget(positions[index:])
+                raise
+
+            self.writes_sent += 1
+
+    def _forget(self, positions: list):
+        """Marks the given keys as not showing their latest image, so that the next update sends it again"""
+        with self._condition:
+            for position in positions:
+                # A newer image that is still pending will be written anyway, and has already recorded its digest
+                if position not in self._pending:
+                    self.deck.key_image_digests.pop(position, None)
@@ -0,0 +1,137 @@
+import threading
+from collections import OrderedDict
+
+
+class RenderCache:
+    """
+    Bounded, thread-safe LRU cache for rendered key images.
+
+    Entries are keyed by a content digest (see ButtonImage.render_digest), so two buttons with identical styles on
+    identically-sized keys share a single rendered image. The cache is bounded by an approximate byte budget rather
+    than an entry count, since a single large key image can be many times the size of a small one.
+    """
+
+    DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Constructor for RenderCache class.
+
+        Args:
+            max_bytes (int): Approximate upper bound on the memory used by cached values (default: 32 MiB)
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def current_bytes(self):
+        return self._current_bytes
+
+    def get(self, key):
+        """
+        Gets the value stored for the given key, marking it as most-recently used.
+
+        Args:
+            key (str): Digest of the rendering inputs
+
+        Returns:
+            The cached value, or None if the key is not cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size: int):
+        """
+        Stores the given value, evicting least-recently used entries until the cache fits in its byte budget.
+
+        Values larger than the entire budget are not cached at all.
+
+        Args:
+            key (str): Digest of the rendering inputs
+            value: Value to cache
+            size (int): Approximate size of the value, in bytes
+        """
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            existing = self._entries.pop(key, None)
+            if existing is not None:
+                self._current_bytes -= existing[1]
+
+            self._entries[key] = (value, size)
+            self._current_bytes += size
+            self._evict_to_budget()
+
+    def set_max_bytes(self, max_bytes: int):
+        """
+        Changes the byte budget of this cache, evicting entries immediately if the new budget is smaller.
+
+        Args:
+            max_bytes (int): New approximate upper bound on the memory used by cached values
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict_to_budget()
+
+    def _evict_to_budget(self):
+        # Callers must already hold self._lock
+        while self._entries and self._current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._current_bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        """Removes every entry from the cache and resets the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """Returns the counters of this cache, suitable for returning from an API"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    @staticmethod
+    def image_size(image):
+        """
+        Estimates the in-memory size of a PIL image.
+
+        Args:
+            image (PIL.Image.Image): Image to measure
+
+        Returns:
+            int: Approximate size of the image's pixel data, in bytes
+        """
+        width, height = image.size
+        return width * height * max(len(image.getbands()), 1)
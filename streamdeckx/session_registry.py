@@ -0,0 +1,127 @@
+import threading
+
+
+class SessionRegistry:
+    """
+    Two-way mapping between the session IDs (device paths) of connected Stream Decks and their serial numbers, along
+    with the live device handle of each session.
+
+    This is the one place device handles are kept: discovery registers a handle when it finds a device, and forgets it
+    when the device goes away, so decks can look up their current handle by serial number without enumerating devices.
+
+    Each session ID and each serial number appears at most once, so the registry only ever holds one entry per
+    connected device, no matter how often devices are enumerated.
+    """
+
+    def __init__(self):
+        self._serial_by_session = {}
+        self._session_by_serial = {}
+        self._device_by_session = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, session_id):
+        return session_id in self._serial_by_session
+
+    def __len__(self):
+        return len(self._serial_by_session)
+
+    def register(self, session_id: str, serial_number: str, device=None):
+        """
+        Records that the device with the given serial number is connected with the given session ID. Any previous
+        session of the same device (e.g. from before it was re-plugged into a different port) is forgotten, along with
+        its device handle.
+
+        Args:
+            session_id (str): Session ID (device path) of the device
+            serial_number (str): Serial number of the device
+            device (StreamDeck): Device handle from the StreamDeck library [optional]
+        """
+        with self._lock:
+            old_serial = self._serial_by_session.pop(session_id, None)
+            if old_serial is not None:
+                self._session_by_serial.pop(old_serial, None)
+
+            old_session = self._session_by_serial.pop(serial_number, None)
+            if old_session is not None:
+                self._serial_by_session.pop(old_session, None)
+                self._device_by_session.pop(old_session, None)
+
+            self._serial_by_session[session_id] = serial_number
+            self._session_by_serial[serial_number] = session_id
+
+            if device is not None:
+                self._device_by_session[session_id] = device
+            else:
+                self._device_by_session.pop(session_id, None)
+
+    def get_serial(self, session_id: str):
+        """
+        Args:
+            session_id (str): Session ID (device path) of a device
+
+        Returns:
+            str: Serial number of the device, or None if the session is unknown
+        """
+        return self._serial_by_session.get(session_id)
+
+    def get_session(self, serial_number: str):
+        """
+        Args:
+            serial_number (str): Serial number of a device
+
+        Returns:
+            str: Current session ID (device path) of the device, or None if it is not connected
+        """
+        return self._session_by_serial.get(serial_number)
+
+    def get_device(self, serial_number: str):
+        """
+        Args:
+            serial_number (str): Serial number of a device
+
+        Returns:
+            StreamDeck: Live device handle of the device, or None if it is not connected
+        """
+        session_id = self._session_by_serial.get(serial_number)
+        if session_id is None:
+            return None
+
+        return self._device_by_session.get(session_id)
+
+    def remove(self, session_id: str):
+        """
+        Forgets the given session, e.g. because its device was unplugged.
+
+        Args:
+            session_id (str): Session ID (device path) of the device
+        """
+        with self._lock:
+            serial_number = self._serial_by_session.pop(session_id, None)
+            if serial_number is not None:
+                self._session_by_serial.pop(serial_number, None)
+
+            self._device_by_session.pop(session_id, None)
+
+    def get_stale(self, active_session_ids):
+        """
+        Finds every session that is not in the given collection of currently connected session IDs. The sessions are
+        not forgotten, so that whoever cleans up after them can still get at their device handles - remove each one
+        once done.
+
+        Args:
+            active_session_ids (iterable): Session IDs of all currently connected devices
+
+        Returns:
+            list: Session IDs of devices that are no longer connected
+        """
+        active_session_ids = set(active_session_ids)
+
+        with self._lock:
+            return [session_id for session_id in self._serial_by_session if session_id not in active_session_ids]
+
+    def clear(self):
+        """Forgets every session"""
+        with self._lock:
+            self._serial_by_session.clear()
+            self._session_by_serial.clear()
+            self._device_by_session.clear()
@@ -9,6 +9,7 @@ let buttonImageField = null;
 let buttonBackgroundColorField = null;
 let buttonTextColorField = null;
 let buttonFontSizeField = null;
+let buttonConcurrencyPolicyField = null;
 let textActionValueElem = null;
 let multiKeyActionValueElem = null;
 let multiKeySelect = null;
@@ -18,6 +19,7 @@ let multiKeySelectedKeys = [];
 let delayActionValueElem = null;
 let currActionType = null;
 let emulatorMode = false;
+let deckEvents = null;
 
 $(document).ready(function () {
     setup();
@@ -28,13 +30,48 @@ function setup() {
     currDeck = $("#curr-deck");
     config = $("#config");
     currDeckId = connSdSelect.val();
+    watchDeck(currDeckId);
 
     // Set listener on dropdown
     connSdSelect.on('change', function () {
         currDeckId = connSdSelect.val();
-        $.get('/deckHtml', {'deckId': currDeckId}, function (data) {
-            currDeck.html(data);
-        });
+        reloadDeck();
+        watchDeck(currDeckId);
+    });
+}
+
+function reloadDeck() {
+    $.get('/deckHtml', {'deckId': currDeckId}, function (data) {
+        currDeck.html(data);
+    });
+}
+
+function watchDeck(deckId) {
+    // Key changes are pushed by the server as they happen, so the deck never needs to be re-downloaded to stay current
+    if (deckEvents) {
+        deckEvents.close();
+        deckEvents = null;
+    }
+
+    if (!deckId) {
+        return;
+    }
+
+    deckEvents = new EventSource('/deckEvents?deckId=' + encodeURIComponent(deckId));
+
+    deckEvents.addEventListener('image', function (event) {
+        let data = JSON.parse(event.data);
+        $('#' + data.key + '-img').attr('src', data.url);
+    });
+
+    deckEvents.addEventListener('key', function (event) {
+        let data = JSON.parse(event.data);
+        $('#' + data.key).toggleClass('pressed', data.pressed);
+    });
+
+    deckEvents.addEventListener('resync', function () {
+        // Some events were missed (e.g. while reconnecting) - catch up by reloading the whole deck, once
+        reloadDeck();
     });
 }
 
@@ -55,6 +92,7 @@ function updateConfigFields(data) {
     buttonBackgroundColorField = $("#buttonBackgroundColor");
     buttonTextColorField = $("#buttonTextColor");
     buttonFontSizeField = $("#buttonFontSize");
+    buttonConcurrencyPolicyField = $("#buttonConcurrencyPolicy");
     buttonImageField = $("#buttonImage");
 
     buttonImageField.change(function() {
@@ -199,6 +237,13 @@ function deleteAction(button_id, action_id) {
         });
 }
 
+function cancelActions(button_id) {
+    $.post('/cancelButtonActions', {
+        'deckId': currDeckId,
+        'button': button_id
+    });
+}
+
 function showTextActionFields() {
     actionFieldsArea.html(`
         <label for="textValue">Text: </label>
@@ -298,7 +343,7 @@ function showApplicationActionFields() {
 function showDelayActionFields() {
     actionFieldsArea.html(`
         <label for="delayValue">Delay (in seconds): </label>
-        <input type="number" id="delayValue" style="margin-top: 5px;"/>
+        <input type="number" id="delayValue" min="0" step="0.001" style="margin-top: 5px;"/>
     `);
 
     delayActionValueElem = $("#delayValue");
@@ -365,6 +410,7 @@ function submit() {
     let backgroundColor = buttonBackgroundColorField.val();
     let textColor = buttonTextColorField.val();
     let fontSize = buttonFontSizeField.val();
+    let concurrencyPolicy = buttonConcurrencyPolicyField.val();
     let backgroundImg = buttonImageField.prop('files')[0];
 
     let fd = new FormData();
@@ -374,13 +420,14 @@ function submit() {
     fd.append('backgroundColor', backgroundColor);
     fd.append('textColor', textColor);
     fd.append('fontSize', fontSize);
+    fd.append('concurrencyPolicy', concurrencyPolicy);
     fd.append('backgroundImage', backgroundImg);
 
     let xhr = new XMLHttpRequest();
     xhr.open("POST", "/setButtonConfig");
     xhr.onreadystatechange = function () {
         if (xhr.readyState === 4) {
-            $('#' + currButton + '-img').attr('src', 'data:image/PNG;base64, ' + xhr.responseText);
+            $('#' + currButton + '-img').attr('src', xhr.responseText);
         }
     }
     xhr.send(fd);
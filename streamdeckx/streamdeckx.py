@@ -1,13 +1,12 @@
-import base64
 import logging
 import os
 import socket
 import sqlite3 as sl
 from urllib.request import pathname2url
 
-from flask import Flask, render_template, request
+from flask import Flask, Response, abort, render_template, request
 
-from input.key import KeyGroup
+from input.key import KEYS
 
 
 class StreamDeckX(Flask):
@@ -17,18 +16,33 @@ class StreamDeckX(Flask):
 
 app = StreamDeckX(__name__, template_folder=os.path.abspath('static'))
 
+# Uploads are read into memory (Werkzeug spools larger ones to a temporary file), so cap their size - anything bigger
+# is rejected with a '413 Request Entity Too Large'
+MAX_UPLOAD_BYTES = 16 * 1024 * 1024
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
+
+# How long a browser waits before reconnecting to /deckEvents, and how often an idle stream is kept alive
+EVENT_RETRY_MS = 3000
+EVENT_KEEPALIVE_SECONDS = 15
+
+# Key image URLs include the image's digest, so browsers may cache them for as long as they like
+KEY_IMAGE_MAX_AGE = 365 * 24 * 60 * 60
+
 
 def _get_connected_decks():
     from deck import Deck
-    return Deck.get_connected()
+
+    # Decks found by discovery - requests never enumerate USB devices themselves
+    return Deck.get_active_decks()
 
 
 def _get_deck_by_id(deck_id, raise_exception=True):
-    decks = _get_connected_decks()
-    for deck in decks:
-        if deck.id == deck_id:
-            # This is the deck we selected
-            return deck
+    from deck import Deck
+
+    deck = Deck.get_active_by_id(deck_id)
+    if deck:
+        # This is the deck we selected
+        return deck
 
     if raise_exception:
         from deck import NoSuchDeckException
@@ -68,6 +82,37 @@ def get_deck_html():
     return deck.html
 
 
+@app.route('/deckEvents')
+def get_deck_events():
+    """Streams the key image changes and key presses of a deck, as Server-Sent Events (see DeckEventBroadcaster)"""
+    from deck import Deck
+    from deck_events import DeckEventBroadcaster
+
+    deck_id = request.args.get('deckId')
+    subscription = Deck.events.subscribe(deck_id)
+
+    # Browsers send the ID of the last event they saw when they reconnect - they may have missed some since
+    reconnected = request.headers.get('Last-Event-ID') is not None
+
+    def stream():
+        try:
+            yield f'retry: {EVENT_RETRY_MS}\n\n'
+
+            if reconnected:
+                yield DeckEventBroadcaster.RESYNC
+
+            while True:
+                message = subscription.get(timeout=EVENT_KEEPALIVE_SECONDS)
+
+                # Comments keep idle connections open, and let us notice browsers that have gone away
+                yield message if message else ': keepalive\n\n'
+        finally:
+            Deck.events.unsubscribe(subscription)
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 @app.route('/configHtml')
 def get_config_html():
     deck_id = request.args.get('deckId')
@@ -80,8 +125,18 @@ def get_config_html():
     return render_template('configuration.html', button=button)
 
 
+@app.context_processor
+def inject_concurrency_policies():
+    from action_executor import ConcurrencyPolicy
+
+    return {'concurrency_policies': ConcurrencyPolicy}
+
+
 @app.route('/setButtonConfig', methods=['POST'])
 def set_button_config():
+    from action_executor import ConcurrencyPolicy
+    from image_store import InvalidImageError
+
     # TODO add error handling for missing form parameters
     deck_id = request.form['deckId']
     button_position = int(request.form['button'])
@@ -89,6 +144,14 @@ def set_button_config():
     background_color = request.form['backgroundColor']
     text_color = request.form['textColor']
     font_size = int(request.form['fontSize'])
+    keep_original_image = request.form.get('keepOriginalImage', 'false').lower() == 'true'
+    concurrency_policy_name = request.form.get('concurrencyPolicy')
+
+    concurrency_policy = None
+    if concurrency_policy_name:
+        concurrency_policy = ConcurrencyPolicy.get_by_name(concurrency_policy_name)
+        if not concurrency_policy:
+            abort(400, description=f'Unknown concurrency policy: {concurrency_policy_name}')
 
     logging.info(f'Setting {button_position} on {deck_id} to {button_text}')
 
@@ -100,25 +163,20 @@ def set_button_config():
         background_image = request.files['backgroundImage']
 
         if background_image.filename != '':
-            if not os.path.exists('temp_images'):
-                os.mkdir('temp_images')
-
-            extension = background_image.filename.split('.')[-1]
-            temp_name = f'temp_image.{extension}'
-            background_image.save(f'temp_images/{temp_name}')
-
-            with open(f"temp_images/{temp_name}", "rb") as image_file:
-                img_string = base64.b64encode(image_file.read())
-                button.set_background_image(img_string)
-
-            # Delete temporary file
-            os.remove(f"temp_images/{temp_name}")
+            # Hand the upload straight to the image store - never via a (shared) file on disk
+            try:
+                button.set_background_image(background_image.read(), keep_original=keep_original_image)
+            except InvalidImageError as e:
+                abort(400, description=f'{background_image.filename} is not a supported image ({e})')
 
     button.set_text(button_text)
     button.set_colors(text_color, background_color)
     button.set_font_size(font_size)
 
-    return button.button_image.image_bytes.decode("utf-8")
+    if concurrency_policy and concurrency_policy != button.concurrency_policy:
+        button.set_concurrency_policy(concurrency_policy)
+
+    return button.image_url
 
 
 @app.route('/setButtonAction', methods=['POST'])
@@ -143,7 +201,10 @@ def set_button_action():
     elif action_type == 'APPLICATION':
         action = ApplicationAction(action, button, 0)
     elif action_type == 'DELAY':
-        action = DelayAction(action, button, 0)
+        try:
+            action = DelayAction(action, button, 0)
+        except ValueError as e:
+            abort(400, description=str(e))
     else:
         raise Exception(f'Unknown action type: {action_type}')
 
@@ -154,6 +215,22 @@ def set_button_action():
     return 'Success!'
 
 
+@app.route('/cancelButtonActions', methods=['POST'])
+def cancel_button_actions():
+    from deck import Deck
+
+    deck_id = request.form['deckId']
+    button_position = int(request.form['button'])
+
+    deck = _get_deck_by_id(deck_id)
+    button = deck.buttons[button_position]
+
+    if Deck.action_executor.cancel(button):
+        return 'Cancelled!'
+
+    return 'Not running'
+
+
 @app.route('/setButtonAction', methods=['DELETE'])
 def delete_button_action():
     from dao.action_dao import ActionDao
@@ -170,13 +247,15 @@ def delete_button_action():
     for action in button.actions:
         if action.id == action_id:
             action_dao.delete(action)
-            button.actions.remove(action)
+            button.remove_action(action)
 
     return render_template('configuration.html', button=button)
 
 
 @app.route('/testButton', methods=['POST'])
 def test_button_action():
+    from deck import Deck
+
     deck_id = request.form['deckId']
     button_position = int(request.form['button'])
 
@@ -184,7 +263,10 @@ def test_button_action():
 
     button = deck.buttons[button_position]
 
-    button.execute_actions()
+    deck.events.publish(deck.id, 'key', {'key': button_position, 'pressed': True})
+    # Run like a real press - off the request thread, and cancellable from /cancelButtonActions
+    Deck.action_executor.submit(button, policy=button.concurrency_policy)
+    deck.events.publish(deck.id, 'key', {'key': button_position, 'pressed': False})
 
     return "SUCCESS"
 
@@ -195,34 +277,101 @@ def get_new_virtual_sd_form():
 
 
 # API
+@app.route('/api/v1/cacheStats', methods=['GET'])
+def get_cache_stats():
+    from button_image import ButtonImage
+    from image_store import ImageStore
+
+    return {
+        'renderedImages': ButtonImage.render_cache.stats(),
+        'nativeImages': ButtonImage.native_cache.stats(),
+        'pngImages': ButtonImage.png_cache.stats(),
+        'backgroundImages': ImageStore.decoded_cache.stats()
+    }
+
+
 @app.route('/api/v1/keys', methods=['GET'])
 def get_all_keys():
-    json = {
-        'groups': []
-    }
-    for key_group in KeyGroup.get_all():
-        json['groups'].append(key_group.json())
+    # Every key is known at import, so the payload is serialized once (see KeyRegistry)
+    response = Response(KEYS.json, mimetype='application/json')
+    response.cache_control.max_age = 3600
+    response.add_etag()
+
+    return response.make_conditional(request)
+
+
+# The deck ID is matched as a path, because an encoded slash in it is decoded before routing
+@app.route('/api/v1/decks/<path:deck_id>/keys/<int:position>.png', methods=['GET'])
+def get_key_image(deck_id, position):
+    # The deck may have just been unplugged, after the page showing it was loaded
+    deck = _get_deck_by_id(deck_id, raise_exception=False)
+    if deck is None or position >= len(deck.buttons):
+        abort(404)
+
+    button = deck.buttons[position]
+    digest = button.render_digest
 
-    return json
+    response = Response(mimetype='image/png')
+    response.set_etag(digest)
+
+    if request.args.get('v') == digest:
+        # A hashed URL (see Button.image_url) always refers to the same image
+        response.cache_control.public = True
+        response.cache_control.max_age = KEY_IMAGE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+
+    if request.if_none_match.contains(digest):
+        # The browser already has this image - don't even encode it
+        response.status_code = 304
+        return response
+
+    response.set_data(button.button_image.png_bytes)
+    return response
+
+
+@app.route('/api/v1/images/<image_hash>.png', methods=['GET'])
+def get_stored_image(image_hash):
+    from image_store import ImageStore
+
+    response = Response(mimetype='image/png')
+    # Stored images are addressed by the hash of their content (see ButtonStyle.background_image_url), so never change
+    response.set_etag(image_hash)
+    response.cache_control.public = True
+    response.cache_control.max_age = KEY_IMAGE_MAX_AGE
+    response.cache_control.immutable = True
+
+    if request.if_none_match.contains(image_hash):
+        # The browser already has this image - don't even read it from the database
+        response.status_code = 304
+        return response
+
+    data = ImageStore.get_bytes(image_hash)
+    if data is None:
+        abort(404)
+
+    response.set_data(data)
+    return response
 
 
 @app.route('/api/v1/newVirtualStreamDeck', methods=['POST'])
 def create_virtual_stream_deck():
-    from deck import VirtualDeck
+    from deck import Deck, VirtualDeck
 
     deck_name = request.form['name']
     num_cols = int(request.form['cols'])
     num_rows = int(request.form['rows'])
 
-    existing_virtual_decks = Deck.get_virtual_decks()
-
     virtual_deck = VirtualDeck(deck_name, rows=num_rows, cols=num_cols)
-    Deck.deck_dao.create(virtual_deck)
+    Deck.add_virtual_deck(virtual_deck)
 
     return "SUCCESS"
 
 
 def connect_to_database():
+    from dao.migrations import SchemaMigrator
+
     db_name = 'sdx_db.db'
     try:
         dburi = 'file:{}?mode=rw'.format(pathname2url(db_name))
@@ -233,45 +382,12 @@ def connect_to_database():
         logging.warning('Could not find database - will initialize an empty one!')
         conn = sl.connect(db_name)
 
-        # DECK
-        with conn:
-            conn.execute("""
-                CREATE TABLE deck (
-                    id TEXT NOT NULL PRIMARY KEY,
-                    name TEXT,
-                    type TEXT,
-                    num_cols INTEGER,
-                    num_rows INTEGER
-                );                
-            """)
-
-        # BUTTON
-        with conn:
-            conn.execute("""
-                CREATE TABLE button (
-                    id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
-                    deck_id TEXT NOT NULL REFERENCES deck(id) ON DELETE CASCADE,
-                    position INTEGER NOT NULL,
-                    font TEXT,
-                    font_size INTEGER DEFAULT 16,
-                    label TEXT,
-                    background_color TEXT DEFAULT '#000000',
-                    text_color TEXT DEFAULT '#ffffff',
-                    background_image TEXT
-                );
-            """)
-
-        # ACTION
-        with conn:
-            conn.execute("""
-                CREATE TABLE action (
-                    id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
-                    type TEXT NOT NULL,
-                    button_id INTEGER NOT NULL REFERENCES button(id) ON DELETE CASCADE,
-                    action_order INTEGER NOT NULL,
-                    parameter TEXT 
-                );
-            """)
+    # Create the schema, or bring an existing database up to date, without touching any of its data
+    try:
+        version = SchemaMigrator().migrate(conn)
+        logging.info(f'Database is at schema version {version}.')
+    finally:
+        conn.close()
 
 
 def get_local_ip():
@@ -305,13 +421,10 @@ if __name__ == '__main__':
 
     threading.Thread(target=lambda: app.run(host="0.0.0.0", port=5050, debug=False, use_reloader=False), name='FlaskThread').start()
 
-    import time
     from deck import Deck
+    from device_watcher import DeviceWatcher
 
-    while True:
-        logging.debug('Checking for connected decks...')
-
-        Deck.scan()
-
-        time.sleep(5)
+    # Blocks forever, setting up decks as they are plugged in
+    device_watcher = DeviceWatcher(on_added=Deck.connect_device, on_removed=Deck.disconnect_device)
+    device_watcher.run()
 
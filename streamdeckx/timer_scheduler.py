@@ -0,0 +1,113 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+
+class TimerScheduler:
+    """
+    Runs callbacks after a delay, using a single thread for every pending timer.
+
+    Waiting on a timer costs an entry in a heap, rather than a sleeping thread, so any number of macros can be waiting
+    on a delay at once. Callbacks run on the scheduler's thread, so they should be quick - e.g. hand work off to a
+    thread pool.
+    """
+
+    def __init__(self):
+        self._timers = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def __len__(self):
+        with self._condition:
+            return sum(1 for timer in self._timers if not timer.cancelled)
+
+    def call_later(self, delay: float, callback):
+        """
+        Schedules a callback.
+
+        Args:
+            delay (float): Seconds to wait before calling the callback (millisecond resolution)
+            callback (callable): Function to call, with no arguments
+
+        Returns:
+            TimerHandle: Handle that can be used to cancel the timer
+        """
+        timer = TimerHandle(self, time.monotonic() + max(delay, 0), next(self._sequence), callback)
+
+        with self._condition:
+            heapq.heappush(self._timers, timer)
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='TimerScheduler', daemon=True)
+                self._thread.start()
+
+            # The new timer may be due before the one the thread is currently waiting for
+            self._condition.notify()
+
+        return timer
+
+    def _cancel(self, timer):
+        with self._condition:
+            if timer.cancelled or timer.fired:
+                return False
+
+            # Left in the heap, and skipped when it comes due
+            timer.cancelled = True
+            return True
+
+    def _take_due(self):
+        with self._condition:
+            while True:
+                while self._timers and self._timers[0].cancelled:
+                    heapq.heappop(self._timers)
+
+                if not self._timers:
+                    # Nothing left to wait for - let this thread exit (call_later starts a new one when needed)
+                    self._thread = None
+                    return None
+
+                timeout = self._timers[0].deadline - time.monotonic()
+                if timeout <= 0:
+                    timer = heapq.heappop(self._timers)
+                    timer.fired = True
+                    return timer
+
+                self._condition.wait(timeout)
+
+    def _run(self):
+        while True:
+            timer = self._take_due()
+            if timer is None:
+                return
+
+            try:
+                timer.callback()
+            except Exception:
+                logging.exception('Timer callback failed')
+
+
+class TimerHandle:
+    """A timer scheduled with TimerScheduler.call_later"""
+
+    def __init__(self, scheduler: TimerScheduler, deadline: float, sequence: int, callback):
+        self.scheduler = scheduler
+        self.deadline = deadline
+        self.sequence = sequence
+        self.callback = callback
+        self.cancelled = False
+        self.fired = False
+
+    def __lt__(self, other):
+        return (self.deadline, self.sequence) < (other.deadline, other.sequence)
+
+    def cancel(self):
+        """
+        Cancels this timer, if it has not already fired.
+
+        Returns:
+            bool: True if the timer was cancelled before its callback was called, False otherwise
+        """
+        return self.scheduler._cancel(self)
@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import MagicMock, patch, call
 
 from test_base import BaseStreamdeckXTest
+from input.key import KEYS
 from action import ActionFactory, TextAction, MultiKeyPressAction, DelayAction
 
 
@@ -149,6 +150,14 @@ class TestMultiKeyPressAction(BaseStreamdeckXTest):
         action = MultiKeyPressAction('CTRL;ALT;DEL', btn, 1)
         self.assertEqual('CTRL + ALT + DEL', action.display_value)
 
+    def test_keys(self):
+        action = MultiKeyPressAction('CTRL;shift;t', MagicMock(), 0)
+        self.assertEqual(['CTRL', 'SHIFT', 't'], [key.name for key in action.keys])
+
+    def test_keys_unknown(self):
+        action = MultiKeyPressAction('CTRL;NOPE', MagicMock(), 0)
+        self.assertEqual([KEYS.get('CTRL'), None], action.keys)
+
     @patch('action.MultiKeyPressAction._get_key')
     def test_execute(self, m_get_key):
         btn = MagicMock()
@@ -188,6 +197,38 @@ class TestDelayAction(BaseStreamdeckXTest):
         action = DelayAction('10', btn, 1)
         self.assertEqual('10 seconds', action.display_value)
 
+    def test_init_fractional_seconds(self):
+        action = DelayAction('0.25', MagicMock(), 0)
+
+        self.assertEqual(250, action.delay_ms)
+        self.assertEqual(0.25, action.delay_time)
+        self.assertEqual('250 ms', action.display_value)
+
+    def test_init_milliseconds(self):
+        action = DelayAction('1500ms', MagicMock(), 0)
+
+        self.assertEqual(1500, action.delay_ms)
+        self.assertEqual(1.5, action.delay_time)
+        self.assertEqual('1500 ms', action.display_value)
+
+    def test_init_negative(self):
+        with self.assertRaises(ValueError):
+            DelayAction('-5', MagicMock(), 0)
+
+    def test_init_not_finite(self):
+        for parameter in ('inf', '1e400', 'nan', '-infms'):
+            with self.subTest(parameter=parameter), self.assertRaisesRegex(ValueError, 'finite'):
+                DelayAction(parameter, MagicMock(), 0)
+
+    def test_init_invalid(self):
+        with self.assertRaises(ValueError):
+            DelayAction('soon', MagicMock(), 0)
+
+    @patch('time.sleep')
+    def test_execute(self, m_sleep):
+        DelayAction('250ms', MagicMock(), 0).execute()
+        m_sleep.assert_called_with(0.25)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,255 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from action import DelayAction
+from action_plan import ActionPlan
+from action_executor import ActionExecutor, ConcurrencyPolicy
+
+
+class FakeButton:
+    """Stand-in for a Button, with a list of actions (and their plan)"""
+
+    def __init__(self, position, actions, deck_id='abc123'):
+        self.position = position
+        self.actions = actions
+        self.action_plan = ActionPlan.compile(actions)
+        self.deck = MagicMock()
+        self.deck.id = deck_id
+
+
+class BlockingAction:
+    """Stand-in for an Action that blocks until released"""
+
+    action_type = 'BLOCKING'
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.runs = 0
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def execute(self):
+        with self._lock:
+            self.runs += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+        self.started.set()
+        self.release.wait(5)
+
+        with self._lock:
+            self.running -= 1
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+
+    return condition()
+
+
+class TestActionExecutor(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.executor = ActionExecutor(max_workers=4)
+        self.addCleanup(self.executor.shutdown)
+
+    def test_submit(self):
+        """ActionExecutor.submit"""
+        action1 = MagicMock()
+        action2 = MagicMock()
+        button = FakeButton(0, [action1, action2])
+
+        self.assertTrue(self.executor.submit(button))
+        self.assertTrue(self.executor.wait_until_idle(timeout=5))
+
+        action1.execute.assert_called_once()
+        action2.execute.assert_called_once()
+        self.assertEqual(0, self.executor.running_count)
+
+    def test_submit_returns_immediately(self):
+        """ActionExecutor.submit.returns_immediately"""
+        action = BlockingAction()
+        self.addCleanup(action.release.set)
+
+        start = time.perf_counter()
+        self.executor.submit(FakeButton(0, [action]))
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+        self.assertTrue(action.started.wait(5))
+        self.assertEqual(1, self.executor.running_count)
+
+    def test_submit_other_buttons_not_blocked(self):
+        """ActionExecutor.submit.other_buttons_not_blocked"""
+        slow_action = BlockingAction()
+        self.addCleanup(slow_action.release.set)
+        self.executor.submit(FakeButton(0, [slow_action]))
+        self.assertTrue(slow_action.started.wait(5))
+
+        fast_action = MagicMock()
+        self.executor.submit(FakeButton(1, [fast_action]))
+
+        # Runs while the slow button is still running
+        self.assertTrue(wait_for(lambda: fast_action.execute.called))
+        self.assertEqual(1, slow_action.running)
+
+    def test_submit_queue(self):
+        """ActionExecutor.submit.queue"""
+        action = BlockingAction()
+        button = FakeButton(0, [action])
+        self.executor.submit(button)
+        self.assertTrue(action.started.wait(5))
+
+        self.assertTrue(self.executor.submit(button, policy=ConcurrencyPolicy.QUEUE))
+        self.assertTrue(self.executor.submit(button, policy=ConcurrencyPolicy.QUEUE))
+        action.release.set()
+
+        self.assertTrue(self.executor.wait_until_idle(timeout=5))
+        self.assertEqual(3, action.runs)
+        # Never ran twice at once
+        self.assertEqual(1, action.max_running)
+
+    def test_submit_drop(self):
+        """ActionExecutor.submit.drop"""
+        action = BlockingAction()
+        button = FakeButton(0, [action])
+        self.executor.submit(button)
+        self.assertTrue(action.started.wait(5))
+
+        self.assertFalse(self.executor.submit(button, policy=ConcurrencyPolicy.DROP))
+        action.release.set()
+
+        self.assertTrue(self.executor.wait_until_idle(timeout=5))
+        self.assertEqual(1, action.runs)
+        self.assertEqual(1, self.executor.dropped)
+
+    def test_submit_restart(self):
+        """ActionExecutor.submit.restart"""
+        before = MagicMock()
+        after = MagicMock()
+        button = FakeButton(0, [before, DelayAction('60', None, 1), after])
+
+        self.executor.submit(button)
+        self.assertTrue(wait_for(lambda: self.executor.waiting_count == 1))
+
+        # Cancels the 60 second delay straight away, then starts again from the first action
+        self.assertTrue(self.executor.submit(button, policy=ConcurrencyPolicy.RESTART))
+        self.assertTrue(wait_for(lambda: before.execute.call_count == 2 and self.executor.waiting_count == 1))
+
+        self.executor.cancel(button)
+        self.assertTrue(self.executor.wait_until_idle(timeout=5))
+        after.execute.assert_not_called()
+
+    def test_delay(self):
+        """ActionExecutor._step.delay"""
+        calls = []
+        before = MagicMock()
+        before.execute.side_effect = lambda: calls.append(time.monotonic())
+        after = MagicMock()
+        after.execute.side_effect = lambda: calls.append(time.monotonic())
+
+        self.executor.submit(FakeButton(0, [before, DelayAction('50ms', None, 1), after]))
+        self.assertTrue(self.executor.wait_until_idle(timeout=5))
+
+        self.assertEqual(2, len(calls))
+        self.assertGreaterEqual(calls[1] - calls[0], 0.045)
+
+    def test_delay_does_not_use_worker(self):
+        """ActionExecutor._step.delay_does_not_use_worker"""
+        executor = ActionExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+
+        # Far more waiting macros than worker threads
+        buttons = [FakeButton(position, [DelayAction('60', None, 0), MagicMock()]) for position in range(0, 200)]
+        for button in buttons:
+            executor.submit(button)
+        self.assertTrue(wait_for(lambda: executor.waiting_count == 200))
+
+        # The single worker is still free for other buttons
+        action = MagicMock()
+        executor.submit(FakeButton(500, [action]))
+        self.assertTrue(wait_for(lambda: action.execute.called))
+        self.assertLess(threading.active_count(), 50)
+
+        executor.cancel_all()
+        self.assertTrue(executor.wait_until_idle(timeout=5))
+        for button in buttons:
+            button.actions[1].execute.assert_not_called()
+
+    def test_cancel(self):
+        """ActionExecutor.cancel"""
+        after = MagicMock()
+        button = FakeButton(0, [DelayAction('60', None, 0), after])
+        self.executor.submit(button)
+        self.assertTrue(wait_for(lambda: self.executor.waiting_count == 1))
+
+        self.assertTrue(self.executor.cancel(button))
+
+        self.assertTrue(self.executor.wait_until_idle(timeout=1))
+        after.execute.assert_not_called()
+        self.assertFalse(self.executor.is_running(button))
+
+    def test_cancel_not_running(self):
+        """ActionExecutor.cancel.not_running"""
+        self.assertFalse(self.executor.cancel(FakeButton(0, [])))
+
+    def test_cancel_mid_action(self):
+        """ActionExecutor.cancel.mid_action"""
+        action = BlockingAction()
+        after = MagicMock()
+        button = FakeButton(0, [action, after])
+        self.executor.submit(button)
+        self.assertTrue(action.started.wait(5))
+
+        self.executor.cancel(button)
+        action.release.set()
+
+        self.assertTrue(self.executor.wait_until_idle(timeout=5))
+        after.execute.assert_not_called()
+
+    def test_step_error(self):
+        """ActionExecutor._step.error"""
+        broken = MagicMock()
+        broken.execute.side_effect = RuntimeError('Broken action')
+        after = MagicMock()
+
+        with self.assertLogs(level='ERROR'):
+            self.executor.submit(FakeButton(0, [broken, after]))
+            self.assertTrue(self.executor.wait_until_idle(timeout=5))
+
+        # The rest of the run still goes ahead
+        after.execute.assert_called_once()
+
+    def test_cancel_all(self):
+        """ActionExecutor.cancel_all"""
+        action = BlockingAction()
+        button = FakeButton(0, [action])
+        self.executor.submit(button)
+        self.assertTrue(action.started.wait(5))
+        self.executor.submit(button)
+
+        self.executor.cancel_all()
+        action.release.set()
+
+        self.assertTrue(self.executor.wait_until_idle(timeout=5))
+        self.assertEqual(1, action.runs)
+
+
+class TestConcurrencyPolicy(unittest.TestCase):
+
+    def test_get_by_name(self):
+        """ConcurrencyPolicy.get_by_name"""
+        self.assertEqual(ConcurrencyPolicy.RESTART, ConcurrencyPolicy.get_by_name('RESTART'))
+        self.assertIsNone(ConcurrencyPolicy.get_by_name('NOPE'))
+        self.assertIsNone(ConcurrencyPolicy.get_by_name(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
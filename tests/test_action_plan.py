@@ -0,0 +1,108 @@
+import unittest
+from unittest.mock import MagicMock, patch, call
+
+from action import TextAction, MultiKeyPressAction, DelayAction, ApplicationAction
+from action_plan import ActionPlan, TextStep, KeyComboStep, DelayStep
+
+
+class TestActionPlan(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.button = MagicMock()
+
+    def test_compile_empty(self):
+        """ActionPlan.compile.empty"""
+        plan = ActionPlan.compile([])
+        self.assertEqual(0, len(plan))
+
+    def test_compile(self):
+        """ActionPlan.compile"""
+        application = ApplicationAction('/usr/bin/gedit', self.button, 2)
+        plan = ActionPlan.compile([
+            MultiKeyPressAction('CTRL;t', self.button, 0),
+            DelayAction('250ms', self.button, 1),
+            application
+        ])
+
+        self.assertEqual(3, len(plan))
+        self.assertIsInstance(plan.steps[0], KeyComboStep)
+        self.assertEqual('CTRL+t', plan.steps[0].names)
+        self.assertIsInstance(plan.steps[1], DelayStep)
+        self.assertEqual(0.25, plan.steps[1].delay_time)
+        # Run as is
+        self.assertIs(application, plan.steps[2])
+
+    def test_compile_merges_text(self):
+        """ActionPlan.compile.merges_text"""
+        plan = ActionPlan.compile([
+            TextAction('git ', self.button, 0),
+            TextAction('status', self.button, 1),
+            MultiKeyPressAction('ENTER', self.button, 2),
+            TextAction('exit', self.button, 3)
+        ])
+
+        self.assertEqual(3, len(plan))
+        self.assertEqual('git status', plan.steps[0].text)
+        self.assertEqual('exit', plan.steps[2].text)
+
+    def test_compile_skips_no_ops(self):
+        """ActionPlan.compile.skips_no_ops"""
+        plan = ActionPlan.compile([
+            TextAction('', self.button, 0),
+            DelayAction('0', self.button, 1),
+            TextAction('a', self.button, 2)
+        ])
+
+        self.assertEqual(1, len(plan))
+        self.assertEqual('a', plan.steps[0].text)
+
+    def test_compile_unknown_key(self):
+        """ActionPlan.compile.unknown_key"""
+        with self.assertLogs(level='WARNING'):
+            plan = ActionPlan.compile([MultiKeyPressAction('CTRL;NOT A KEY', self.button, 0)])
+
+        self.assertEqual(0, len(plan))
+
+    def test_steps_immutable(self):
+        """ActionPlan.steps.immutable"""
+        actions = [TextAction('a', self.button, 0)]
+        plan = ActionPlan.compile(actions)
+
+        actions.append(TextAction('b', self.button, 1))
+
+        self.assertIsInstance(plan.steps, tuple)
+        self.assertEqual(1, len(plan))
+
+
+class TestSteps(unittest.TestCase):
+
+    @patch('input.key.Key.controller')
+    def test_text_step_execute(self, m_controller):
+        """TextStep.execute"""
+        TextStep('hi').execute()
+
+        m_controller.assert_has_calls([call.press('h'), call.release('h'), call.press('i'), call.release('i')])
+
+    @patch('input.key.Key.controller')
+    def test_key_combo_step_execute(self, m_controller):
+        """KeyComboStep.execute"""
+        key1 = MagicMock()
+        key1.name = 'CTRL'
+        key1.pkey = 'ctrl'
+        key2 = MagicMock()
+        key2.name = 'c'
+        key2.pkey = 'c'
+
+        KeyComboStep([key1, key2]).execute()
+
+        m_controller.assert_has_calls([call.press('ctrl'), call.press('c'), call.release('c'), call.release('ctrl')])
+
+    @patch('time.sleep')
+    def test_delay_step_execute(self, m_sleep):
+        """DelayStep.execute"""
+        DelayStep(0.5).execute()
+        m_sleep.assert_called_with(0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
+import threading
 import unittest
 from unittest.mock import MagicMock, patch, PropertyMock
 
 from test_base import BaseStreamdeckXTest
+from action import TextAction, DelayAction
+from action_executor import ConcurrencyPolicy
 from button import Button
 from deck import OriginalDeck
 
@@ -47,16 +50,52 @@ class TestButton(BaseStreamdeckXTest):
         button = Button(12, self.deck1)
         self.assertEqual(hash(button), hash(12))
 
-    @patch('button_image.ButtonImage.image_bytes', new_callable=PropertyMock)
-    def test_html(self, m_image_bytes):
+    @patch('button.Button.image_url', new_callable=PropertyMock)
+    def test_html(self, m_image_url):
         """Button.html"""
-        img_bytes = MagicMock()
-        img_bytes.decode.return_value = '123456'
-        m_image_bytes.return_value = img_bytes
+        m_image_url.return_value = '/api/v1/decks/deck123/keys/12.png?v=abc'
 
         button = Button(12, self.deck1)
-        self.assertEqual(button.html, '<span id="12" class="btn" onclick="openConfig(12)"><img id="12-img" height="72" width="72" src="data:image/PNG;base64, 123456"></span>')
-        img_bytes.decode.assert_called()
+        self.assertEqual(button.html, '<span id="12" class="btn" onclick="openConfig(12)"><img id="12-img" height="72" width="72" src="/api/v1/decks/deck123/keys/12.png?v=abc"></span>')
+
+    @patch('button.Button.image_url', new_callable=PropertyMock)
+    def test_html_cached(self, m_image_url):
+        """Button.html.cached"""
+        m_image_url.return_value = '/image.png'
+
+        button = Button(12, self.deck1)
+        html = button.html
+
+        self.assertIs(html, button.html)
+        m_image_url.assert_called_once()
+
+    @patch('button.Button.update_key_image')
+    @patch('button.Button.button_dao.update')
+    @patch('button.Button.image_url', new_callable=PropertyMock)
+    def test_html_invalidated_by_style_change(self, m_image_url, m_btn_update, m_update_key_image):
+        """Button.html.invalidated_by_style_change"""
+        button = self.deck1.buttons[12]
+        m_image_url.return_value = '/old.png'
+        _ = self.deck1.html
+
+        changes = (lambda: button.set_text('hi'), lambda: button.set_colors('#000000', '#ffffff'),
+                   lambda: button.set_font_size(20))
+        for number, change in enumerate(changes):
+            m_image_url.return_value = f'/new{number}.png'
+            change()
+
+            self.assertIn(f'/new{number}.png', button.html)
+            # The deck's grid is rebuilt too, re-using the cached HTML of every other button
+            self.assertIn(f'/new{number}.png', self.deck1.html)
+            self.assertIn('/old.png', self.deck1.html)
+
+    @patch('button_image.ButtonImage.render_digest', new_callable=PropertyMock)
+    def test_image_url(self, m_render_digest):
+        """Button.image_url"""
+        m_render_digest.return_value = 'abc'
+
+        button = Button(12, OriginalDeck('my deck/1?'))
+        self.assertEqual('/api/v1/decks/my%20deck/1%3F/keys/12.png?v=abc', button.image_url)
 
     @patch('button.Button.button_dao.update')
     @patch('button.Button.update_key_image')
@@ -70,6 +109,21 @@ class TestButton(BaseStreamdeckXTest):
         m_update_key_image.assert_called()
         m_btn_update.assert_called()
 
+    @patch('button.Button.button_dao.update')
+    def test_set_text_publishes_image(self, m_btn_update):
+        from deck import VirtualDeck
+        deck = VirtualDeck('virtual', cols=4, rows=4)
+        button = deck.buttons[12]
+        subscription = deck.events.subscribe(deck.id)
+        self.addCleanup(deck.events.unsubscribe, subscription)
+
+        button.set_text('hello!')
+
+        message = subscription.get(timeout=0)
+        self.assertIn('event: image', message)
+        self.assertIn(f'"hash":"{button.render_digest}"', message)
+        self.assertIn('"key":12', message)
+
     @patch('button.Button.button_dao.update')
     @patch('button.Button.update_key_image')
     def test_set_colors(self, m_update_key_image, m_btn_update):
@@ -95,14 +149,31 @@ class TestButton(BaseStreamdeckXTest):
         m_update_key_image.assert_called()
         m_btn_update.assert_called()
 
+    def test_init_concurrency_policy(self):
+        self.assertEqual(ConcurrencyPolicy.QUEUE, Button(12, self.deck1).concurrency_policy)
+        self.assertEqual(ConcurrencyPolicy.RESTART,
+                         Button(12, self.deck1, concurrency_policy=ConcurrencyPolicy.RESTART).concurrency_policy)
+
+    @patch('button.Button.button_dao.update')
+    def test_set_concurrency_policy(self, m_btn_update):
+        button = Button(12, self.deck1)
+
+        button.set_concurrency_policy(ConcurrencyPolicy.DROP)
+
+        self.assertEqual(ConcurrencyPolicy.DROP, button.concurrency_policy)
+        m_btn_update.assert_called_with(button)
+
+    @patch('image_store.ImageStore.store')
     @patch('button.Button.button_dao.update')
     @patch('button.Button.update_key_image')
-    def test_set_background_image(self, m_update_key_image, m_btn_update):
+    def test_set_background_image(self, m_update_key_image, m_btn_update, m_store):
+        m_store.return_value = '123ZZZ'
         button = Button(12, self.deck1)
 
-        button.set_background_image('123ZZZ')
+        button.set_background_image(b'an image')
 
         self.assertEqual('123ZZZ', button.style.background_image)
+        m_store.assert_called_with(b'an image', keep_original=False)
 
         m_update_key_image.assert_called()
         m_btn_update.assert_called_with(button)
@@ -134,6 +205,42 @@ class TestButton(BaseStreamdeckXTest):
         button.add_action(action1)
         self.assertEquals([action1, action1], button.actions)
 
+    def test_remove_action(self):
+        button = Button(12, self.deck1)
+
+        action1 = MagicMock()
+        action2 = MagicMock()
+        button.actions = [action1, action2]
+
+        button.remove_action(action1)
+        self.assertEqual([action2], button.actions)
+
+    def test_action_plan(self):
+        button = Button(12, self.deck1)
+        button.add_action(TextAction('abc', button, 0))
+
+        plan = button.action_plan
+        self.assertEqual(1, len(plan))
+
+        # Reused until the actions change
+        self.assertIs(plan, button.action_plan)
+
+    def test_action_plan_recompiled(self):
+        button = Button(12, self.deck1)
+        action1 = TextAction('abc', button, 0)
+        button.add_action(action1)
+        plan = button.action_plan
+
+        button.add_action(DelayAction('1', button, 1))
+        self.assertEqual(2, len(button.action_plan))
+
+        button.remove_action(action1)
+        self.assertEqual(1, len(button.action_plan))
+
+        button.actions = []
+        self.assertEqual(0, len(button.action_plan))
+        self.assertIsNot(plan, button.action_plan)
+
     def test_execute_actions_none(self):
         button = Button(12, self.deck1)
         self.assertEqual([], button.actions)
@@ -156,6 +263,22 @@ class TestButton(BaseStreamdeckXTest):
         action1.execute.assert_called()
         action2.execute.assert_called()
 
+    def test_execute_actions_cancelled(self):
+        button = Button(12, self.deck1)
+        cancel_event = threading.Event()
+
+        action1 = MagicMock()
+        action1.execute.side_effect = cancel_event.set
+        action2 = MagicMock()
+
+        button.add_action(action1)
+        button.add_action(action2)
+
+        button.execute_actions(cancel_event=cancel_event)
+
+        action1.execute.assert_called()
+        action2.execute.assert_not_called()
+
     @patch('button_style.ButtonStyle.serialize')
     def test_serialize(self, m_bs_serialize):
         """Button.serialize"""
@@ -166,8 +289,9 @@ class TestButton(BaseStreamdeckXTest):
         m_bs_serialize.assert_called()
 
     @patch('deck.Deck.deck_interface')
+    @patch('key_writer.KeyImageWriter.enqueue')
     @patch('button_image.ButtonImage.render_key_image')
-    def test_update_key_image(self, m_render_key, m_deck_int):
+    def test_update_key_image(self, m_render_key, m_enqueue, m_deck_int):
         button = Button(10, self.deck1)
         image = MagicMock()
         m_render_key.return_value = image
@@ -175,7 +299,75 @@ class TestButton(BaseStreamdeckXTest):
         button.update_key_image()
 
         m_render_key.assert_called()
-        m_deck_int.set_key_image.assert_called_with(10, image)
+        m_enqueue.assert_called_with(10, image)
+        self.assertEqual(button.render_digest, self.deck1.key_image_digests[10])
+
+    @patch('deck.Deck.deck_interface')
+    @patch('key_writer.KeyImageWriter.enqueue')
+    @patch('button_image.ButtonImage.render_key_image')
+    def test_update_key_image_pre_rendered(self, m_render_key, m_enqueue, m_deck_int):
+        button = Button(10, self.deck1)
+        image = MagicMock()
+
+        button.update_key_image(image=image)
+
+        m_render_key.assert_not_called()
+        m_enqueue.assert_called_with(10, image)
+
+    @patch('deck.Deck.deck_interface')
+    @patch('key_writer.KeyImageWriter.enqueue')
+    @patch('button_image.ButtonImage.render_key_image')
+    def test_update_key_image_unchanged(self, m_render_key, m_enqueue, m_deck_int):
+        button = Button(10, self.deck1)
+
+        button.update_key_image()
+        button.update_key_image()
+
+        self.assertEqual(1, m_render_key.call_count)
+        self.assertEqual(1, m_enqueue.call_count)
+
+    @patch('deck.Deck.deck_interface')
+    @patch('key_writer.KeyImageWriter.enqueue')
+    @patch('button_image.ButtonImage.render_key_image')
+    def test_update_key_image_changed(self, m_render_key, m_enqueue, m_deck_int):
+        button = Button(10, self.deck1)
+
+        button.update_key_image()
+        button.style.label = 'New Label'
+        button.update_key_image()
+
+        self.assertEqual(2, m_render_key.call_count)
+        self.assertEqual(2, m_enqueue.call_count)
+
+    @patch('deck.Deck.deck_interface')
+    @patch('key_writer.KeyImageWriter.enqueue')
+    @patch('button_image.ButtonImage.render_key_image')
+    def test_update_key_image_force(self, m_render_key, m_enqueue, m_deck_int):
+        button = Button(10, self.deck1)
+
+        button.update_key_image()
+        button.update_key_image(force=True)
+
+        self.assertEqual(2, m_enqueue.call_count)
+
+    @patch('deck.Deck.deck_interface')
+    @patch('key_writer.KeyImageWriter.enqueue')
+    @patch('button_image.ButtonImage.render_key_image')
+    def test_is_dirty(self, m_render_key, m_enqueue, m_deck_int):
+        button = Button(10, self.deck1)
+        self.assertTrue(button.is_dirty)
+
+        button.update_key_image()
+        self.assertFalse(button.is_dirty)
+
+        button.style.text_color = '#008080'
+        self.assertTrue(button.is_dirty)
+
+    def test_is_dirty_virtual(self):
+        from deck import VirtualDeck
+        button = Button(1, VirtualDeck('virtual', cols=2, rows=1))
+
+        self.assertFalse(button.is_dirty)
 
 
 if __name__ == '__main__':
@@ -1,8 +1,9 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, PropertyMock
 
 from test_base import BaseStreamdeckXTest
 from button_image import ButtonImage, ImageLine
+from deck_types import DeckTypes
 
 
 class TestButtonImage(BaseStreamdeckXTest):
@@ -13,6 +14,10 @@ class TestButtonImage(BaseStreamdeckXTest):
         self.addCleanup(get_text_dimensions_patch.stop)
         self.m_get_text_dimensions.side_effect = get_text_dimensions_side_effect
 
+        ButtonImage.render_cache.clear()
+        ButtonImage.native_cache.clear()
+        ButtonImage.png_cache.clear()
+
     def test_init(self):
         style = MagicMock()
         deck = MagicMock()
@@ -25,12 +30,10 @@ class TestButtonImage(BaseStreamdeckXTest):
 
     @patch('button_image.ButtonImage.draw_text')
     @patch('PIL.Image.new')
-    @patch('PIL.Image.open')
     @patch('PIL.ImageDraw.Draw')
     @patch('StreamDeck.ImageHelpers.PILHelper.create_scaled_image')
-    @patch('io.BytesIO')
-    @patch('base64.b64decode')
-    def test_image_with_background_image(self, m_base64_decode, m_bytes_io, m_scaled_image, m_image_draw, m_image_open, m_image_new, m_draw_text):
+    @patch('image_store.ImageStore.get_image')
+    def test_image_with_background_image(self, m_get_image, m_scaled_image, m_image_draw, m_image_new, m_draw_text):
         style = MagicMock()
         style.background_image = '123ZZZ'
         style.rgb_background_color = '#008080'
@@ -39,14 +42,8 @@ class TestButtonImage(BaseStreamdeckXTest):
         interface = MagicMock()
         deck.deck_interface = interface
 
-        decoded_base64 = MagicMock()
-        m_base64_decode.return_value = decoded_base64
-
-        byte_stream = MagicMock()
-        m_bytes_io.return_value = byte_stream
-
         m_background_image = MagicMock()
-        m_image_open.return_value = m_background_image
+        m_get_image.return_value = m_background_image
 
         m_image = MagicMock()
         m_image.size = (100, 50)
@@ -59,9 +56,9 @@ class TestButtonImage(BaseStreamdeckXTest):
         self.assertEquals(100, image._image_size)
 
         m_scaled_image.assert_called()
-        m_image_open.assert_called_with(byte_stream)
+        m_get_image.assert_called_with('123ZZZ')
         m_image_new.assert_called_with('RGB', (100, 100), '#008080')
-        m_background_image.convert.assert_called_with('RGBA')
+        m_image_new.return_value.paste.assert_called_with(m_background_image, mask=m_background_image)
         m_image_draw.assert_called_with(m_image)
         m_draw_text.assert_called_with(m_image_draw.return_value)
 
@@ -131,6 +128,153 @@ class TestButtonImage(BaseStreamdeckXTest):
         m_image_draw.assert_not_called()
         m_draw_text.assert_not_called()
 
+    def test_key_image_format_virtual(self):
+        style = MagicMock()
+        deck = MagicMock()
+        deck.__class__.__name__ = 'VirtualDeck'
+
+        image = ButtonImage(style, deck)
+
+        self.assertEqual({'size': (100, 100), 'format': None}, image.key_image_format)
+
+    def test_key_image_format_real(self):
+        style = MagicMock()
+        deck = MagicMock()
+        deck.deck_interface.key_image_format.return_value = {'size': (96, 96), 'format': 'JPEG'}
+
+        image = ButtonImage(style, deck)
+
+        self.assertEqual({'size': (96, 96), 'format': 'JPEG'}, image.key_image_format)
+
+    def test_render_digest(self):
+        deck = MagicMock()
+        deck.deck_interface.key_image_format.return_value = {'size': (96, 96), 'format': 'JPEG'}
+        style1 = MagicMock()
+        style1.digest = 'abc'
+        style2 = MagicMock()
+        style2.digest = 'abc'
+        style3 = MagicMock()
+        style3.digest = 'def'
+
+        self.assertEqual(ButtonImage(style1, deck).render_digest, ButtonImage(style2, deck).render_digest)
+        self.assertNotEqual(ButtonImage(style1, deck).render_digest, ButtonImage(style3, deck).render_digest)
+
+    def test_render_digest_diff_key_sizes(self):
+        style = MagicMock()
+        style.digest = 'abc'
+        deck1 = MagicMock()
+        deck1.deck_interface.key_image_format.return_value = {'size': (96, 96), 'format': 'JPEG'}
+        deck2 = MagicMock()
+        deck2.deck_interface.key_image_format.return_value = {'size': (72, 72), 'format': 'BMP'}
+
+        self.assertNotEqual(ButtonImage(style, deck1).render_digest, ButtonImage(style, deck2).render_digest)
+
+    @patch('button_image.ButtonImage._render')
+    def test_image_cached(self, m_render):
+        deck = MagicMock()
+        deck.deck_interface.key_image_format.return_value = {'size': (96, 96), 'format': 'JPEG'}
+        style1 = MagicMock()
+        style1.digest = 'abc'
+        style2 = MagicMock()
+        style2.digest = 'abc'
+
+        m_image = MagicMock()
+        m_image.size = (96, 96)
+        m_render.return_value = m_image
+
+        self.assertEqual(m_image, ButtonImage(style1, deck).image)
+
+        # A second button with an identical style re-uses the first render
+        second_image = ButtonImage(style2, deck)
+        self.assertEqual(m_image, second_image.image)
+        self.assertEqual(96, second_image._image_size)
+
+        self.assertEqual(1, m_render.call_count)
+        self.assertEqual(1, ButtonImage.render_cache.hits)
+        self.assertEqual(1, ButtonImage.render_cache.misses)
+
+    def test_native_digest_diff_deck_models(self):
+        style = MagicMock()
+        style.digest = 'abc'
+        deck1 = MagicMock()
+        deck1.__class__.type = DeckTypes.XL
+        deck1.deck_interface.key_image_format.return_value = {'size': (96, 96), 'format': 'JPEG'}
+        deck2 = MagicMock()
+        deck2.__class__.type = DeckTypes.ORIGINAL
+        deck2.deck_interface.key_image_format.return_value = {'size': (96, 96), 'format': 'JPEG'}
+
+        image1 = ButtonImage(style, deck1)
+        image2 = ButtonImage(style, deck2)
+
+        # Identical renders, but different native payloads
+        self.assertEqual(image1.render_digest, image2.render_digest)
+        self.assertNotEqual(image1.native_digest, image2.native_digest)
+
+    def test_render_key_image_virtual(self):
+        style = MagicMock()
+        deck = MagicMock()
+        deck.__class__.__name__ = 'VirtualDeck'
+        bi = ButtonImage(style, deck)
+
+        with patch('button_image.ButtonImage.image', new_callable=PropertyMock) as m_image:
+            self.assertEqual(m_image.return_value, bi.render_key_image())
+
+        self.assertEqual(0, len(ButtonImage.native_cache))
+
+    @patch('StreamDeck.ImageHelpers.PILHelper.to_native_format')
+    @patch('button_image.ButtonImage.image', new_callable=PropertyMock)
+    def test_render_key_image_cached(self, m_image, m_to_native_format):
+        deck = MagicMock()
+        deck.__class__.type = DeckTypes.XL
+        deck.deck_interface.key_image_format.return_value = {'size': (96, 96), 'format': 'JPEG'}
+        style1 = MagicMock()
+        style1.digest = 'abc'
+        style2 = MagicMock()
+        style2.digest = 'abc'
+
+        m_to_native_format.return_value = b'native image'
+
+        self.assertEqual(b'native image', ButtonImage(style1, deck).render_key_image())
+        # A second button with an identical style (or the same button, re-sent) re-uses the encoded payload
+        self.assertEqual(b'native image', ButtonImage(style2, deck).render_key_image())
+
+        m_to_native_format.assert_called_once_with(deck.deck_interface, m_image.return_value)
+        self.assertEqual({'entries': 1, 'bytes': 12, 'hits': 1, 'misses': 1},
+                         {key: ButtonImage.native_cache.stats()[key] for key in ('entries', 'bytes', 'hits', 'misses')})
+
+    @patch('StreamDeck.ImageHelpers.PILHelper.to_native_format')
+    @patch('button_image.ButtonImage.image', new_callable=PropertyMock)
+    def test_render_key_image_style_changed(self, m_image, m_to_native_format):
+        deck = MagicMock()
+        deck.__class__.type = DeckTypes.XL
+        deck.deck_interface.key_image_format.return_value = {'size': (96, 96), 'format': 'JPEG'}
+        style = MagicMock()
+        style.digest = 'abc'
+        bi = ButtonImage(style, deck)
+
+        m_to_native_format.return_value = b'native image'
+        bi.render_key_image()
+
+        style.digest = 'def'
+        bi.render_key_image()
+
+        self.assertEqual(2, m_to_native_format.call_count)
+
+    @patch('button_image.ButtonImage.image', new_callable=PropertyMock)
+    def test_png_bytes_cached(self, m_image):
+        deck = MagicMock()
+        deck.__class__.__name__ = 'VirtualDeck'
+        style = MagicMock()
+        style.digest = 'abc'
+        m_image.return_value.save.side_effect = lambda buffer, format: buffer.write(b'png image')
+
+        self.assertEqual(b'png image', ButtonImage(style, deck).png_bytes)
+        # Every browser (and every button with the same image) gets the same encoded PNG
+        self.assertEqual(b'png image', ButtonImage(style, deck).png_bytes)
+
+        m_image.return_value.save.assert_called_once()
+        self.assertEqual(1, len(ButtonImage.png_cache))
+
     def test_get_max_width_single(self):
         font = MagicMock()
 
@@ -68,6 +68,59 @@ class TestButtonStyle(BaseStreamdeckXTest):
 
         self.assertEqual(hash(bs), hash('My Style123ZZZArial.ttfPress Me!'))
 
+    def test_digest_equal(self):
+        """ButtonStyle.digest.equal"""
+        bs1 = ButtonStyle('My Style', 'Arial.ttf', 'Press Me!', background_image='123ZZZ')
+        bs2 = ButtonStyle('Your Style', 'Arial.ttf', 'Press Me!', background_image='123ZZZ')
+
+        # The name does not affect rendering
+        self.assertEqual(bs1.digest, bs2.digest)
+
+    def test_digest_diff_rendering_inputs(self):
+        """ButtonStyle.digest.diff_rendering_inputs"""
+        base = ButtonStyle('My Style', 'Arial.ttf', 'Press Me!')
+        variants = [
+            ButtonStyle('My Style', 'Arial-Bold.ttf', 'Press Me!'),
+            ButtonStyle('My Style', 'Arial.ttf', 'Don\'t Press Me!'),
+            ButtonStyle('My Style', 'Arial.ttf', 'Press Me!', font_size=24),
+            ButtonStyle('My Style', 'Arial.ttf', 'Press Me!', background_color='#008080'),
+            ButtonStyle('My Style', 'Arial.ttf', 'Press Me!', text_color='#008080'),
+            ButtonStyle('My Style', 'Arial.ttf', 'Press Me!', background_image='123ZZZ')
+        ]
+
+        for variant in variants:
+            self.assertNotEqual(base.digest, variant.digest)
+
+    def test_digest_changes_with_style(self):
+        """ButtonStyle.digest.changes_with_style"""
+        bs = ButtonStyle('My Style', 'Arial.ttf', 'Press Me!')
+        original_digest = bs.digest
+
+        bs.background_image = '123ZZZ'
+        self.assertNotEqual(original_digest, bs.digest)
+
+        bs.background_image = None
+        self.assertEqual(original_digest, bs.digest)
+
+    def test_digest_empty_image(self):
+        """ButtonStyle.digest.empty_image"""
+        bs1 = ButtonStyle('My Style', background_image='')
+        bs2 = ButtonStyle('My Style', background_image=None)
+
+        self.assertEqual(bs1.digest, bs2.digest)
+
+    def test_background_image_url(self):
+        """ButtonStyle.background_image_url"""
+        bs = ButtonStyle('My Style', background_image='123ZZZ')
+
+        self.assertEqual('/api/v1/images/123ZZZ.png', bs.background_image_url)
+
+    def test_background_image_url_no_image(self):
+        """ButtonStyle.background_image_url.no_image"""
+        bs = ButtonStyle('My Style')
+
+        self.assertIsNone(bs.background_image_url)
+
     @patch('os.path.join')
     def test_font_path(self, m_join):
         """ButtonStyle.font_path"""
@@ -1,6 +1,7 @@
 import unittest
 from unittest.mock import MagicMock, call, patch
 
+from action_executor import ConcurrencyPolicy
 from dao.button_dao import ButtonDao
 from button import Button, ButtonMissingIdError
 from button_style import ButtonStyle
@@ -100,9 +101,9 @@ class TestButtonDao(unittest.TestCase):
 
         self.assertIsNone(buttons)
 
-        self.m_cursor.execute.assert_called_with('SELECT * FROM button WHERE deck_id=?;', ('abc123',))
+        self.m_cursor.execute.assert_called_with(ButtonDao.BUTTONS_WITH_ACTIONS_QUERY.format('?'), ('abc123',))
 
-    @patch('dao.button_dao.ButtonDao.get_objs_from_result')
+    @patch('dao.button_dao.ButtonDao.get_objs_with_actions_from_result')
     def test_get_for_deck(self, m_objs_from_res):
         self.m_cursor.fetchall.return_value = [{'id': '1'}, {'id': '2'}]
 
@@ -112,23 +113,97 @@ class TestButtonDao(unittest.TestCase):
         button1 = MagicMock()
         button2 = MagicMock()
 
-        m_objs_from_res.return_value = [button1, button2]
-
-        action1 = MagicMock()
-        action2 = MagicMock()
-        action3 = MagicMock()
-        self.m_actions_for_btn.side_effect = [[action1, action2], [action3]]
+        m_objs_from_res.return_value = {'abc123': [button1, button2]}
 
         bd = ButtonDao()
         buttons = bd.get_for_deck(deck)
 
         self.assertEqual([button1, button2], buttons)
-        self.assertEqual([action1, action2], button1.actions)
-        self.assertEqual([action3], button2.actions)
 
-        self.m_cursor.execute.assert_called_with('SELECT * FROM button WHERE deck_id=?;', ('abc123',))
-        m_objs_from_res.assert_called_with([{'id': '1'}, {'id': '2'}], deck=deck)
-        self.m_actions_for_btn.assert_has_calls([call(button1), call(button2)])
+        self.m_cursor.execute.assert_called_once_with(ButtonDao.BUTTONS_WITH_ACTIONS_QUERY.format('?'), ('abc123',))
+        m_objs_from_res.assert_called_with([{'id': '1'}, {'id': '2'}], {'abc123': deck})
+        self.m_actions_for_btn.assert_not_called()
+
+    @patch('dao.button_dao.ButtonDao.get_objs_with_actions_from_result')
+    def test_get_for_decks(self, m_objs_from_res):
+        self.m_cursor.fetchall.return_value = [{'id': '1'}, {'id': '2'}]
+
+        deck1 = MagicMock()
+        deck1.id = 'abc123'
+        deck2 = MagicMock()
+        deck2.id = 'def456'
+
+        buttons_by_deck = {'abc123': [MagicMock()], 'def456': [MagicMock()]}
+        m_objs_from_res.return_value = buttons_by_deck
+
+        bd = ButtonDao()
+        result = bd.get_for_decks([deck1, deck2])
+
+        self.assertEqual(buttons_by_deck, result)
+
+        # A single query for all decks
+        self.m_cursor.execute.assert_called_once_with(ButtonDao.BUTTONS_WITH_ACTIONS_QUERY.format('?, ?'),
+                                                      ('abc123', 'def456'))
+        m_objs_from_res.assert_called_with([{'id': '1'}, {'id': '2'}], {'abc123': deck1, 'def456': deck2})
+
+    @patch('dao.button_dao.ButtonDao.MAX_DECKS_PER_QUERY', 2)
+    @patch('dao.button_dao.ButtonDao.get_objs_with_actions_from_result')
+    def test_get_for_decks_chunked(self, m_objs_from_res):
+        self.m_cursor.fetchall.side_effect = [[{'id': '1'}], [{'id': '2'}]]
+        m_objs_from_res.return_value = {}
+
+        decks = []
+        for deck_id in ('a', 'b', 'c'):
+            deck = MagicMock()
+            deck.id = deck_id
+            decks.append(deck)
+
+        bd = ButtonDao()
+        bd.get_for_decks(decks)
+
+        self.m_cursor.execute.assert_has_calls([
+            call(ButtonDao.BUTTONS_WITH_ACTIONS_QUERY.format('?, ?'), ('a', 'b')),
+            call(ButtonDao.BUTTONS_WITH_ACTIONS_QUERY.format('?'), ('c',))
+        ])
+        m_objs_from_res.assert_called_with([{'id': '1'}, {'id': '2'}], {'a': decks[0], 'b': decks[1], 'c': decks[2]})
+
+    def test_get_objs_with_actions_from_result(self):
+        def row(btn_id, deck_id, position, action_id=None, action_type=None, action_order=None, parameter=None):
+            return {'id': btn_id, 'deck_id': deck_id, 'position': position, 'font': None, 'font_size': 16,
+                    'label': None, 'background_color': '#000000', 'text_color': '#ffffff', 'background_image': None,
+                    'action_id': action_id, 'action_type': action_type, 'action_order': action_order,
+                    'action_parameter': parameter}
+
+        deck1 = MagicMock()
+        deck2 = MagicMock()
+
+        results = [
+            row(1, 'abc123', 0, 10, 'TEXT', 0, 'hello'),
+            row(1, 'abc123', 0, 11, 'DELAY', 1, '2'),
+            row(2, 'abc123', 1),
+            row(3, 'def456', 0, 12, 'TEXT', 0, 'world')
+        ]
+
+        buttons_by_deck = ButtonDao.get_objs_with_actions_from_result(results, {'abc123': deck1, 'def456': deck2})
+
+        self.assertEqual({'abc123', 'def456'}, set(buttons_by_deck.keys()))
+
+        button1, button2 = buttons_by_deck['abc123']
+        self.assertEqual((1, 0, deck1), (button1.id, button1.position, button1.deck))
+        self.assertEqual([10, 11], [action.id for action in button1.actions])
+        self.assertEqual(['TEXT', 'DELAY'], [action.action_type for action in button1.actions])
+        self.assertTrue(all(action.button is button1 for action in button1.actions))
+
+        self.assertEqual((2, 1), (button2.id, button2.position))
+        self.assertEqual([], button2.actions)
+
+        button3, = buttons_by_deck['def456']
+        self.assertEqual(deck2, button3.deck)
+        self.assertEqual('world', button3.actions[0].text)
+
+        # Everything came from the given rows - no further queries
+        self.m_actions_for_btn.assert_not_called()
+        self.m_get_deck_by_id.assert_not_called()
 
     def test_create(self):
         deck = MagicMock()
@@ -163,7 +238,7 @@ class TestButtonDao(unittest.TestCase):
         bd = ButtonDao()
         bd.update(button)
 
-        self.m_cursor.execute.assert_called_with('UPDATE button SET font = ?, font_size = ?, label = ?, background_color = ?, text_color = ?, background_image = ? WHERE id = ?;', ('Arial', 24, 'Press Me!', '#000000', '#ffffff', '123ZZZ', 57))
+        self.m_cursor.execute.assert_called_with('UPDATE button SET font = ?, font_size = ?, label = ?, background_color = ?, text_color = ?, background_image = ?, concurrency_policy = ? WHERE id = ?;', ('Arial', 24, 'Press Me!', '#000000', '#ffffff', '123ZZZ', 'QUEUE', 57))
         self.m_log_debug.assert_called()
 
     def test_update_missing_id(self):
@@ -256,9 +331,28 @@ class TestButtonDao(unittest.TestCase):
         self.assertEqual(57, button.id)
         self.assertEqual(deck, button.deck)
         self.assertEqual(ButtonStyle('text', font='Roboto-Regular.ttf', font_size=16, label='12'), button.style)
+        self.assertEqual(ConcurrencyPolicy.QUEUE, button.concurrency_policy)
 
         self.m_get_deck_by_id.assert_not_called()
 
+    def test_get_obj_from_result_concurrency_policy(self):
+        result = {
+            'position': 12,
+            'id': 57,
+            'deck_id': 'abc123',
+            'font': None,
+            'font_size': 16,
+            'label': None,
+            'background_color': '#000000',
+            'text_color': '#ffffff',
+            'background_image': None,
+            'concurrency_policy': 'RESTART'
+        }
+
+        button = ButtonDao.get_obj_from_result(result, deck=MagicMock())
+
+        self.assertEqual(ConcurrencyPolicy.RESTART, button.concurrency_policy)
+
     @patch('dao.button_dao.ButtonDao.get_obj_from_result')
     def test_get_objs_from_result_no_deck(self, m_obj_from_res):
         results = [{'id': 57, 'deck_id': 'abc123'}, {'id': 58, 'deck_id': 'abc123'}]
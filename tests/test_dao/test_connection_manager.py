@@ -0,0 +1,97 @@
+import os
+import sqlite3 as sl
+import tempfile
+import threading
+import unittest
+
+from dao.connection_manager import ConnectionManager
+
+
+class TestConnectionManager(unittest.TestCase):
+
+    def setUp(self) -> None:
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.db_name = os.path.join(temp_dir.name, 'test.db')
+
+        self.manager = ConnectionManager(max_idle_connections=2)
+        self.addCleanup(self.manager.close_all)
+
+    def test_get_connection_reused(self):
+        conn1 = self.manager.get_connection(self.db_name)
+        conn2 = self.manager.get_connection(self.db_name)
+
+        self.assertIs(conn1, conn2)
+        self.assertEqual(1, self.manager.connections_opened)
+
+    def test_get_connection_row_factory(self):
+        conn = self.manager.get_connection(self.db_name)
+
+        self.assertEqual(sl.Row, conn.row_factory)
+
+    def test_get_connection_wal(self):
+        conn = self.manager.get_connection(self.db_name)
+
+        journal_mode = conn.execute('PRAGMA journal_mode;').fetchone()[0]
+        self.assertEqual('wal', journal_mode)
+
+    def test_get_connection_per_thread(self):
+        main_conn = self.manager.get_connection(self.db_name)
+        thread_conns = []
+
+        def worker():
+            thread_conns.append(self.manager.get_connection(self.db_name))
+            # Still leased, so a second call on this thread gets the same connection
+            thread_conns.append(self.manager.get_connection(self.db_name))
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        self.assertIs(thread_conns[0], thread_conns[1])
+        self.assertIsNot(main_conn, thread_conns[0])
+        self.assertEqual(2, self.manager.connections_opened)
+
+    def test_connection_returned_when_thread_exits(self):
+        def worker():
+            self.manager.get_connection(self.db_name).execute('SELECT 1;')
+
+        for _ in range(0, 10):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+
+        # Each short-lived thread re-uses the connection returned by the previous one
+        self.assertEqual(1, self.manager.connections_opened)
+
+    def test_release_current_rolls_back(self):
+        conn = self.manager.get_connection(self.db_name)
+        conn.execute('CREATE TABLE example (id INTEGER);')
+        conn.commit()
+        conn.execute('INSERT INTO example VALUES (1);')
+
+        self.manager.release_current()
+
+        conn = self.manager.get_connection(self.db_name)
+        self.assertEqual(0, conn.execute('SELECT COUNT(*) FROM example;').fetchone()[0])
+        self.assertEqual(1, self.manager.connections_opened)
+
+    def test_max_idle_connections(self):
+        barrier = threading.Barrier(4)
+
+        def worker():
+            self.manager.get_connection(self.db_name)
+            barrier.wait()
+
+        threads = [threading.Thread(target=worker) for _ in range(0, 4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(4, self.manager.connections_opened)
+        self.assertEqual(2, len(self.manager._idle[self.db_name]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@ from unittest.mock import call, patch, MagicMock
 
 from dao.deck_dao import DeckDao
 from deck import XLDeck
+from deck_types import DeckTypes
 
 
 class TestDeckDao(unittest.TestCase):
@@ -60,6 +61,36 @@ class TestDeckDao(unittest.TestCase):
                                                  ('abc123', 'Stream Deck XL', 'XL'))
         m_btn_dao.create.assert_has_calls([call(button1), call(button2), call(button3)], any_order=True)
 
+    @patch('dao.deck_dao.DeckDao.button_dao')
+    def test_get_by_type(self, m_btn_dao):
+        self.m_cursor.fetchall.return_value = [
+            {'id': 'virtual1', 'type': 'VIRTUAL', 'num_rows': 1, 'num_cols': 2},
+            {'id': 'virtual2', 'type': 'VIRTUAL', 'num_rows': 2, 'num_cols': 2}
+        ]
+
+        button1 = MagicMock()
+        button2 = MagicMock()
+        m_btn_dao.get_for_decks.return_value = {'virtual1': [button1, button2]}
+
+        dd = DeckDao()
+        decks = dd.get_by_type(DeckTypes.VIRTUAL)
+
+        self.assertEqual(['virtual1', 'virtual2'], [deck.id for deck in decks])
+        self.assertEqual([button1, button2], decks[0].buttons)
+        # Decks without saved buttons keep their default buttons
+        self.assertEqual(4, len(decks[1].buttons))
+
+        # One query for the decks, and one for the buttons of all of them
+        self.m_cursor.execute.assert_called_once_with('SELECT * FROM deck WHERE type = ?;', ('VIRTUAL',))
+        m_btn_dao.get_for_decks.assert_called_once_with(decks)
+
+    def test_get_by_type_none(self):
+        self.m_cursor.fetchall.return_value = []
+
+        dd = DeckDao()
+
+        self.assertIsNone(dd.get_by_type(DeckTypes.VIRTUAL))
+
     def test_get_obj_from_result_no_buttons(self):
         button1 = MagicMock()
         button2 = MagicMock()
@@ -92,6 +123,42 @@ class TestDeckDao(unittest.TestCase):
 
         m_get_btns_for_deck.assert_called_with(result)
 
+    @patch('deck.Button')
+    @patch('dao.button_dao.ButtonDao.get_for_deck')
+    def test_get_obj_from_result_no_default_buttons(self, m_get_btns_for_deck, m_button):
+        db_buttons = [MagicMock() for _ in range(0, 32)]
+        m_get_btns_for_deck.return_value = db_buttons
+
+        dd = DeckDao()
+        result = dd.get_obj_from_result([{'id': 'abc123', 'type': 'XL'}], include_buttons=True)
+
+        self.assertEqual(db_buttons, result.buttons)
+        # No default buttons were created, only to be thrown away
+        m_button.assert_not_called()
+
+    @patch('dao.button_dao.ButtonDao.get_for_deck')
+    def test_get_obj_from_result_no_saved_buttons(self, m_get_btns_for_deck):
+        m_get_btns_for_deck.return_value = None
+
+        dd = DeckDao()
+        result = dd.get_obj_from_result([{'id': 'abc123', 'type': 'XL'}], include_buttons=True)
+
+        self.assertEqual(32, len(result.buttons))
+        self.assertEqual(list(range(0, 32)), [button.position for button in result.buttons])
+
+    def test_build_deck_virtual(self):
+        deck = DeckDao.build_deck({'id': 'virtual1', 'type': 'VIRTUAL', 'num_rows': 2, 'num_cols': 3})
+
+        self.assertEqual('virtual1', deck.id)
+        self.assertEqual((3, 2), (deck.cols, deck.rows))
+        self.assertEqual(6, len(deck.buttons))
+
+    def test_build_deck_no_buttons(self):
+        deck = DeckDao.build_deck({'id': 'abc123', 'type': 'ORIGINAL'}, populate_buttons=False)
+
+        self.assertEqual('abc123', deck.id)
+        self.assertEqual([], deck.buttons)
+
 
 if __name__ == '__main__':
     unittest.main()
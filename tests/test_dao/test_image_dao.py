@@ -0,0 +1,70 @@
+import hashlib
+import sqlite3 as sl
+import unittest
+from unittest.mock import patch
+
+from dao.image_dao import ImageDao
+from dao.migrations import SchemaMigrator
+
+
+class TestImageDao(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.conn = sl.connect(':memory:')
+        self.addCleanup(self.conn.close)
+        SchemaMigrator().migrate(self.conn)
+
+        get_conn_patch = patch('dao.image_dao.ImageDao.get_db_conn')
+        self.m_get_conn = get_conn_patch.start()
+        self.addCleanup(get_conn_patch.stop)
+        self.m_get_conn.return_value = self.conn
+
+    def test_create(self):
+        """ImageDao.create"""
+        image_hash = ImageDao().create(b'an image')
+
+        self.assertEqual(hashlib.sha256(b'an image').hexdigest(), image_hash)
+        self.assertEqual(b'an image', ImageDao().get_by_id(image_hash))
+
+    def test_create_duplicate(self):
+        """ImageDao.create.duplicate"""
+        image_dao = ImageDao()
+        hash1 = image_dao.create(b'an image')
+        hash2 = image_dao.create(b'an image')
+
+        self.assertEqual(hash1, hash2)
+        self.assertEqual(1, self.conn.execute('SELECT COUNT(*) FROM image_blob;').fetchone()[0])
+
+    def test_create_with_original(self):
+        """ImageDao.create.with_original"""
+        image_dao = ImageDao()
+        original_hash = image_dao.create(b'a large image')
+        image_hash = image_dao.create(b'an image', original_hash=original_hash)
+
+        self.assertEqual(original_hash, image_dao.get_original_hash(image_hash))
+        self.assertIsNone(image_dao.get_original_hash(original_hash))
+
+    def test_create_original_kept_later(self):
+        """ImageDao.create.original_kept_later"""
+        image_dao = ImageDao()
+        image_hash = image_dao.create(b'an image')
+        original_hash = image_dao.create(b'a large image')
+        image_dao.create(b'an image', original_hash=original_hash)
+
+        self.assertEqual(original_hash, image_dao.get_original_hash(image_hash))
+
+    def test_get_original_hash_missing(self):
+        """ImageDao.get_original_hash.missing"""
+        self.assertIsNone(ImageDao().get_original_hash('nope'))
+
+    def test_get_by_id_missing(self):
+        """ImageDao.get_by_id.missing"""
+        self.assertIsNone(ImageDao().get_by_id('nope'))
+
+    def test_get_obj_from_result(self):
+        """ImageDao.get_obj_from_result"""
+        self.assertEqual(b'an image', ImageDao.get_obj_from_result({'hash': 'abc', 'data': memoryview(b'an image')}))
+
+
+if __name__ == '__main__':
+    unittest.main()
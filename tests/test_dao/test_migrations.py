@@ -0,0 +1,133 @@
+import base64
+import hashlib
+import sqlite3 as sl
+import unittest
+
+from dao.migrations import Migration, SchemaMigrator, MIGRATIONS
+
+
+class TestSchemaMigrator(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.conn = sl.connect(':memory:')
+        self.addCleanup(self.conn.close)
+
+    def _get_tables(self):
+        return {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table';")}
+
+    def _get_indexes(self):
+        return {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index';")}
+
+    def test_init_duplicate_versions(self):
+        """SchemaMigrator.__init__.duplicate_versions"""
+        with self.assertRaises(ValueError):
+            SchemaMigrator([Migration(1, 'a', ()), Migration(1, 'b', ())])
+
+    def test_latest_version(self):
+        """SchemaMigrator.latest_version"""
+        migrator = SchemaMigrator([Migration(2, 'b', ()), Migration(1, 'a', ())])
+        self.assertEqual(2, migrator.latest_version)
+
+    def test_get_version_new_database(self):
+        """SchemaMigrator.get_version.new_database"""
+        self.assertEqual(0, SchemaMigrator.get_version(self.conn))
+
+    def test_migrate_new_database(self):
+        """SchemaMigrator.migrate.new_database"""
+        version = SchemaMigrator().migrate(self.conn)
+
+        self.assertEqual(MIGRATIONS[-1].version, version)
+        self.assertEqual(MIGRATIONS[-1].version, SchemaMigrator.get_version(self.conn))
+        self.assertTrue({'deck', 'button', 'action', 'schema_version'}.issubset(self._get_tables()))
+        self.assertTrue({'idx_button_deck_position', 'idx_action_button_order'}.issubset(self._get_indexes()))
+
+    def test_migrate_twice(self):
+        """SchemaMigrator.migrate.twice"""
+        migrator = SchemaMigrator()
+        migrator.migrate(self.conn)
+
+        self.assertEqual([], migrator.get_pending(self.conn))
+        self.assertEqual(MIGRATIONS[-1].version, migrator.migrate(self.conn))
+
+        versions = [row[0] for row in self.conn.execute('SELECT version FROM schema_version;')]
+        self.assertEqual([migration.version for migration in MIGRATIONS], versions)
+
+    def test_migrate_unversioned_database(self):
+        """SchemaMigrator.migrate.unversioned_database"""
+        # Database created before migrations existed, with user data in it
+        SchemaMigrator(MIGRATIONS[:1]).migrations[0].apply(self.conn)
+        self.conn.execute("INSERT INTO deck (id, name, type) VALUES ('abc123', 'XL', 'XL');")
+        self.conn.execute("INSERT INTO button (deck_id, position, label) VALUES ('abc123', 0, 'Hello');")
+        self.conn.commit()
+
+        SchemaMigrator().migrate(self.conn)
+
+        self.assertEqual([('abc123', 0, 'Hello')],
+                         self.conn.execute('SELECT deck_id, position, label FROM button;').fetchall())
+        self.assertIn('idx_button_deck_position', self._get_indexes())
+
+    def test_migrate_concurrency_policy(self):
+        """SchemaMigrator.migrate.concurrency_policy"""
+        SchemaMigrator().migrate(self.conn)
+
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(button);')]
+        self.assertIn('concurrency_policy', columns)
+
+    def test_migrate_uses_indexes(self):
+        """SchemaMigrator.migrate.uses_indexes"""
+        SchemaMigrator().migrate(self.conn)
+
+        button_plan = ' '.join(row[-1] for row in self.conn.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM button WHERE deck_id = ? ORDER BY position;', ('abc123',)))
+        action_plan = ' '.join(row[-1] for row in self.conn.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM action WHERE button_id = ? ORDER BY action_order;', (1,)))
+
+        self.assertIn('idx_button_deck_position', button_plan)
+        self.assertIn('idx_action_button_order', action_plan)
+
+    def test_migrate_background_images_to_blobs(self):
+        """SchemaMigrator.migrate.background_images_to_blobs"""
+        SchemaMigrator(MIGRATIONS[:2]).migrate(self.conn)
+        image = base64.b64encode(b'an image')
+        self.conn.executemany('INSERT INTO button (deck_id, position, background_image) VALUES (?, ?, ?);',
+                              [('abc123', 0, image), ('abc123', 1, image), ('abc123', 2, None)])
+        self.conn.commit()
+
+        SchemaMigrator().migrate(self.conn)
+
+        image_hash = hashlib.sha256(b'an image').hexdigest()
+        self.assertEqual([(image_hash,), (image_hash,), (None,)],
+                         self.conn.execute('SELECT background_image FROM button ORDER BY position;').fetchall())
+        self.assertEqual([(image_hash, b'an image')], self.conn.execute('SELECT hash, data FROM image_blob;').fetchall())
+
+    def test_migrate_only_pending(self):
+        """SchemaMigrator.migrate.only_pending"""
+        SchemaMigrator([Migration(1, 'Create table', ('CREATE TABLE example (id INTEGER);',))]).migrate(self.conn)
+
+        version = SchemaMigrator([
+            Migration(1, 'Create table', ('CREATE TABLE example (id INTEGER);',)),
+            Migration(2, 'Add column', ('ALTER TABLE example ADD COLUMN name TEXT;',))
+        ]).migrate(self.conn)
+
+        self.assertEqual(2, version)
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(example);')]
+        self.assertEqual(['id', 'name'], columns)
+
+    def test_migrate_failure_rolls_back(self):
+        """SchemaMigrator.migrate.failure_rolls_back"""
+        migrator = SchemaMigrator([
+            Migration(1, 'Create table', ('CREATE TABLE example (id INTEGER);',)),
+            Migration(2, 'Broken', ('CREATE TABLE partial (id INTEGER);', 'NOT VALID SQL;'))
+        ])
+
+        with self.assertLogs(level='ERROR'):
+            with self.assertRaises(sl.Error):
+                migrator.migrate(self.conn)
+
+        self.assertEqual(1, SchemaMigrator.get_version(self.conn))
+        self.assertIn('example', self._get_tables())
+        self.assertNotIn('partial', self._get_tables())
+
+
+if __name__ == '__main__':
+    unittest.main()
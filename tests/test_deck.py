@@ -1,8 +1,11 @@
+import threading
 import unittest
 from unittest.mock import call, patch, MagicMock, PropertyMock
 
 from test_base import BaseStreamdeckXTest
-from deck import Deck, MiniDeck, OriginalDeck, XLDeck
+from deck import Deck, MiniDeck, OriginalDeck, VirtualDeck, XLDeck
+from action_executor import ActionExecutor, ConcurrencyPolicy
+from deck_registry import DeckRegistry
 
 
 class TestDeck(BaseStreamdeckXTest):
@@ -27,24 +30,41 @@ class TestDeck(BaseStreamdeckXTest):
         self.m_deck_dao_create = deck_dao_create_patch.start()
         self.addCleanup(deck_dao_create_patch.stop)
 
-    @patch('deck.Deck._get_serial_from_session_id')
-    def test_deck_interface(self, m_from_session_id):
+    def test_deck_interface(self):
         """Deck.deck_interface"""
         deck_interface1 = MagicMock()
-        deck_interface1.get_serial_number.return_value = 'def456'
-        deck_interface1.id.return_value = 'deck1_id'
-
         deck_interface2 = MagicMock()
-        deck_interface2.get_serial_number.return_value = 'abc123'
-        deck_interface2.id.return_value = 'deck2_id'
 
-        self.m_dev_manager.enumerate.return_value = [deck_interface1, deck_interface2]
-        m_from_session_id.side_effect = ['def456', 'abc123']
+        Deck.sessions.register('deck1_id', 'def456', device=deck_interface1)
+        Deck.sessions.register('deck2_id', 'abc123', device=deck_interface2)
+        self.addCleanup(Deck.sessions.remove, 'deck1_id')
+        self.addCleanup(Deck.sessions.remove, 'deck2_id')
 
         deck = XLDeck('abc123')
 
         self.assertEqual(deck.deck_interface, deck_interface2)
-        m_from_session_id.assert_has_calls([call('deck1_id'), call('deck2_id')], any_order=False)
+        self.m_dev_manager.enumerate.assert_not_called()
+
+    def test_deck_interface_not_connected(self):
+        """Deck.deck_interface.not_connected"""
+        deck = XLDeck('abc123')
+
+        self.assertIsNone(deck.deck_interface)
+        self.m_dev_manager.enumerate.assert_not_called()
+
+    def test_deck_interface_reconnected(self):
+        """Deck.deck_interface.reconnected"""
+        old_interface = MagicMock()
+        new_interface = MagicMock()
+        deck = XLDeck('abc123')
+        self.addCleanup(Deck.sessions.remove, 'sess_new')
+
+        Deck.sessions.register('sess_old', 'abc123', device=old_interface)
+        self.assertEqual(old_interface, deck.deck_interface)
+
+        # Re-plugged into a different port
+        Deck.sessions.register('sess_new', 'abc123', device=new_interface)
+        self.assertEqual(new_interface, deck.deck_interface)
 
     @patch('deck.Deck.deck_interface', new_callable=PropertyMock)
     def test_open_from_closed(self, m_deck_int):
@@ -162,6 +182,353 @@ class TestDeck(BaseStreamdeckXTest):
         self.assertEqual(deck_interface.close.call_count, 0)
         self.assertEqual(deck_interface.reset.call_count, 1)
 
+    @patch('deck.Deck.deck_interface', new_callable=PropertyMock)
+    def test_reset_invalidates_key_images(self, m_deck_int):
+        """Deck.reset.invalidates_key_images"""
+        m_deck_int.return_value = MagicMock()
+
+        deck = XLDeck('abc123')
+        deck.key_image_digests[0] = 'abc'
+
+        deck.reset()
+
+        self.assertEqual({}, deck.key_image_digests)
+
+    @patch('button.Button.is_dirty', new_callable=PropertyMock)
+    @patch('deck.Deck.deck_interface', new_callable=PropertyMock)
+    def test_update_only_dirty(self, m_deck_int, m_is_dirty):
+        """Deck.update.only_dirty"""
+        deck_interface = MagicMock()
+        m_deck_int.return_value = deck_interface
+
+        deck = OriginalDeck('abc123')
+        m_is_dirty.side_effect = [position in (1, 4) for position in range(0, 15)]
+
+        with patch('deck.Deck.render_buttons') as m_render_buttons:
+            m_render_buttons.return_value = [(deck.buttons[1], 'image1'), (deck.buttons[4], 'image4')]
+            deck.update()
+
+        m_render_buttons.assert_called_with([deck.buttons[1], deck.buttons[4]])
+        self.m_render_button.assert_has_calls([call(image='image1'), call(image='image4')])
+
+        # Writing the images (and opening the device to do so) is left to the deck's KeyImageWriter
+        deck_interface.open.assert_not_called()
+
+    @patch('button_image.ButtonImage.render_key_image', autospec=True)
+    @patch('deck.Deck.deck_interface', new_callable=PropertyMock)
+    def test_render_buttons(self, m_deck_int, m_render_key_image):
+        """Deck.render_buttons"""
+        m_render_key_image.side_effect = lambda button_image: f'image{button_image.style.label}'
+        deck = XLDeck('abc123')
+
+        rendered = deck.render_buttons(list(reversed(deck.buttons)))
+
+        # Rendered in parallel, but returned in key order
+        self.assertEqual([(button, f'image{button.position}') for button in deck.buttons], rendered)
+
+    @patch('button_image.ButtonImage.render_key_image', autospec=True)
+    @patch('deck.Deck.deck_interface', new_callable=PropertyMock)
+    def test_render_buttons_on_render_threads(self, m_deck_int, m_render_key_image):
+        """Deck.render_buttons.on_render_threads"""
+        thread_names = set()
+        m_render_key_image.side_effect = lambda button_image: thread_names.add(threading.current_thread().name)
+
+        self.addCleanup(Deck.configure_rendering, Deck.RENDER_WORKERS)
+        Deck.configure_rendering(2)
+        XLDeck('abc123').render_buttons()
+
+        self.assertTrue(thread_names)
+        self.assertTrue(all(name.startswith('KeyRender') for name in thread_names))
+
+    @patch('button_image.ButtonImage.render_key_image', autospec=True)
+    @patch('deck.Deck.deck_interface', new_callable=PropertyMock)
+    def test_render_buttons_serial(self, m_deck_int, m_render_key_image):
+        """Deck.render_buttons.serial"""
+        thread_names = set()
+        m_render_key_image.side_effect = lambda button_image: thread_names.add(threading.current_thread().name)
+
+        self.addCleanup(Deck.configure_rendering, Deck.RENDER_WORKERS)
+        Deck.configure_rendering(1)
+        XLDeck('abc123').render_buttons()
+
+        self.assertEqual({threading.current_thread().name}, thread_names)
+
+    @patch('button.Button.is_dirty', new_callable=PropertyMock)
+    @patch('deck.Deck.deck_interface', new_callable=PropertyMock)
+    def test_update_nothing_dirty(self, m_deck_int, m_is_dirty):
+        """Deck.update.nothing_dirty"""
+        deck_interface = MagicMock()
+        m_deck_int.return_value = deck_interface
+        m_is_dirty.return_value = False
+
+        deck = OriginalDeck('abc123')
+        deck.update()
+
+        self.m_render_button.assert_not_called()
+        deck_interface.open.assert_not_called()
+        deck_interface.close.assert_not_called()
+
+    @patch('deck.Deck.get_connected')
+    def test_scan(self, m_get_connected):
+        """Deck.scan"""
+        deck = MagicMock()
+        m_get_connected.return_value = [deck]
+
+        Deck.scan()
+
+        m_get_connected.assert_called_with()
+        self.assertEqual([call.activate(), call.update()], deck.mock_calls)
+
+    @patch('deck.Deck.deck_interface', new_callable=PropertyMock)
+    def test_activate_already_open(self, m_deck_int):
+        """Deck.activate.already_open"""
+        deck_interface = MagicMock()
+        m_deck_int.return_value = deck_interface
+
+        deck = XLDeck('abc123')
+        deck._is_open = True
+        deck.activate()
+
+        deck_interface.open.assert_not_called()
+        deck_interface.set_key_callback.assert_not_called()
+        deck_interface.set_brightness.assert_not_called()
+
+    @patch('deck.Deck.deck_interface', new_callable=PropertyMock)
+    def test_activate_from_closed(self, m_deck_int):
+        """Deck.activate.from_closed"""
+        deck_interface = MagicMock()
+        m_deck_int.return_value = deck_interface
+
+        deck = XLDeck('abc123')
+        deck.activate()
+
+        self.assertTrue(deck._is_open)
+        deck_interface.open.assert_called_once()
+        deck_interface.set_key_callback.assert_called_with(Deck.key_change_callback)
+        deck_interface.set_brightness.assert_called_with(100)
+
+    @patch('deck.Deck.action_executor')
+    @patch('deck.Deck._get_instantiated_deck_by_session_id')
+    def test_key_change_callback(self, m_inst_by_session, m_executor):
+        """Deck.key_change_callback"""
+        deck = OriginalDeck('abc123')
+        m_inst_by_session.return_value = deck
+        device = MagicMock()
+
+        Deck.key_change_callback(device, 3, True)
+
+        # Only scheduled - the actions run on the executor's threads, not the library's read thread
+        m_executor.submit.assert_called_with(deck.buttons[3], policy=ConcurrencyPolicy.QUEUE)
+
+    @patch('deck.Deck._get_instantiated_deck_by_session_id')
+    def test_key_change_callback_concurrency_policy(self, m_inst_by_session):
+        """Deck.key_change_callback.concurrency_policy"""
+        deck = OriginalDeck('abc123')
+        m_inst_by_session.return_value = deck
+        button = deck.buttons[3]
+        button.concurrency_policy = ConcurrencyPolicy.DROP
+
+        started = threading.Event()
+        release = threading.Event()
+        self.addCleanup(release.set)
+        action = MagicMock()
+        action.execute.side_effect = lambda: started.set() or release.wait(5)
+        button.actions = [action]
+
+        executor = ActionExecutor()
+        self.addCleanup(executor.shutdown)
+
+        with patch('deck.Deck.action_executor', executor):
+            Deck.key_change_callback(MagicMock(), 3, True)
+            self.assertTrue(started.wait(5))
+
+            # Pressed again while still running - dropped, as the button asks
+            Deck.key_change_callback(MagicMock(), 3, True)
+            release.set()
+            self.assertTrue(executor.wait_until_idle(timeout=5))
+
+        self.assertEqual(1, executor.dropped)
+        self.assertEqual(1, action.execute.call_count)
+
+    @patch('deck.Deck.action_executor')
+    def test_key_change_callback_released(self, m_executor):
+        """Deck.key_change_callback.released"""
+        Deck.key_change_callback(MagicMock(), 3, False)
+
+        m_executor.submit.assert_not_called()
+
+    @patch('deck.Deck.events')
+    @patch('deck.Deck.action_executor')
+    @patch('deck.Deck._get_instantiated_deck_by_session_id')
+    def test_key_change_callback_publishes(self, m_inst_by_session, m_executor, m_events):
+        """Deck.key_change_callback.publishes"""
+        deck = OriginalDeck('abc123')
+        m_inst_by_session.return_value = deck
+
+        Deck.key_change_callback(MagicMock(), 3, True)
+        m_events.publish.assert_called_with('abc123', 'key', {'key': 3, 'pressed': True})
+
+        Deck.key_change_callback(MagicMock(), 3, False)
+        m_events.publish.assert_called_with('abc123', 'key', {'key': 3, 'pressed': False})
+
+    def test_disconnect(self):
+        """Deck.disconnect"""
+        deck_interface = MagicMock()
+        deck_interface.close.side_effect = IOError('Device unplugged')
+
+        deck = XLDeck('abc123')
+        Deck.sessions.register('sess_1', 'abc123', device=deck_interface)
+        self.addCleanup(Deck.sessions.remove, 'sess_1')
+        deck._is_open = True
+        deck.key_image_digests[0] = 'abc'
+        deck.key_writer = MagicMock()
+
+        deck.disconnect()
+
+        self.assertFalse(deck._is_open)
+        self.assertEqual({}, deck.key_image_digests)
+        deck.key_writer.clear.assert_called()
+        deck_interface.close.assert_called()
+
+    @patch('deck.Deck._get_deck_for_device')
+    def test_connect_device(self, m_deck_for_device):
+        """Deck.connect_device"""
+        device = MagicMock()
+        deck = MagicMock()
+        m_deck_for_device.return_value = deck
+
+        self.assertEqual(deck, Deck.connect_device(device))
+
+        m_deck_for_device.assert_called_with(device)
+        deck.activate.assert_called()
+        deck.update.assert_called()
+
+    @patch('deck.Deck._get_deck_for_device')
+    def test_connect_device_unsupported(self, m_deck_for_device):
+        """Deck.connect_device.unsupported"""
+        m_deck_for_device.return_value = None
+
+        self.assertIsNone(Deck.connect_device(MagicMock()))
+
+    @patch('deck.Deck._get_instantiated_deck_by_session_id')
+    def test_disconnect_device(self, m_inst_by_id):
+        """Deck.disconnect_device"""
+        deck = MagicMock()
+        m_inst_by_id.return_value = deck
+        Deck.sessions.register('sess_1', 'abc123', device=MagicMock())
+
+        Deck.disconnect_device('sess_1')
+
+        m_inst_by_id.assert_called_with('sess_1')
+        deck.disconnect.assert_called()
+        self.assertNotIn('sess_1', Deck.sessions)
+        self.assertIsNone(Deck.sessions.get_device('abc123'))
+
+    @patch('deck.Deck._get_instantiated_deck_by_session_id')
+    def test_get_deck_for_device_new_session(self, m_inst_by_id):
+        """Deck._get_deck_for_device.new_session"""
+        device = MagicMock()
+        device.id.return_value = 'sess_new'
+        device.get_serial_number.return_value = 'abc123'
+        deck = MagicMock()
+        m_inst_by_id.return_value = deck
+        self.addCleanup(Deck.sessions.remove, 'sess_new')
+
+        self.assertEqual(deck, Deck._get_deck_for_device(device))
+
+        device.open.assert_called()
+        device.close.assert_called()
+        self.assertEqual('abc123', Deck.sessions.get_serial('sess_new'))
+        self.assertEqual(device, Deck.sessions.get_device('abc123'))
+
+    @patch('deck.Deck._get_instantiated_deck_by_session_id')
+    def test_get_deck_for_device_moved_port(self, m_inst_by_id):
+        """Deck._get_deck_for_device.moved_port"""
+        old_device = MagicMock()
+        new_device = MagicMock()
+        new_device.id.return_value = 'sess_new'
+        new_device.get_serial_number.return_value = 'abc123'
+        deck = MagicMock()
+        m_inst_by_id.side_effect = {'sess_old': deck}.get
+        self.m_deck_dao_by_id.return_value = deck
+
+        Deck.sessions.register('sess_old', 'abc123', device=old_device)
+        self.addCleanup(Deck.sessions.remove, 'sess_old')
+        self.addCleanup(Deck.sessions.remove, 'sess_new')
+
+        self.assertEqual(deck, Deck._get_deck_for_device(new_device))
+
+        # Disconnected while the old handle was still registered, so that the deck starts afresh on the new handle
+        deck.disconnect.assert_called_once()
+        self.assertNotIn('sess_old', Deck.sessions)
+        self.assertEqual(new_device, Deck.sessions.get_device('abc123'))
+        self.assertEqual('sess_new', deck.session_id)
+
+    @patch('deck.Deck._get_instantiated_deck_by_session_id')
+    def test_get_deck_for_device_known_session(self, m_inst_by_id):
+        """Deck._get_deck_for_device.known_session"""
+        device = MagicMock()
+        device.id.return_value = 'sess_known'
+        m_inst_by_id.return_value = None
+        deck = MagicMock()
+        self.m_deck_dao_by_id.return_value = deck
+
+        known_device = MagicMock()
+        Deck.sessions.register('sess_known', 'def456', device=known_device)
+        self.addCleanup(Deck.sessions.remove, 'sess_known')
+
+        self.assertEqual(deck, Deck._get_deck_for_device(device))
+
+        # The handle found first (which may already be open) is kept
+        self.assertEqual(known_device, Deck.sessions.get_device('def456'))
+
+        # The serial number is already known, so the device does not need to be opened
+        device.open.assert_not_called()
+        self.m_deck_dao_by_id.assert_called_with('def456')
+        self.assertEqual('sess_known', deck.session_id)
+
+    @patch('deck.Deck._get_instantiated_deck_by_session_id')
+    def test_get_deck_for_device_replugged_same_path(self, m_inst_by_id):
+        """Deck._get_deck_for_device.replugged_same_path"""
+        old_device = MagicMock()
+        old_device.is_open.return_value = False
+        new_device = MagicMock()
+        new_device.id.return_value = 'sess_known'
+        deck = MagicMock()
+        deck._is_open = True
+        m_inst_by_id.return_value = deck
+
+        Deck.sessions.register('sess_known', 'def456', device=old_device)
+        self.addCleanup(Deck.sessions.remove, 'sess_known')
+
+        self.assertEqual(deck, Deck._get_deck_for_device(new_device))
+
+        # The dead handle is swapped for the new one, and the deck starts afresh
+        deck.disconnect.assert_called()
+        self.assertEqual(new_device, Deck.sessions.get_device('def456'))
+        new_device.open.assert_not_called()
+
+    @patch('deck.Deck._get_instantiated_deck_by_session_id')
+    def test_get_deck_for_device_known_session_without_is_open(self, m_inst_by_id):
+        """Deck._get_deck_for_device.known_session_without_is_open"""
+        # Handles from StreamDeck library releases before 0.9 have no is_open()
+        registered_device = MagicMock(spec=['id', 'connected', 'open', 'close', 'set_key_image'])
+        registered_device.connected.return_value = True
+        new_device = MagicMock()
+        new_device.id.return_value = 'sess_known'
+        deck = MagicMock()
+        deck._is_open = True
+        m_inst_by_id.return_value = deck
+
+        Deck.sessions.register('sess_known', 'def456', device=registered_device)
+        self.addCleanup(Deck.sessions.remove, 'sess_known')
+
+        self.assertEqual(deck, Deck._get_deck_for_device(new_device))
+
+        # Still alive, so the deck is left alone
+        deck.disconnect.assert_not_called()
+        self.assertEqual(registered_device, Deck.sessions.get_device('def456'))
+
     @patch('deck.Deck._get_instantiated_deck_by_session_id')
     def test_get_connected_single_xl(self, m_inst_by_id):
         """Deck.get_connected.single_xl"""
@@ -246,6 +613,67 @@ class TestDeck(BaseStreamdeckXTest):
         m_print.assert_called()
         self.m_deck_dao_create.assert_not_called()
 
+    @patch('deck.Deck.registry', new_callable=DeckRegistry)
+    @patch('deck.Deck.get_virtual_decks')
+    def test_get_connected_unplugged(self, m_get_virtual_decks, m_registry):
+        """Deck.get_connected.unplugged"""
+        m_get_virtual_decks.return_value = []
+        self.m_dev_manager.enumerate.return_value = []
+        unplugged_deck = XLDeck('xl_id', session_id='sess_gone')
+        unplugged_deck._is_open = True
+        old_device = MagicMock()
+        Deck.sessions.register('sess_gone', 'xl_id', device=old_device)
+        self.addCleanup(Deck.sessions.remove, 'sess_gone')
+
+        self.assertEqual([], Deck.get_connected())
+
+        # The old handle (and its reader thread) is closed, rather than leaked
+        old_device.close.assert_called_once()
+        self.assertFalse(unplugged_deck._is_open)
+
+        self.assertNotIn('sess_gone', Deck.sessions)
+        self.assertIsNone(unplugged_deck.session_id)
+        self.assertEqual([], Deck.registry.get_active())
+
+    @patch('deck.Deck.registry', new_callable=DeckRegistry)
+    @patch('deck.Deck._virtual_decks_loaded', False)
+    @patch('deck.Deck.get_virtual_decks')
+    def test_get_active_decks(self, m_get_virtual_decks, m_registry):
+        """Deck.get_active_decks"""
+        virtual_deck = VirtualDeck('virtual', cols=2, rows=2)
+        m_get_virtual_decks.return_value = [virtual_deck]
+        connected_deck = XLDeck('xl_id', session_id='1_sess')
+        XLDeck('unplugged_id')
+
+        self.assertEqual([virtual_deck, connected_deck], Deck.get_active_decks())
+        self.assertEqual([virtual_deck, connected_deck], Deck.get_active_decks())
+
+        # No USB enumeration, and the database is only read once
+        self.m_dev_manager.enumerate.assert_not_called()
+        m_get_virtual_decks.assert_called_once()
+
+    @patch('deck.Deck.registry', new_callable=DeckRegistry)
+    @patch('deck.Deck._virtual_decks_loaded', True)
+    def test_get_active_by_id(self, m_registry):
+        """Deck.get_active_by_id"""
+        connected_deck = OriginalDeck('orig_id', session_id='1_sess')
+        unplugged_deck = OriginalDeck('unplugged_id')
+
+        self.assertIs(connected_deck, Deck.get_active_by_id('orig_id'))
+        self.assertIsNone(Deck.get_active_by_id('unplugged_id'))
+        self.m_dev_manager.enumerate.assert_not_called()
+
+    @patch('deck.Deck.registry', new_callable=DeckRegistry)
+    @patch('deck.Deck._virtual_decks_loaded', True)
+    def test_add_virtual_deck(self, m_registry):
+        """Deck.add_virtual_deck"""
+        virtual_deck = VirtualDeck('virtual', cols=2, rows=2)
+
+        Deck.add_virtual_deck(virtual_deck)
+
+        self.m_deck_dao_create.assert_called_with(virtual_deck)
+        self.assertIs(virtual_deck, Deck.get_active_by_id('virtual'))
+
     def test_get_instantiated_deck_by_session_id(self):
         """Deck.get_instantiated_deck_by_id"""
         deck1 = XLDeck('xl_id', session_id='1_sess')
@@ -256,6 +684,30 @@ class TestDeck(BaseStreamdeckXTest):
 
         self.assertEqual(deck2_from_inst, deck2)
 
+    def test_session_id_rebind(self):
+        """Deck.session_id.rebind"""
+        deck = XLDeck('xl_rebind', session_id='old_sess')
+
+        deck.session_id = 'new_sess'
+
+        self.assertIsNone(Deck._get_instantiated_deck_by_session_id('old_sess'))
+        self.assertIs(deck, Deck._get_instantiated_deck_by_session_id('new_sess'))
+
+        deck.session_id = None
+        self.assertIsNone(Deck._get_instantiated_deck_by_session_id('new_sess'))
+
+    def test_temporary_decks_not_retained(self):
+        """Deck.registry.temporary_decks_not_retained"""
+        import gc
+        from deck import VirtualDeck
+
+        for i in range(0, 20):
+            VirtualDeck('temp_virtual', cols=2, rows=2)
+
+        gc.collect()
+
+        self.assertIsNone(Deck.registry.get_by_id('temp_virtual'))
+
 
 class TestXLDeck(unittest.TestCase):
 
@@ -280,6 +732,50 @@ class TestXLDeck(unittest.TestCase):
 
         self.assertEqual(deck.html, f"<br/>{row}<br/>{row}<br/>{row}<br/>{row}")
 
+    @patch('button.Button.html', new_callable=PropertyMock)
+    def test_html_cached(self, m_button_html):
+        """XLDeck.html.cached"""
+        deck = XLDeck('xl_id')
+        m_button_html.return_value = 'BUTTON_HTML'
+
+        html = deck.html
+        self.assertIs(html, deck.html)
+
+        # Built once - the second read doesn't touch the buttons at all
+        self.assertEqual(32, m_button_html.call_count)
+
+    @patch('button.Button.html', new_callable=PropertyMock)
+    def test_html_invalidated(self, m_button_html):
+        """XLDeck.html.invalidated"""
+        deck = XLDeck('xl_id')
+        m_button_html.return_value = 'OLD'
+        _ = deck.html
+
+        m_button_html.return_value = 'NEW'
+        deck.buttons[3].invalidate_html()
+
+        self.assertIn('NEW', deck.html)
+
+    @patch('button.Button.html', new_callable=PropertyMock)
+    def test_html_buttons_replaced(self, m_button_html):
+        """XLDeck.html.buttons_replaced"""
+        deck = XLDeck('xl_id')
+        m_button_html.return_value = 'OLD'
+        _ = deck.html
+
+        m_button_html.return_value = 'NEW'
+        deck.populate_default_buttons()
+
+        self.assertNotIn('OLD', deck.html)
+
+    @patch('button.Button.invalidate_html')
+    def test_disconnect_invalidates_html(self, m_invalidate_html):
+        """XLDeck.disconnect.invalidates_html"""
+        deck = XLDeck('xl_id')
+        deck.disconnect()
+
+        self.assertEqual(32, m_invalidate_html.call_count)
+
 
 class TestOriginalDeck(unittest.TestCase):
 
@@ -294,6 +790,18 @@ class TestOriginalDeck(unittest.TestCase):
         self.assertEqual(deck.id, 'orig_id')
         self.assertEqual(len(deck.buttons), 15)
 
+    def test_init_no_buttons(self):
+        """OriginalDeck.__init__.no_buttons"""
+        deck = OriginalDeck('orig_id', populate_buttons=False)
+        self.assertEqual([], deck.buttons)
+
+    def test_populate_default_buttons(self):
+        """OriginalDeck.populate_default_buttons"""
+        deck = OriginalDeck('orig_id', populate_buttons=False)
+        deck.populate_default_buttons()
+
+        self.assertEqual(list(range(0, 15)), [button.position for button in deck.buttons])
+
     def test_str(self):
         """OriginalDeck.__str__"""
         deck = OriginalDeck('orig_id')
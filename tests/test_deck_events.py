@@ -0,0 +1,110 @@
+import json
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from deck_events import DeckEventBroadcaster
+
+
+class TestDeckEventBroadcaster(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.events = DeckEventBroadcaster(queue_size=4)
+
+    def test_subscribe(self):
+        """DeckEventBroadcaster.subscribe"""
+        subscription1 = self.events.subscribe('abc123')
+        self.events.subscribe('abc123')
+        self.events.subscribe('def456')
+
+        self.assertEqual('abc123', subscription1.deck_id)
+        self.assertEqual(2, self.events.subscriber_count('abc123'))
+        self.assertEqual(3, self.events.subscriber_count())
+
+    def test_unsubscribe(self):
+        """DeckEventBroadcaster.unsubscribe"""
+        subscription = self.events.subscribe('abc123')
+
+        self.events.unsubscribe(subscription)
+        # Unsubscribing twice is harmless
+        self.events.unsubscribe(subscription)
+
+        self.assertEqual(0, self.events.subscriber_count())
+
+    def test_publish(self):
+        """DeckEventBroadcaster.publish"""
+        subscription1 = self.events.subscribe('abc123')
+        subscription2 = self.events.subscribe('abc123')
+        other_deck = self.events.subscribe('def456')
+
+        message = self.events.publish('abc123', 'key', {'key': 3, 'pressed': True})
+
+        self.assertEqual('id: 1\nevent: key\ndata: {"key":3,"pressed":true}\n\n', message)
+        # The same serialized event goes to every subscriber of the deck
+        self.assertIs(message, subscription1.get(timeout=0))
+        self.assertIs(message, subscription2.get(timeout=0))
+        self.assertIsNone(other_deck.get(timeout=0))
+
+    def test_publish_no_subscribers(self):
+        """DeckEventBroadcaster.publish.no_subscribers"""
+        data = MagicMock()
+
+        self.assertIsNone(self.events.publish('abc123', 'image', data))
+
+        # Nobody is watching, so the data is never built
+        data.assert_not_called()
+        self.assertEqual(0, self.events.published)
+
+    def test_publish_callable(self):
+        """DeckEventBroadcaster.publish.callable"""
+        subscription = self.events.subscribe('abc123')
+        data = MagicMock(return_value={'key': 1})
+
+        self.events.publish('abc123', 'image', data)
+
+        data.assert_called_once()
+        self.assertIn('data: {"key":1}', subscription.get(timeout=0))
+
+    def test_publish_slow_subscriber(self):
+        """DeckEventBroadcaster.publish.slow_subscriber"""
+        slow = self.events.subscribe('abc123')
+        fast = self.events.subscribe('abc123')
+
+        # One more event than the queue holds
+        for key in range(0, 5):
+            self.events.publish('abc123', 'key', {'key': key, 'pressed': True})
+            self.assertIsNotNone(fast.get(timeout=0))
+
+        # Told to reload the deck, rather than being sent a partial history
+        self.assertEqual(DeckEventBroadcaster.RESYNC, slow.get(timeout=0))
+        self.assertEqual(1, slow.resyncs)
+        self.assertEqual(0, fast.resyncs)
+
+    def test_get_waits(self):
+        """DeckSubscription.get.waits"""
+        subscription = self.events.subscribe('abc123')
+
+        timer = threading.Timer(0.05, lambda: self.events.publish('abc123', 'key', {'key': 0, 'pressed': False}))
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        self.assertIn('event: key', subscription.get(timeout=5))
+
+    def test_get_timeout(self):
+        """DeckSubscription.get.timeout"""
+        subscription = self.events.subscribe('abc123')
+        self.assertIsNone(subscription.get(timeout=0.01))
+
+    def test_format_event(self):
+        """DeckEventBroadcaster.format_event"""
+        message = DeckEventBroadcaster.format_event(7, 'image', {'key': 2, 'hash': 'abc'})
+
+        lines = message.split('\n')
+        self.assertEqual('id: 7', lines[0])
+        self.assertEqual('event: image', lines[1])
+        self.assertEqual({'key': 2, 'hash': 'abc'}, json.loads(lines[2][len('data: '):]))
+        self.assertTrue(message.endswith('\n\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
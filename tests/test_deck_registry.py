@@ -0,0 +1,182 @@
+import gc
+import unittest
+
+from test_base import BaseStreamdeckXTest
+from deck_registry import DeckRegistry
+
+
+class FakeDeck:
+    """Minimal, weak-referenceable stand-in for a Deck"""
+
+    def __init__(self, deck_id, session_id=None):
+        self.id = deck_id
+        self.session_id = session_id
+
+
+class TestDeckRegistry(BaseStreamdeckXTest):
+
+    def test_add(self):
+        """DeckRegistry.add"""
+        registry = DeckRegistry()
+        deck = FakeDeck('abc123')
+
+        registry.add(deck)
+
+        self.assertIs(deck, registry.get_by_id('abc123'))
+        self.assertEqual(1, len(registry))
+
+    def test_add_replaces_unbound(self):
+        """DeckRegistry.add.replaces_unbound"""
+        registry = DeckRegistry()
+        deck1 = FakeDeck('abc123')
+        deck2 = FakeDeck('abc123')
+
+        registry.add(deck1)
+        registry.add(deck2)
+
+        self.assertIs(deck2, registry.get_by_id('abc123'))
+        self.assertEqual(1, len(registry))
+
+    def test_add_keeps_bound(self):
+        """DeckRegistry.add.keeps_bound"""
+        registry = DeckRegistry()
+        connected = FakeDeck('abc123', session_id='sess_1')
+        registry.bind_session(connected, 'sess_1')
+
+        temporary = FakeDeck('abc123')
+        registry.add(temporary)
+
+        self.assertIs(connected, registry.get_by_id('abc123'))
+
+    def test_unreferenced_decks_dropped(self):
+        """DeckRegistry.unreferenced_decks_dropped"""
+        registry = DeckRegistry()
+
+        for i in range(0, 100):
+            registry.add(FakeDeck(f'virtual_{i}'))
+
+        gc.collect()
+
+        self.assertEqual(0, len(registry))
+
+    def test_bound_decks_kept(self):
+        """DeckRegistry.bound_decks_kept"""
+        registry = DeckRegistry()
+        registry.bind_session(FakeDeck('abc123', session_id='sess_1'), 'sess_1')
+
+        gc.collect()
+
+        self.assertEqual('abc123', registry.get_by_session('sess_1').id)
+        self.assertEqual('abc123', registry.get_by_id('abc123').id)
+
+    def test_bind_session_rebind(self):
+        """DeckRegistry.bind_session.rebind"""
+        registry = DeckRegistry()
+        deck = FakeDeck('abc123', session_id='sess_1')
+        registry.bind_session(deck, 'sess_1')
+
+        deck.session_id = 'sess_2'
+        registry.bind_session(deck, 'sess_2', previous_session_id='sess_1')
+
+        self.assertIsNone(registry.get_by_session('sess_1'))
+        self.assertIs(deck, registry.get_by_session('sess_2'))
+
+    def test_bind_session_unbind(self):
+        """DeckRegistry.bind_session.unbind"""
+        registry = DeckRegistry()
+        deck = FakeDeck('abc123', session_id='sess_1')
+        registry.bind_session(deck, 'sess_1')
+
+        deck.session_id = None
+        registry.bind_session(deck, None, previous_session_id='sess_1')
+
+        self.assertIsNone(registry.get_by_session('sess_1'))
+        self.assertIs(deck, registry.get_by_id('abc123'))
+
+    def test_get_unknown(self):
+        """DeckRegistry.get.unknown"""
+        registry = DeckRegistry()
+
+        self.assertIsNone(registry.get_by_session('sess_1'))
+        self.assertIsNone(registry.get_by_id('abc123'))
+
+    def test_remove(self):
+        """DeckRegistry.remove"""
+        registry = DeckRegistry()
+        deck = FakeDeck('abc123', session_id='sess_1')
+        registry.bind_session(deck, 'sess_1')
+
+        registry.remove(deck)
+
+        self.assertIsNone(registry.get_by_session('sess_1'))
+        self.assertIsNone(registry.get_by_id('abc123'))
+
+    def test_remove_other_instance(self):
+        """DeckRegistry.remove.other_instance"""
+        registry = DeckRegistry()
+        deck = FakeDeck('abc123', session_id='sess_1')
+        registry.bind_session(deck, 'sess_1')
+
+        registry.remove(FakeDeck('abc123'))
+
+        self.assertIs(deck, registry.get_by_id('abc123'))
+
+    def test_pin(self):
+        """DeckRegistry.pin"""
+        registry = DeckRegistry()
+        registry.pin(FakeDeck('virtual'))
+
+        # Kept alive, even though nothing else refers to it
+        gc.collect()
+        self.assertIsNotNone(registry.get_active_by_id('virtual'))
+
+    def test_pin_not_replaced(self):
+        """DeckRegistry.pin.not_replaced"""
+        registry = DeckRegistry()
+        pinned = FakeDeck('virtual')
+        registry.pin(pinned)
+
+        temporary = FakeDeck('virtual')
+        registry.add(temporary)
+
+        self.assertIs(pinned, registry.get_by_id('virtual'))
+
+    def test_get_active(self):
+        """DeckRegistry.get_active"""
+        registry = DeckRegistry()
+        connected = FakeDeck('abc123', session_id='sess_1')
+        registry.bind_session(connected, 'sess_1')
+        virtual = FakeDeck('virtual')
+        registry.pin(virtual)
+        temporary = FakeDeck('def456')
+        registry.add(temporary)
+
+        self.assertEqual([virtual, connected], registry.get_active())
+
+    def test_get_active_by_id(self):
+        """DeckRegistry.get_active_by_id"""
+        registry = DeckRegistry()
+        connected = FakeDeck('abc123', session_id='sess_1')
+        registry.bind_session(connected, 'sess_1')
+        temporary = FakeDeck('def456')
+        registry.add(temporary)
+
+        self.assertIs(connected, registry.get_active_by_id('abc123'))
+        # Known, but neither connected nor pinned
+        self.assertIsNone(registry.get_active_by_id('def456'))
+        self.assertIsNone(registry.get_active_by_id('nope'))
+
+    def test_remove_pinned(self):
+        """DeckRegistry.remove.pinned"""
+        registry = DeckRegistry()
+        virtual = FakeDeck('virtual')
+        registry.pin(virtual)
+
+        registry.remove(virtual)
+
+        self.assertIsNone(registry.get_active_by_id('virtual'))
+        self.assertEqual([], registry.get_active())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,232 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, call, patch
+
+from test_base import BaseStreamdeckXTest
+from device_watcher import DeviceWatcher, FakeBackend, PollingBackend
+
+
+def make_device(session_id):
+    device = MagicMock()
+    device.id.return_value = session_id
+    return device
+
+
+class TestDeviceWatcher(BaseStreamdeckXTest):
+
+    def setUp(self):
+        self.on_added = MagicMock()
+        self.on_removed = MagicMock()
+        self.devices = []
+        self.backend = FakeBackend()
+        self.watcher = DeviceWatcher(self.on_added, self.on_removed, backend=self.backend,
+                                     enumerate_devices=lambda: list(self.devices),
+                                     min_poll_interval=1, max_poll_interval=8)
+
+    def test_check_added(self):
+        """DeviceWatcher.check.added"""
+        device1 = make_device('sess_1')
+        device2 = make_device('sess_2')
+        self.devices = [device1, device2]
+
+        self.assertTrue(self.watcher.check())
+
+        self.on_added.assert_has_calls([call(device1), call(device2)])
+        self.on_removed.assert_not_called()
+        self.assertEqual({'sess_1', 'sess_2'}, self.watcher.known_session_ids)
+
+    def test_check_unchanged(self):
+        """DeviceWatcher.check.unchanged"""
+        self.devices = [make_device('sess_1')]
+        self.watcher.check()
+        self.on_added.reset_mock()
+
+        self.assertFalse(self.watcher.check())
+
+        self.on_added.assert_not_called()
+        self.on_removed.assert_not_called()
+
+    def test_check_removed(self):
+        """DeviceWatcher.check.removed"""
+        self.devices = [make_device('sess_1'), make_device('sess_2')]
+        self.watcher.check()
+        self.on_added.reset_mock()
+
+        self.devices = [self.devices[1]]
+        self.assertTrue(self.watcher.check())
+
+        self.on_added.assert_not_called()
+        self.on_removed.assert_called_once_with('sess_1')
+        self.assertEqual({'sess_2'}, self.watcher.known_session_ids)
+
+    def test_check_new_handle(self):
+        """DeviceWatcher.check.new_handle"""
+        self.devices = [make_device('sess_1')]
+        self.watcher.check()
+        self.on_added.reset_mock()
+
+        # Every enumeration hands out new handles - that alone doesn't mean anything changed
+        self.devices = [make_device('sess_1')]
+        self.assertFalse(self.watcher.check())
+
+        self.on_added.assert_not_called()
+        self.on_removed.assert_not_called()
+
+    def test_check_replugged_same_path(self):
+        """DeviceWatcher.check.replugged_same_path"""
+        old_device = make_device('sess_1')
+        self.devices = [old_device]
+        self.watcher.check()
+        self.on_added.reset_mock()
+
+        # The StreamDeck library closed the old handle when reading from it failed
+        old_device.is_open.return_value = False
+        new_device = make_device('sess_1')
+        self.devices = [new_device]
+
+        self.assertTrue(self.watcher.check())
+
+        self.on_removed.assert_called_once_with('sess_1')
+        self.on_added.assert_called_once_with(new_device)
+        self.assertIs(new_device, self.watcher.known_devices['sess_1'])
+
+    def test_check_replugged_disconnected(self):
+        """DeviceWatcher.check.replugged_disconnected"""
+        old_device = make_device('sess_1')
+        self.devices = [old_device]
+        self.watcher.check()
+
+        old_device.connected.return_value = False
+        self.devices = [make_device('sess_1')]
+
+        self.assertTrue(self.watcher.check())
+        self.on_removed.assert_called_once_with('sess_1')
+
+    def test_is_alive(self):
+        """DeviceWatcher.is_alive"""
+        device = make_device('sess_1')
+        device.is_open.return_value = False
+
+        self.assertTrue(DeviceWatcher.is_alive(device))
+        self.assertFalse(DeviceWatcher.is_alive(device, opened=True))
+
+        device.connected.side_effect = IOError('Device unplugged')
+        self.assertFalse(DeviceWatcher.is_alive(device))
+
+    def test_is_alive_without_is_open(self):
+        """DeviceWatcher.is_alive.without_is_open"""
+        # Handles from StreamDeck library releases before 0.9 have no is_open()
+        device = MagicMock(spec=['id', 'connected', 'open', 'close'])
+        device.connected.return_value = True
+
+        self.assertTrue(DeviceWatcher.is_alive(device, opened=True))
+
+        device.connected.return_value = False
+        self.assertFalse(DeviceWatcher.is_alive(device, opened=True))
+
+    @patch('device_watcher.logging.exception')
+    def test_check_failed_setup_retried(self, m_log_exception):
+        """DeviceWatcher.check.failed_setup_retried"""
+        device = make_device('sess_1')
+        self.devices = [device]
+        self.on_added.side_effect = [IOError('Device busy'), None]
+
+        self.watcher.check()
+        self.assertEqual(set(), self.watcher.known_session_ids)
+        m_log_exception.assert_called()
+
+        self.watcher.check()
+        self.assertEqual({'sess_1'}, self.watcher.known_session_ids)
+        self.assertEqual(2, self.on_added.call_count)
+
+    def test_run_backoff(self):
+        """DeviceWatcher.run.backoff"""
+        intervals = []
+
+        def wait_for_event(timeout):
+            intervals.append(timeout)
+            if len(intervals) == 5:
+                self.watcher.stop()
+            return False
+
+        self.backend.wait_for_event = wait_for_event
+        self.watcher.run()
+
+        # Nothing changes, so the interval doubles up to the maximum
+        self.assertEqual([1, 2, 4, 8, 8], intervals)
+
+    def test_run_backoff_reset_on_event(self):
+        """DeviceWatcher.run.backoff_reset_on_event"""
+        intervals = []
+        events = [False, False, True, False]
+
+        def wait_for_event(timeout):
+            intervals.append(timeout)
+            if len(intervals) == len(events):
+                self.watcher.stop()
+            return events[len(intervals) - 1]
+
+        self.backend.wait_for_event = wait_for_event
+        self.watcher.run()
+
+        self.assertEqual([1, 2, 4, 1], intervals)
+
+    def test_run_hotplug(self):
+        """DeviceWatcher.run.hotplug"""
+        connected = threading.Event()
+        self.on_added.side_effect = lambda device: connected.set()
+
+        self.watcher.min_poll_interval = self.watcher.max_poll_interval = self.watcher.poll_interval = 60
+        thread = threading.Thread(target=self.watcher.run)
+        thread.start()
+
+        device = make_device('sess_1')
+        self.devices = [device]
+        self.backend.trigger()
+
+        # The event wakes the watcher long before its 60 second poll interval expires
+        self.assertTrue(connected.wait(5))
+        self.watcher.stop()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.on_added.assert_called_once_with(device)
+
+
+class TestPollingBackend(BaseStreamdeckXTest):
+
+    def test_wait_for_event(self):
+        """PollingBackend.wait_for_event"""
+        backend = PollingBackend()
+
+        self.assertFalse(backend.wait_for_event(0.01))
+
+    def test_wake(self):
+        """PollingBackend.wake"""
+        backend = PollingBackend()
+        backend.wake()
+
+        # Returns immediately, rather than waiting out the timeout
+        self.assertFalse(backend.wait_for_event(60))
+
+
+class TestFakeBackend(BaseStreamdeckXTest):
+
+    def test_trigger(self):
+        """FakeBackend.trigger"""
+        backend = FakeBackend()
+        backend.trigger()
+
+        self.assertTrue(backend.wait_for_event(60))
+        self.assertFalse(backend.wait_for_event(0.01))
+
+    def test_wake(self):
+        """FakeBackend.wake"""
+        backend = FakeBackend()
+        backend.wake()
+
+        self.assertFalse(backend.wait_for_event(60))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import threading
+import unittest
+from unittest.mock import MagicMock, patch, mock_open
+
+from test_base import BaseStreamdeckXTest
+from button_style import ButtonStyle
+from font_registry import FontRegistry
+
+ROBOTO_PATH = os.path.join(ButtonStyle.ASSETS_PATH, 'Roboto-Regular.ttf')
+
+
+class TestFontRegistry(BaseStreamdeckXTest):
+
+    def setUp(self) -> None:
+        FontRegistry.clear()
+        self.addCleanup(FontRegistry.clear)
+
+    def test_get_font(self):
+        """FontRegistry.get_font"""
+        font = FontRegistry.get_font(ROBOTO_PATH, 16)
+
+        self.assertEqual(16, font.size)
+
+    @patch('font_registry.ImageFont.truetype')
+    @patch('builtins.open', new_callable=mock_open, read_data=b'FONT')
+    def test_get_font_loaded_once(self, m_open, m_truetype):
+        """FontRegistry.get_font.loaded_once"""
+        font1 = FontRegistry.get_font('path/to/font.ttf', 16)
+        font2 = FontRegistry.get_font('path/to/font.ttf', 16)
+
+        self.assertIs(font1, font2)
+        m_open.assert_called_once_with('path/to/font.ttf', 'rb')
+        self.assertEqual(1, m_truetype.call_count)
+
+    @patch('font_registry.ImageFont.truetype')
+    @patch('builtins.open', new_callable=mock_open, read_data=b'FONT')
+    def test_get_font_new_size_reuses_file(self, m_open, m_truetype):
+        """FontRegistry.get_font.new_size_reuses_file"""
+        m_truetype.side_effect = [MagicMock(), MagicMock()]
+
+        font16 = FontRegistry.get_font('path/to/font.ttf', 16)
+        font24 = FontRegistry.get_font('path/to/font.ttf', 24)
+
+        self.assertIsNot(font16, font24)
+        m_open.assert_called_once_with('path/to/font.ttf', 'rb')
+        self.assertEqual(2, m_truetype.call_count)
+
+    @patch('font_registry.ImageFont.truetype')
+    @patch('builtins.open', new_callable=mock_open, read_data=b'FONT')
+    def test_get_font_threads(self, m_open, m_truetype):
+        """FontRegistry.get_font.threads"""
+        fonts = []
+        threads = [threading.Thread(target=lambda: fonts.append(FontRegistry.get_font('path/to/font.ttf', 16)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(8, len(fonts))
+        self.assertTrue(all(font is fonts[0] for font in fonts))
+        self.assertEqual(1, m_truetype.call_count)
+
+    def test_get_text_dimensions(self):
+        """FontRegistry.get_text_dimensions"""
+        font = FontRegistry.get_font(ROBOTO_PATH, 16)
+
+        short_width, short_height = FontRegistry.get_text_dimensions('a', font)
+        long_width, long_height = FontRegistry.get_text_dimensions('a much longer label', font)
+
+        self.assertGreater(short_width, 0)
+        self.assertGreater(short_height, 0)
+        self.assertGreater(long_width, short_width)
+
+    def test_get_text_dimensions_empty(self):
+        """FontRegistry.get_text_dimensions.empty"""
+        font = FontRegistry.get_font(ROBOTO_PATH, 16)
+
+        self.assertEqual(0, FontRegistry.get_text_dimensions('', font)[0])
+
+    def test_get_text_dimensions_memoized(self):
+        """FontRegistry.get_text_dimensions.memoized"""
+        font = MagicMock()
+        font.getmetrics.return_value = (12, 4)
+        font.getmask.return_value.getbbox.return_value = (0, 0, 30, 10)
+
+        self.assertEqual((30, 14), FontRegistry.get_text_dimensions('label', font))
+        self.assertEqual((30, 14), FontRegistry.get_text_dimensions('label', font))
+
+        font.getmask.assert_called_once_with('label')
+        font.getmetrics.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import io
+import unittest
+from unittest.mock import patch
+
+from PIL import Image
+
+from image_store import ImageStore, InvalidImageError
+
+
+def make_png(color='red', size=(8, 8)):
+    data = io.BytesIO()
+    Image.new('RGB', size, color).save(data, format='PNG')
+    return data.getvalue()
+
+
+class TestImageStore(unittest.TestCase):
+
+    def setUp(self) -> None:
+        get_by_id_patch = patch('image_store.ImageStore.image_dao.get_by_id')
+        self.m_get_by_id = get_by_id_patch.start()
+        self.addCleanup(get_by_id_patch.stop)
+
+        ImageStore.decoded_cache.clear()
+        self.addCleanup(ImageStore.decoded_cache.clear)
+
+    @patch('image_store.ImageStore.normalize')
+    @patch('image_store.ImageStore.image_dao.create')
+    def test_store(self, m_create, m_normalize):
+        """ImageStore.store"""
+        m_normalize.return_value = b'a small image'
+        m_create.return_value = 'abc123'
+
+        self.assertEqual('abc123', ImageStore.store(b'a large image'))
+        m_normalize.assert_called_with(b'a large image')
+        m_create.assert_called_once_with(b'a small image', original_hash=None)
+
+    @patch('image_store.ImageStore.normalize')
+    @patch('image_store.ImageStore.image_dao.create')
+    def test_store_keep_original(self, m_create, m_normalize):
+        """ImageStore.store.keep_original"""
+        m_normalize.return_value = b'a small image'
+        m_create.side_effect = ['original123', 'abc123']
+
+        self.assertEqual('abc123', ImageStore.store(b'a large image', keep_original=True))
+        m_create.assert_any_call(b'a large image')
+        m_create.assert_called_with(b'a small image', original_hash='original123')
+
+    def test_normalize(self):
+        """ImageStore.normalize"""
+        for image_format, mode, size in (('PNG', 'RGB', (4000, 3000)), ('JPEG', 'RGB', (640, 480)),
+                                         ('PNG', 'P', (16, 16)), ('PNG', 'RGBA', (100, 100))):
+            data = io.BytesIO()
+            Image.new(mode, size).save(data, format=image_format)
+
+            normalized = Image.open(io.BytesIO(ImageStore.normalize(data.getvalue())))
+
+            self.assertEqual('PNG', normalized.format)
+            self.assertEqual('RGBA', normalized.mode)
+            self.assertEqual(ImageStore.KEY_IMAGE_SIZE, normalized.size)
+
+    def test_normalize_invalid(self):
+        """ImageStore.normalize.invalid"""
+        with self.assertRaises(InvalidImageError):
+            ImageStore.normalize(b'not an image')
+
+    @patch('image_store.ImageStore.image_dao.get_original_hash')
+    def test_get_original_bytes(self, m_get_original_hash):
+        """ImageStore.get_original_bytes"""
+        m_get_original_hash.return_value = 'original123'
+        self.m_get_by_id.return_value = b'a large image'
+
+        self.assertEqual(b'a large image', ImageStore.get_original_bytes('abc123'))
+        self.m_get_by_id.assert_called_with('original123')
+
+    @patch('image_store.ImageStore.image_dao.get_original_hash')
+    def test_get_original_bytes_not_kept(self, m_get_original_hash):
+        """ImageStore.get_original_bytes.not_kept"""
+        m_get_original_hash.return_value = None
+        self.m_get_by_id.return_value = b'a small image'
+
+        self.assertEqual(b'a small image', ImageStore.get_original_bytes('abc123'))
+        self.m_get_by_id.assert_called_with('abc123')
+
+
+    def test_get_image(self):
+        """ImageStore.get_image"""
+        self.m_get_by_id.return_value = make_png()
+
+        image = ImageStore.get_image('abc123')
+
+        self.assertEqual('RGBA', image.mode)
+        # Not normalized when it was stored, so scaled now
+        self.assertEqual(ImageStore.KEY_IMAGE_SIZE, image.size)
+
+    def test_get_image_decoded_once(self):
+        """ImageStore.get_image.decoded_once"""
+        self.m_get_by_id.return_value = make_png()
+
+        image1 = ImageStore.get_image('abc123')
+        image2 = ImageStore.get_image('abc123')
+
+        self.assertIs(image1, image2)
+        self.m_get_by_id.assert_called_once_with('abc123')
+
+    def test_get_image_missing(self):
+        """ImageStore.get_image.missing"""
+        self.m_get_by_id.return_value = None
+
+        with self.assertLogs(level='WARNING'):
+            self.assertIsNone(ImageStore.get_image('abc123'))
+
+
+if __name__ == '__main__':
+    unittest.main()
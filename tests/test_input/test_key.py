@@ -1,7 +1,8 @@
+import json
 import unittest
 from unittest.mock import patch
 
-from input.key import Key, KeyGroup, pkey
+from input.key import Key, KeyGroup, KeyRegistry, KEYS, pkey
 
 
 class TestKey(unittest.TestCase):
@@ -178,3 +179,60 @@ class TestKeyGroup(unittest.TestCase):
 
 if __name__ == '__main__':
     unittest.main()
+
+
+class TestKeyRegistry(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.ctrl = Key('CTRL', pkey.ctrl)
+        self.enter = Key('ENTER', pkey.enter)
+        self.a = Key('a', 'a')
+        self.registry = KeyRegistry([KeyGroup('Special', [self.ctrl, self.enter]), KeyGroup('Alpha', [self.a])])
+
+    def test_init(self):
+        self.assertEqual(3, len(self.registry))
+        self.assertEqual((self.ctrl, self.enter, self.a), self.registry.keys)
+        self.assertEqual(2, len(self.registry.groups))
+
+    def test_immutable(self):
+        with self.assertRaises(TypeError):
+            self.registry.by_name['b'] = Key('b', 'b')
+
+    def test_get(self):
+        self.assertIs(self.ctrl, self.registry.get('CTRL'))
+        self.assertIs(self.a, self.registry.get('a'))
+
+    def test_get_case_insensitive(self):
+        self.assertIs(self.ctrl, self.registry.get('ctrl'))
+        self.assertIs(self.a, self.registry.get('A'))
+
+    def test_get_alias(self):
+        self.assertIs(self.ctrl, self.registry.get('Control'))
+        self.assertIs(self.enter, self.registry.get('RETURN'))
+
+    def test_get_alias_missing_key(self):
+        # DELETE isn't in this registry, so neither is its alias
+        self.assertIsNone(self.registry.get('DEL'))
+
+    def test_get_unknown(self):
+        self.assertIsNone(self.registry.get('NOPE'))
+        self.assertFalse('NOPE' in self.registry)
+
+    def test_get_group_name(self):
+        self.assertEqual('Special', self.registry.get_group_name('ENTER'))
+        self.assertEqual('Alpha', self.registry.get_group_name('A'))
+        self.assertIsNone(self.registry.get_group_name('NOPE'))
+
+    def test_json(self):
+        self.assertEqual({
+            'groups': [
+                {'keys': [{'value': 'CTRL'}, {'value': 'ENTER'}], 'name': 'Special'},
+                {'keys': [{'value': 'a'}], 'name': 'Alpha'}
+            ]
+        }, json.loads(self.registry.json))
+
+    def test_keys(self):
+        self.assertIn('F1', KEYS)
+        self.assertEqual('Function', KEYS.get_group_name('F1'))
+        self.assertEqual(len(Key.get_all_keys()), len(KEYS))
+
@@ -0,0 +1,156 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from key_writer import KeyImageWriter
+
+
+class TestKeyImageWriter(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.deck = MagicMock()
+        self.deck.id = 'abc123'
+        self.deck._is_open = True
+        self.deck.key_image_digests = {}
+        self.deck_interface = self.deck.deck_interface
+
+        self.writer = KeyImageWriter(self.deck, idle_timeout=0.5)
+
+    def _block_writes(self):
+        """Makes the device hang on its first write until the returned event is set"""
+        release = threading.Event()
+        writing = threading.Event()
+
+        def set_key_image(position, image):
+            writing.set()
+            release.wait(5)
+
+        self.deck_interface.set_key_image.side_effect = set_key_image
+        self.addCleanup(release.set)
+        return writing, release
+
+    def test_enqueue(self):
+        """KeyImageWriter.enqueue"""
+        self.writer.enqueue(3, b'image3')
+
+        self.assertTrue(self.writer.flush(timeout=5))
+        self.deck_interface.set_key_image.assert_called_once_with(3, b'image3')
+        self.assertEqual(1, self.writer.writes_sent)
+
+    def test_enqueue_returns_immediately(self):
+        """KeyImageWriter.enqueue.returns_immediately"""
+        writing, release = self._block_writes()
+
+        self.writer.enqueue(0, b'image0')
+        self.assertTrue(writing.wait(5))
+
+        # The device is still busy with the first write, but more writes can be queued without waiting for it
+        self.writer.enqueue(1, b'image1')
+        self.assertEqual(1, self.writer.pending_count)
+
+        release.set()
+        self.assertTrue(self.writer.flush(timeout=5))
+
+    def test_enqueue_coalesces(self):
+        """KeyImageWriter.enqueue.coalesces"""
+        writing, release = self._block_writes()
+        self.writer.enqueue(0, b'first')
+        self.assertTrue(writing.wait(5))
+
+        for label in ('a', 'b', 'c'):
+            self.writer.enqueue(5, f'image5{label}'.encode())
+        self.writer.enqueue(2, b'image2')
+
+        self.deck_interface.set_key_image.side_effect = None
+        release.set()
+        self.assertTrue(self.writer.flush(timeout=5))
+
+        # Only the latest image for each key is written, in key order
+        self.assertEqual([(0, b'first'), (2, b'image2'), (5, b'image5c')],
+                         [c.args for c in self.deck_interface.set_key_image.call_args_list])
+        self.assertEqual(5, self.writer.writes_requested)
+        self.assertEqual(3, self.writer.writes_sent)
+
+    def test_write(self):
+        """KeyImageWriter._write"""
+        self.writer._write({1: b'image1', 0: b'image0'})
+
+        # Opening & closing the device is left to the deck
+        self.deck.open.assert_not_called()
+        self.deck.close.assert_not_called()
+        self.assertEqual([(0, b'image0'), (1, b'image1')],
+                         [c.args for c in self.deck_interface.set_key_image.call_args_list])
+
+    def test_write_not_open(self):
+        """KeyImageWriter._write.not_open"""
+        self.deck._is_open = False
+        self.deck.key_image_digests.update({0: 'digest0', 1: 'digest1'})
+
+        self.writer._write({0: b'image0'})
+
+        self.deck.open.assert_not_called()
+        self.deck_interface.set_key_image.assert_not_called()
+        # Sent again by the next update
+        self.assertEqual({1: 'digest1'}, self.deck.key_image_digests)
+
+    def test_write_error(self):
+        """KeyImageWriter._run.write_error"""
+        self.deck_interface.set_key_image.side_effect = IOError('Device unplugged')
+        self.deck.key_image_digests[0] = 'digest0'
+
+        with self.assertLogs(level='WARNING'):
+            self.writer.enqueue(0, b'image0')
+            self.assertTrue(self.writer.flush(timeout=5))
+
+        # Sent again by the next update
+        self.assertNotIn(0, self.deck.key_image_digests)
+
+        # The writer keeps going
+        self.deck_interface.set_key_image.side_effect = None
+        self.writer.enqueue(1, b'image1')
+        self.assertTrue(self.writer.flush(timeout=5))
+        self.deck_interface.set_key_image.assert_called_with(1, b'image1')
+
+    def test_write_error_mid_batch(self):
+        """KeyImageWriter._write.error_mid_batch"""
+        self.deck_interface.set_key_image.side_effect = [None, IOError('Device unplugged')]
+        self.deck.key_image_digests.update({0: 'digest0', 1: 'digest1', 2: 'digest2'})
+
+        with self.assertRaises(IOError):
+            self.writer._write({0: b'image0', 1: b'image1', 2: b'image2'})
+
+        # Only key 0 was written
+        self.assertEqual({0: 'digest0'}, self.deck.key_image_digests)
+        self.assertEqual(1, self.writer.writes_sent)
+
+    def test_clear(self):
+        """KeyImageWriter.clear"""
+        writing, release = self._block_writes()
+        self.writer.enqueue(0, b'image0')
+        self.assertTrue(writing.wait(5))
+
+        self.writer.enqueue(1, b'image1')
+        self.writer.clear()
+        release.set()
+        self.assertTrue(self.writer.flush(timeout=5))
+
+        self.assertEqual(0, self.writer.pending_count)
+        self.assertEqual(1, self.deck_interface.set_key_image.call_count)
+
+    def test_idle_thread_exits(self):
+        """KeyImageWriter._run.idle_thread_exits"""
+        self.writer.enqueue(0, b'image0')
+        thread = self.writer._thread
+        self.assertTrue(self.writer.flush(timeout=5))
+
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+        # A new thread picks up later writes
+        self.writer.enqueue(1, b'image1')
+        self.assertTrue(self.writer.flush(timeout=5))
+        self.deck_interface.set_key_image.assert_called_with(1, b'image1')
+
+
+if __name__ == '__main__':
+    unittest.main()
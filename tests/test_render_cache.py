@@ -0,0 +1,123 @@
+import unittest
+from unittest.mock import MagicMock
+
+from test_base import BaseStreamdeckXTest
+from render_cache import RenderCache
+
+
+class TestRenderCache(BaseStreamdeckXTest):
+
+    def test_init(self):
+        """RenderCache.__init__"""
+        cache = RenderCache(max_bytes=1024)
+
+        self.assertEqual(1024, cache.max_bytes)
+        self.assertEqual(0, len(cache))
+        self.assertEqual(0, cache.current_bytes)
+
+    def test_get_miss(self):
+        """RenderCache.get.miss"""
+        cache = RenderCache()
+
+        self.assertIsNone(cache.get('abc'))
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(0, cache.hits)
+
+    def test_get_hit(self):
+        """RenderCache.get.hit"""
+        cache = RenderCache()
+        value = MagicMock()
+        cache.put('abc', value, 10)
+
+        self.assertEqual(value, cache.get('abc'))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(0, cache.misses)
+        self.assertEqual(10, cache.current_bytes)
+
+    def test_put_replace(self):
+        """RenderCache.put.replace"""
+        cache = RenderCache()
+        cache.put('abc', 'old', 10)
+        cache.put('abc', 'new', 20)
+
+        self.assertEqual('new', cache.get('abc'))
+        self.assertEqual(1, len(cache))
+        self.assertEqual(20, cache.current_bytes)
+
+    def test_put_evicts_least_recently_used(self):
+        """RenderCache.put.evicts_least_recently_used"""
+        cache = RenderCache(max_bytes=30)
+        cache.put('a', 'A', 10)
+        cache.put('b', 'B', 10)
+        cache.put('c', 'C', 10)
+
+        # Touch 'a' so that 'b' becomes the least-recently used
+        cache.get('a')
+        cache.put('d', 'D', 10)
+
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertIn('d', cache)
+        self.assertEqual(1, cache.evictions)
+        self.assertEqual(30, cache.current_bytes)
+
+    def test_put_too_large(self):
+        """RenderCache.put.too_large"""
+        cache = RenderCache(max_bytes=30)
+        cache.put('a', 'A', 10)
+        cache.put('huge', 'HUGE', 31)
+
+        self.assertNotIn('huge', cache)
+        self.assertIn('a', cache)
+        self.assertEqual(0, cache.evictions)
+
+    def test_set_max_bytes(self):
+        """RenderCache.set_max_bytes"""
+        cache = RenderCache(max_bytes=30)
+        cache.put('a', 'A', 10)
+        cache.put('b', 'B', 10)
+        cache.put('c', 'C', 10)
+
+        cache.set_max_bytes(15)
+
+        self.assertEqual(['c'], [key for key in ('a', 'b', 'c') if key in cache])
+        self.assertEqual(2, cache.evictions)
+        self.assertEqual(10, cache.current_bytes)
+
+    def test_clear(self):
+        """RenderCache.clear"""
+        cache = RenderCache()
+        cache.put('a', 'A', 10)
+        cache.get('a')
+        cache.get('b')
+
+        cache.clear()
+
+        self.assertEqual(0, len(cache))
+        self.assertEqual({'entries': 0, 'bytes': 0, 'max_bytes': RenderCache.DEFAULT_MAX_BYTES, 'hits': 0,
+                          'misses': 0, 'evictions': 0, 'hit_rate': 0.0}, cache.stats())
+
+    def test_stats(self):
+        """RenderCache.stats"""
+        cache = RenderCache(max_bytes=100)
+        cache.put('a', 'A', 10)
+        cache.get('a')
+        cache.get('a')
+        cache.get('a')
+        cache.get('b')
+
+        self.assertEqual({'entries': 1, 'bytes': 10, 'max_bytes': 100, 'hits': 3, 'misses': 1, 'evictions': 0,
+                          'hit_rate': 0.75}, cache.stats())
+
+    def test_image_size(self):
+        """RenderCache.image_size"""
+        image = MagicMock()
+        image.size = (96, 72)
+        image.getbands.return_value = ('R', 'G', 'B')
+
+        self.assertEqual(96 * 72 * 3, RenderCache.image_size(image))
+
+
+if __name__ == '__main__':
+    unittest.main()
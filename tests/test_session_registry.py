@@ -0,0 +1,125 @@
+import unittest
+
+from test_base import BaseStreamdeckXTest
+from session_registry import SessionRegistry
+
+
+class TestSessionRegistry(BaseStreamdeckXTest):
+
+    def test_register(self):
+        """SessionRegistry.register"""
+        registry = SessionRegistry()
+        registry.register('sess_1', 'abc123')
+
+        self.assertIn('sess_1', registry)
+        self.assertEqual(1, len(registry))
+        self.assertEqual('abc123', registry.get_serial('sess_1'))
+        self.assertEqual('sess_1', registry.get_session('abc123'))
+
+    def test_register_repeatedly(self):
+        """SessionRegistry.register.repeatedly"""
+        registry = SessionRegistry()
+
+        for _ in range(0, 1000):
+            registry.register('sess_1', 'abc123')
+
+        self.assertEqual(1, len(registry))
+
+    def test_register_new_session_for_serial(self):
+        """SessionRegistry.register.new_session_for_serial"""
+        registry = SessionRegistry()
+        registry.register('sess_1', 'abc123')
+        registry.register('sess_2', 'abc123')
+
+        self.assertNotIn('sess_1', registry)
+        self.assertIsNone(registry.get_serial('sess_1'))
+        self.assertEqual('sess_2', registry.get_session('abc123'))
+        self.assertEqual(1, len(registry))
+
+    def test_register_new_serial_for_session(self):
+        """SessionRegistry.register.new_serial_for_session"""
+        registry = SessionRegistry()
+        registry.register('sess_1', 'abc123')
+        registry.register('sess_1', 'def456')
+
+        self.assertIsNone(registry.get_session('abc123'))
+        self.assertEqual('def456', registry.get_serial('sess_1'))
+        self.assertEqual(1, len(registry))
+
+    def test_register_device(self):
+        """SessionRegistry.register.device"""
+        registry = SessionRegistry()
+        device = object()
+        registry.register('sess_1', 'abc123', device=device)
+
+        self.assertIs(device, registry.get_device('abc123'))
+
+    def test_register_new_device_for_serial(self):
+        """SessionRegistry.register.new_device_for_serial"""
+        registry = SessionRegistry()
+        old_device = object()
+        new_device = object()
+        registry.register('sess_1', 'abc123', device=old_device)
+        registry.register('sess_2', 'abc123', device=new_device)
+
+        self.assertIs(new_device, registry.get_device('abc123'))
+
+    def test_register_without_device(self):
+        """SessionRegistry.register.without_device"""
+        registry = SessionRegistry()
+        registry.register('sess_1', 'abc123', device=object())
+        registry.register('sess_1', 'abc123')
+
+        self.assertIsNone(registry.get_device('abc123'))
+
+    def test_get_unknown(self):
+        """SessionRegistry.get.unknown"""
+        registry = SessionRegistry()
+
+        self.assertIsNone(registry.get_serial('sess_1'))
+        self.assertIsNone(registry.get_session('abc123'))
+        self.assertIsNone(registry.get_device('abc123'))
+
+    def test_remove(self):
+        """SessionRegistry.remove"""
+        registry = SessionRegistry()
+        registry.register('sess_1', 'abc123', device=object())
+        registry.register('sess_2', 'def456')
+
+        registry.remove('sess_1')
+        registry.remove('not_a_session')
+
+        self.assertNotIn('sess_1', registry)
+        self.assertIsNone(registry.get_session('abc123'))
+        self.assertIsNone(registry.get_device('abc123'))
+        self.assertEqual('def456', registry.get_serial('sess_2'))
+
+    def test_get_stale(self):
+        """SessionRegistry.get_stale"""
+        registry = SessionRegistry()
+        device = object()
+        registry.register('sess_1', 'abc123', device=device)
+        registry.register('sess_2', 'def456')
+        registry.register('sess_3', 'ghi789')
+
+        stale = registry.get_stale(['sess_2', 'sess_4'])
+
+        self.assertEqual({'sess_1', 'sess_3'}, set(stale))
+        # Still there, until removed
+        self.assertEqual(3, len(registry))
+        self.assertIs(device, registry.get_device('abc123'))
+
+    def test_clear(self):
+        """SessionRegistry.clear"""
+        registry = SessionRegistry()
+        registry.register('sess_1', 'abc123', device=object())
+
+        registry.clear()
+
+        self.assertEqual(0, len(registry))
+        self.assertIsNone(registry.get_session('abc123'))
+        self.assertIsNone(registry.get_device('abc123'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 import io
 import unittest
-from unittest.mock import patch, MagicMock, mock_open
+from unittest.mock import patch, MagicMock, PropertyMock, mock_open
 
 from action import MultiKeyPressAction, TextAction, DelayAction
 from test_base import BaseStreamdeckXTest
@@ -12,9 +12,21 @@ from deck import NoSuchDeckException
 class TestStreamdeckX(BaseStreamdeckXTest):
 
     def setUp(self) -> None:
-        get_conn_patch = patch('deck.Deck.get_connected')
-        self.m_get_connected = get_conn_patch.start()
-        self.addCleanup(get_conn_patch.stop)
+        get_active_patch = patch('deck.Deck.get_active_decks')
+        self.m_get_active_decks = get_active_patch.start()
+        self.addCleanup(get_active_patch.stop)
+
+        # Looks decks up in whatever get_active_decks returns
+        get_active_by_id_patch = patch('deck.Deck.get_active_by_id', side_effect=lambda deck_id: next(
+            (deck for deck in self.m_get_active_decks.return_value if deck.id == deck_id), None))
+        self.m_get_active_by_id = get_active_by_id_patch.start()
+        self.addCleanup(get_active_by_id_patch.stop)
+
+        # Requests must never enumerate USB devices
+        device_manager_patch = patch('deck.DeviceManager')
+        self.m_device_manager = device_manager_patch.start()
+        self.addCleanup(device_manager_patch.stop)
+        self.addCleanup(lambda: self.m_device_manager.assert_not_called())
 
         # Testing Flask App setup
         streamdeckx.app.testing = True
@@ -34,19 +46,28 @@ class TestStreamdeckX(BaseStreamdeckXTest):
         deck1 = MagicMock()
         deck2 = MagicMock()
 
-        self.m_get_connected.return_value = [deck1, deck2]
+        self.m_get_active_decks.return_value = [deck1, deck2]
 
         decks = streamdeckx._get_connected_decks()
 
         self.assertEqual([deck1, deck2], decks)
 
+    def test_get_cache_stats(self):
+        response = self.app.get('/api/v1/cacheStats')
+
+        self.assertEqual(200, response.status_code)
+        stats = response.get_json()
+        self.assertEqual({'renderedImages', 'nativeImages', 'pngImages', 'backgroundImages'}, set(stats.keys()))
+        self.assertIn('hit_rate', stats['nativeImages'])
+        self.assertIn('bytes', stats['nativeImages'])
+
     def test_get_deck_by_id(self):
         deck1 = MagicMock()
         deck1.id = 'def456'
         deck2 = MagicMock()
         deck2.id = 'abc123'
 
-        self.m_get_connected.return_value = [deck1, deck2]
+        self.m_get_active_decks.return_value = [deck1, deck2]
 
         deck = streamdeckx._get_deck_by_id('abc123')
 
@@ -58,7 +79,7 @@ class TestStreamdeckX(BaseStreamdeckXTest):
         deck2 = MagicMock()
         deck2.id = 'abc123'
 
-        self.m_get_connected.return_value = [deck1, deck2]
+        self.m_get_active_decks.return_value = [deck1, deck2]
 
         self.assertRaises(NoSuchDeckException, streamdeckx._get_deck_by_id, 'john')
         self.m_log_warn.assert_not_called()
@@ -69,7 +90,7 @@ class TestStreamdeckX(BaseStreamdeckXTest):
         deck2 = MagicMock()
         deck2.id = 'abc123'
 
-        self.m_get_connected.return_value = [deck1, deck2]
+        self.m_get_active_decks.return_value = [deck1, deck2]
 
         response = streamdeckx._get_deck_by_id('john', raise_exception=False)
         self.assertIsNone(response)
@@ -80,25 +101,25 @@ class TestStreamdeckX(BaseStreamdeckXTest):
         deck = MagicMock()
         deck.html = '<p>Deck HTML</p>'
 
-        self.m_get_connected.return_value = [deck]
+        self.m_get_active_decks.return_value = [deck]
         self.m_render_template.return_value = b'INDEX HTML'
 
         response = self.app.get('/')
 
         self.assertEqual(b'INDEX HTML', response.data)
 
-        self.m_get_connected.assert_called()
+        self.m_get_active_decks.assert_called()
         self.m_render_template.assert_called_with('index.html', connected_decks=[deck], curr_deck_html='<p>Deck HTML</p>')
 
     def test_index_no_deck(self):
-        self.m_get_connected.return_value = []
+        self.m_get_active_decks.return_value = []
         self.m_render_template.return_value = b'INDEX HTML'
 
         response = self.app.get('/')
 
         self.assertEqual(b'INDEX HTML', response.data)
 
-        self.m_get_connected.assert_called()
+        self.m_get_active_decks.assert_called()
         self.m_render_template.assert_called_with('index.html', connected_decks=[], curr_deck_html='')
 
     def test_get_config_html_no_deck(self):
@@ -107,7 +128,7 @@ class TestStreamdeckX(BaseStreamdeckXTest):
         deck2 = MagicMock()
         deck2.id = 'abc123'
 
-        self.m_get_connected.return_value = [deck1, deck2]
+        self.m_get_active_decks.return_value = [deck1, deck2]
 
         with self.assertRaises(NoSuchDeckException):
             response = self.app.get('/configHtml?deckId=ghi789&button=27')
@@ -124,7 +145,7 @@ class TestStreamdeckX(BaseStreamdeckXTest):
 
         deck2.buttons = [button0, button1]
 
-        self.m_get_connected.return_value = [deck1, deck2]
+        self.m_get_active_decks.return_value = [deck1, deck2]
         html = 'BUTTON HTML'
         self.m_render_template.return_value = html
 
@@ -132,14 +153,14 @@ class TestStreamdeckX(BaseStreamdeckXTest):
 
         self.assertEqual(html.encode('utf-8'), response.data)
 
-        self.m_get_connected.assert_called()
+        self.m_get_active_by_id.assert_called()
         self.m_render_template.assert_called_with('configuration.html', button=button1)
 
     def test_set_button_config_no_deck(self):
         deck1 = MagicMock()
         deck1.id = 'abc123'
 
-        self.m_get_connected.return_value = [deck1]
+        self.m_get_active_decks.return_value = [deck1]
 
         with self.assertRaises(NoSuchDeckException):
             response = self.app.post('/setButtonConfig', data={
@@ -153,7 +174,7 @@ class TestStreamdeckX(BaseStreamdeckXTest):
 
             self.assertEqual(500, response._status_code)
 
-        self.m_get_connected.assert_called()
+        self.m_get_active_by_id.assert_called()
 
     @patch('button.Button.set_text')
     def test_set_button_config_no_background_image(self, m_btn_set_text):
@@ -162,13 +183,11 @@ class TestStreamdeckX(BaseStreamdeckXTest):
 
         button0 = MagicMock()
         button1 = MagicMock()
-        button_image = MagicMock()
-        button_image.image_bytes = b'an image!'
-        button1.button_image = button_image
+        button1.image_url = '/api/v1/decks/abc123/keys/1.png?v=def'
 
         deck1.buttons = [button0, button1]
 
-        self.m_get_connected.return_value = [deck1]
+        self.m_get_active_decks.return_value = [deck1]
 
         response = self.app.post('/setButtonConfig', data={
             'deckId': 'abc123',
@@ -179,34 +198,28 @@ class TestStreamdeckX(BaseStreamdeckXTest):
             'fontSize': '24'
         })
 
-        self.assertEqual(b'an image!', response.data)
+        self.assertEqual(b'/api/v1/decks/abc123/keys/1.png?v=def', response.data)
 
-        self.m_get_connected.assert_called()
+        self.m_get_active_by_id.assert_called()
         button1.set_text.assert_called_with('Hello')
         button1.set_colors.assert_called_with('#000000', '#008080')
         button1.set_font_size.assert_called_with(24)
 
     @patch('os.remove')
-    @patch('base64.b64encode')
-    @patch('builtins.open', new_callable=mock_open, read_data='1')
+    @patch('builtins.open', new_callable=mock_open)
     @patch('werkzeug.datastructures.FileStorage.save')
     @patch('os.mkdir')
-    @patch('os.path.exists')
-    def test_set_button_config_with_background_image(self, m_path_exists, m_mkdir, m_fs_save, m_open, m_b64_encode, m_os_rm):
+    def test_set_button_config_with_background_image(self, m_mkdir, m_fs_save, m_open, m_os_rm):
         deck1 = MagicMock()
         deck1.id = 'abc123'
 
         button0 = MagicMock()
         button1 = MagicMock()
-        button_image = MagicMock()
-        button_image.image_bytes = b'an image!'
-        button1.button_image = button_image
+        button1.image_url = '/api/v1/decks/abc123/keys/1.png?v=def'
 
         deck1.buttons = [button0, button1]
 
-        m_path_exists.return_value = False
-
-        self.m_get_connected.return_value = [deck1]
+        self.m_get_active_decks.return_value = [deck1]
 
         data = {
             'deckId': 'abc123',
@@ -220,18 +233,116 @@ class TestStreamdeckX(BaseStreamdeckXTest):
 
         response = self.app.post('/setButtonConfig', data=data, content_type='multipart/form-data')
 
-        m_path_exists.assert_called_with('temp_images')
-        m_mkdir.assert_called_with('temp_images')
+        button1.set_background_image.assert_called_with(b'abcdef', keep_original=False)
+
+        # Nothing touches the filesystem
+        m_mkdir.assert_not_called()
+        m_fs_save.assert_not_called()
+        m_open.assert_not_called()
+        m_os_rm.assert_not_called()
+
+        self.assertEqual(b'/api/v1/decks/abc123/keys/1.png?v=def', response.data)
+
+    def test_set_button_config_background_image_too_large(self):
+        deck1 = MagicMock()
+        deck1.id = 'abc123'
+        button1 = MagicMock()
+        deck1.buttons = [MagicMock(), button1]
+
+        self.m_get_active_decks.return_value = [deck1]
 
-        m_fs_save.assert_called_with('temp_images/temp_image.jpg')
-        m_open.assert_called_with('temp_images/temp_image.jpg', 'rb')
-        m_b64_encode.assert_called()
-        m_os_rm.assert_called()
+        data = {
+            'deckId': 'abc123',
+            'button': '1',
+            'buttonText': 'Hello',
+            'backgroundColor': '#008080',
+            'textColor': '#000000',
+            'fontSize': '24',
+            'backgroundImage': (io.BytesIO(b'0' * (streamdeckx.MAX_UPLOAD_BYTES + 1)), 'test.jpg')
+        }
+
+        response = self.app.post('/setButtonConfig', data=data, content_type='multipart/form-data')
+
+        self.assertEqual(413, response.status_code)
+        button1.set_background_image.assert_not_called()
+
+    @patch('button.Button._style_changed')
+    @patch('dao.button_dao.ButtonDao.update')
+    def test_set_button_config_concurrency_policy(self, m_update_button, m_style_changed):
+        from action_executor import ConcurrencyPolicy
+
+        deck1 = MagicMock()
+        deck1.id = 'abc123'
+        button0 = Button(0, deck1)
+        deck1.buttons = [button0]
+
+        self.m_get_active_decks.return_value = [deck1]
+
+        response = self.app.post('/setButtonConfig', data={
+            'deckId': 'abc123',
+            'button': '0',
+            'buttonText': 'Hello',
+            'backgroundColor': '#008080',
+            'textColor': '#000000',
+            'fontSize': '24',
+            'concurrencyPolicy': 'RESTART'
+        })
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(ConcurrencyPolicy.RESTART, button0.concurrency_policy)
+        m_update_button.assert_called_with(button0)
+
+    @patch('dao.button_dao.ButtonDao.update')
+    def test_set_button_config_unknown_concurrency_policy(self, m_update_button):
+        deck1 = MagicMock()
+        deck1.id = 'abc123'
+        deck1.buttons = [Button(0, deck1)]
 
-        self.assertEqual(b'an image!', response.data)
+        self.m_get_active_decks.return_value = [deck1]
+
+        response = self.app.post('/setButtonConfig', data={
+            'deckId': 'abc123',
+            'button': '0',
+            'buttonText': 'Hello',
+            'backgroundColor': '#008080',
+            'textColor': '#000000',
+            'fontSize': '24',
+            'concurrencyPolicy': 'SOMETIMES'
+        })
+
+        self.assertEqual(400, response.status_code)
+        m_update_button.assert_not_called()
+
+    @patch('dao.button_dao.ButtonDao.update')
+    def test_set_button_config_background_image_invalid(self, m_update_button):
+        deck1 = MagicMock()
+        deck1.id = 'abc123'
+        button1 = Button(1, deck1)
+        deck1.buttons = [Button(0, deck1), button1]
+
+        self.m_get_active_decks.return_value = [deck1]
+
+        data = {
+            'deckId': 'abc123',
+            'button': '1',
+            'buttonText': 'Hello',
+            'backgroundColor': '#008080',
+            'textColor': '#000000',
+            'fontSize': '24',
+            'backgroundImage': (io.BytesIO(b'not an image'), 'test.jpg')
+        }
+
+        response = self.app.post('/setButtonConfig', data=data, content_type='multipart/form-data')
+
+        self.assertEqual(400, response.status_code)
+        self.assertIn(b'test.jpg is not a supported image', response.data)
+        # Nothing about the button is changed
+        self.assertIsNone(button1.style.background_image)
+        self.assertNotEqual('Hello', button1.style.label)
+        m_update_button.assert_not_called()
 
     def test_set_button_action_no_deck(self):
-        self.m_get_connected.return_value = []
+        self.m_get_active_decks.return_value = []
 
         with self.assertRaises(NoSuchDeckException):
             response = self.app.post('/setButtonAction', data={
@@ -243,7 +354,7 @@ class TestStreamdeckX(BaseStreamdeckXTest):
 
             self.assertEqual(500, response._status_code)
 
-        self.m_get_connected.assert_called()
+        self.m_get_active_by_id.assert_called()
 
     @patch('dao.action_dao.ActionDao.create')
     def test_set_button_action_text(self, m_create_action):
@@ -255,7 +366,7 @@ class TestStreamdeckX(BaseStreamdeckXTest):
 
         deck1.buttons = [button0, button1]
 
-        self.m_get_connected.return_value = [deck1]
+        self.m_get_active_decks.return_value = [deck1]
 
         self.app.post('/setButtonAction', data={
             'deckId': 'abc123',
@@ -267,7 +378,7 @@ class TestStreamdeckX(BaseStreamdeckXTest):
         self.assertEqual(1, len(button1.actions))
         self.assertTrue(isinstance(button1.actions[0], TextAction))
 
-        self.m_get_connected.assert_called()
+        self.m_get_active_by_id.assert_called()
         m_create_action.assert_called()
 
     @patch('dao.action_dao.ActionDao.create')
@@ -280,7 +391,7 @@ class TestStreamdeckX(BaseStreamdeckXTest):
 
         deck1.buttons = [button0, button1]
 
-        self.m_get_connected.return_value = [deck1]
+        self.m_get_active_decks.return_value = [deck1]
 
         self.app.post('/setButtonAction', data={
             'deckId': 'abc123',
@@ -294,7 +405,7 @@ class TestStreamdeckX(BaseStreamdeckXTest):
         self.assertTrue(isinstance(button1.actions[0], MultiKeyPressAction))
         self.assertEqual('CTRL', button1.actions[0].keys[0].name)
 
-        self.m_get_connected.assert_called()
+        self.m_get_active_by_id.assert_called()
         m_create_action.assert_called()
 
     @patch('dao.action_dao.ActionDao.create')
@@ -307,7 +418,7 @@ class TestStreamdeckX(BaseStreamdeckXTest):
 
         deck1.buttons = [button0, button1]
 
-        self.m_get_connected.return_value = [deck1]
+        self.m_get_active_decks.return_value = [deck1]
 
         self.app.post('/setButtonAction', data={
             'deckId': 'abc123',
@@ -321,9 +432,29 @@ class TestStreamdeckX(BaseStreamdeckXTest):
         self.assertTrue(isinstance(button1.actions[0], DelayAction))
         self.assertEqual(12, button1.actions[0].delay_time)
 
-        self.m_get_connected.assert_called()
+        self.m_get_active_by_id.assert_called()
         m_create_action.assert_called()
 
+    @patch('dao.action_dao.ActionDao.create')
+    def test_set_button_action_delay_invalid(self, m_create_action):
+        deck1 = MagicMock()
+        deck1.id = 'abc123'
+        deck1.buttons = [Button(0, deck1)]
+
+        self.m_get_active_decks.return_value = [deck1]
+
+        response = self.app.post('/setButtonAction', data={
+            'deckId': 'abc123',
+            'button': '0',
+            'action_text': 'inf',
+            'type': 'DELAY'
+        })
+
+        self.assertEqual(400, response.status_code)
+        self.assertIn(b'Invalid delay', response.data)
+        self.assertEqual(0, len(deck1.buttons[0].actions))
+        m_create_action.assert_not_called()
+
     @patch('dao.action_dao.ActionDao.create')
     def test_set_button_action_unsupported(self, m_create_action):
         deck1 = MagicMock()
@@ -334,7 +465,7 @@ class TestStreamdeckX(BaseStreamdeckXTest):
 
         deck1.buttons = [button0, button1]
 
-        self.m_get_connected.return_value = [deck1]
+        self.m_get_active_decks.return_value = [deck1]
 
         with self.assertRaises(Exception):
             self.app.post('/setButtonAction', data={
@@ -346,11 +477,66 @@ class TestStreamdeckX(BaseStreamdeckXTest):
 
         self.assertEqual(0, len(button1.actions))
 
-        self.m_get_connected.assert_called()
+        self.m_get_active_by_id.assert_called()
         m_create_action.assert_not_called()
 
+    @patch('action_executor.ActionExecutor.cancel')
+    def test_cancel_button_actions(self, m_cancel):
+        deck1 = MagicMock()
+        deck1.id = 'abc123'
+
+        button0 = Button(0, deck1)
+        button1 = Button(1, deck1)
+        deck1.buttons = [button0, button1]
+
+        self.m_get_active_decks.return_value = [deck1]
+        m_cancel.return_value = True
+
+        response = self.app.post('/cancelButtonActions', data={
+            'deckId': 'abc123',
+            'button': '1'
+        })
+
+        self.assertEqual(b'Cancelled!', response.data)
+        m_cancel.assert_called_with(button1)
+
+    @patch('action_executor.ActionExecutor.submit')
+    def test_test_button(self, m_submit):
+        deck1 = MagicMock()
+        deck1.id = 'abc123'
+        button0 = MagicMock()
+        deck1.buttons = [button0]
+
+        self.m_get_active_decks.return_value = [deck1]
+
+        response = self.app.post('/testButton', data={
+            'deckId': 'abc123',
+            'button': '0'
+        })
+
+        self.assertEqual(b'SUCCESS', response.data)
+        # Run on the action executor, not on the request thread
+        m_submit.assert_called_with(button0, policy=button0.concurrency_policy)
+        button0.execute_actions.assert_not_called()
+
+    @patch('action_executor.ActionExecutor.cancel')
+    def test_cancel_button_actions_not_running(self, m_cancel):
+        deck1 = MagicMock()
+        deck1.id = 'abc123'
+        deck1.buttons = [Button(0, deck1)]
+
+        self.m_get_active_decks.return_value = [deck1]
+        m_cancel.return_value = False
+
+        response = self.app.post('/cancelButtonActions', data={
+            'deckId': 'abc123',
+            'button': '0'
+        })
+
+        self.assertEqual(b'Not running', response.data)
+
     def test_delete_button_action_no_deck(self):
-        self.m_get_connected.return_value = []
+        self.m_get_active_decks.return_value = []
 
         with self.assertRaises(NoSuchDeckException):
             response = self.app.delete('/setButtonAction', data={
@@ -361,7 +547,7 @@ class TestStreamdeckX(BaseStreamdeckXTest):
 
             self.assertEqual(500, response._status_code)
 
-        self.m_get_connected.assert_called()
+        self.m_get_active_by_id.assert_called()
 
     @patch('dao.action_dao.ActionDao.delete')
     def test_delete_button_action(self, m_delete_action):
@@ -377,7 +563,7 @@ class TestStreamdeckX(BaseStreamdeckXTest):
 
         deck1.buttons = [button0, button1]
 
-        self.m_get_connected.return_value = [deck1]
+        self.m_get_active_decks.return_value = [deck1]
         html = 'BUTTON HTML'
         self.m_render_template.return_value = html
 
@@ -389,19 +575,157 @@ class TestStreamdeckX(BaseStreamdeckXTest):
 
         self.assertEqual(0, len(button1.actions))
 
-        self.m_get_connected.assert_called()
+        self.m_get_active_by_id.assert_called()
         m_delete_action.assert_called()
         self.m_render_template.assert_called_with('configuration.html', button=button1)
 
-    @patch('input.key.KeyGroup.get_all')
-    def test_get_all_keys(self, m_all_key_groups):
-        kg1 = MagicMock()
-        kg1.json.return_value = {'name': 'Key Group 1'}
+    def _key_image_deck(self):
+        from deck import VirtualDeck
+
+        deck = VirtualDeck('virtual', cols=2, rows=1)
+        self.m_get_active_decks.return_value = [deck]
+        return deck
+
+    def test_get_key_image(self):
+        deck = self._key_image_deck()
+        button = deck.buttons[1]
+
+        response = self.app.get(button.image_url)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('image/png', response.mimetype)
+        self.assertEqual(button.button_image.png_bytes, response.data)
+        self.assertEqual(f'"{button.render_digest}"', response.headers['ETag'])
+        self.assertTrue(response.cache_control.immutable)
+        self.assertEqual(streamdeckx.KEY_IMAGE_MAX_AGE, response.cache_control.max_age)
+
+    def test_get_key_image_unhashed(self):
+        self._key_image_deck()
+
+        response = self.app.get('/api/v1/decks/virtual/keys/1.png')
+
+        self.assertEqual(200, response.status_code)
+        # Could change at any time, so must be revalidated
+        self.assertFalse(response.cache_control.immutable)
+        self.assertTrue(response.cache_control.no_cache)
+
+    @patch('button_image.ButtonImage.png_bytes', new_callable=PropertyMock)
+    def test_get_key_image_not_modified(self, m_png_bytes):
+        deck = self._key_image_deck()
+        button = deck.buttons[0]
 
-        kg2 = MagicMock()
-        kg2.json.return_value = {'name': 'Key Group 2'}
+        response = self.app.get(button.image_url, headers={'If-None-Match': f'"{button.render_digest}"'})
 
-        m_all_key_groups.return_value = [kg1, kg2]
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(b'', response.data)
+        m_png_bytes.assert_not_called()
+
+    def test_get_key_image_changed(self):
+        deck = self._key_image_deck()
+        button = deck.buttons[0]
+        old_etag = f'"{button.render_digest}"'
+
+        button.style.label = 'Changed'
+
+        response = self.app.get('/api/v1/decks/virtual/keys/0.png', headers={'If-None-Match': old_etag})
+
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(old_etag, response.headers['ETag'])
+
+    def test_get_key_image_no_such_key(self):
+        self._key_image_deck()
+
+        response = self.app.get('/api/v1/decks/virtual/keys/2.png')
+
+        self.assertEqual(404, response.status_code)
+
+    def test_get_key_image_no_such_deck(self):
+        self._key_image_deck()
+
+        response = self.app.get('/api/v1/decks/unplugged/keys/0.png')
+
+        self.assertEqual(404, response.status_code)
+
+    def test_get_key_image_slash_in_deck_id(self):
+        from deck import VirtualDeck
+
+        deck = VirtualDeck('my/deck', cols=1, rows=1)
+        self.m_get_active_decks.return_value = [deck]
+        button = deck.buttons[0]
+
+        response = self.app.get(button.image_url)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(button.button_image.png_bytes, response.data)
+
+    @patch('image_store.ImageStore.get_bytes')
+    def test_get_stored_image(self, m_get_bytes):
+        m_get_bytes.return_value = b'a png'
+
+        response = self.app.get('/api/v1/images/123ZZZ.png')
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('image/png', response.mimetype)
+        self.assertEqual(b'a png', response.data)
+        self.assertEqual('"123ZZZ"', response.headers['ETag'])
+        self.assertTrue(response.cache_control.immutable)
+        m_get_bytes.assert_called_with('123ZZZ')
+
+    @patch('image_store.ImageStore.get_bytes')
+    def test_get_stored_image_not_modified(self, m_get_bytes):
+        response = self.app.get('/api/v1/images/123ZZZ.png', headers={'If-None-Match': '"123ZZZ"'})
+
+        self.assertEqual(304, response.status_code)
+        m_get_bytes.assert_not_called()
+
+    @patch('image_store.ImageStore.get_bytes')
+    def test_get_stored_image_missing(self, m_get_bytes):
+        m_get_bytes.return_value = None
+
+        response = self.app.get('/api/v1/images/123ZZZ.png')
+
+        self.assertEqual(404, response.status_code)
+
+    def test_get_deck_events(self):
+        from deck import Deck
+
+        response = self.app.get('/deckEvents', query_string={'deckId': 'abc123'})
+        stream = response.response
+        self.addCleanup(response.close)
+
+        self.assertEqual('text/event-stream', response.mimetype)
+        self.assertIn('retry', next(stream).decode('utf-8'))
+        self.assertEqual(1, Deck.events.subscriber_count('abc123'))
+
+        Deck.events.publish('abc123', 'key', {'key': 4, 'pressed': True})
+        self.assertIn('"key":4', next(stream).decode('utf-8'))
+
+        # Browser went away
+        response.close()
+        self.assertEqual(0, Deck.events.subscriber_count('abc123'))
+
+    @patch('streamdeckx.EVENT_KEEPALIVE_SECONDS', 0.01)
+    def test_get_deck_events_keepalive(self):
+        response = self.app.get('/deckEvents', query_string={'deckId': 'abc123'})
+        stream = response.response
+        self.addCleanup(response.close)
+
+        next(stream)
+        self.assertEqual(': keepalive\n\n', next(stream).decode('utf-8'))
+
+    def test_get_deck_events_reconnected(self):
+        from deck_events import DeckEventBroadcaster
+
+        response = self.app.get('/deckEvents', query_string={'deckId': 'abc123'}, headers={'Last-Event-ID': '41'})
+        stream = response.response
+        self.addCleanup(response.close)
+
+        next(stream)
+        self.assertEqual(DeckEventBroadcaster.RESYNC, next(stream).decode('utf-8'))
+
+    @patch('streamdeckx.KEYS')
+    def test_get_all_keys(self, m_keys):
+        m_keys.json = b'{"groups": [{"name": "Key Group 1"}, {"name": "Key Group 2"}]}'
 
         response = self.app.get('/api/v1/keys')
 
@@ -411,6 +735,14 @@ class TestStreamdeckX(BaseStreamdeckXTest):
                 {'name': 'Key Group 2'}
             ]
         }, response.json)
+        self.assertIsNotNone(response.headers.get('ETag'))
+
+    def test_get_all_keys_not_modified(self):
+        etag = self.app.get('/api/v1/keys').headers['ETag']
+
+        response = self.app.get('/api/v1/keys', headers={'If-None-Match': etag})
+
+        self.assertEqual(304, response.status_code)
 
 if __name__ == '__main__':
     unittest.main()
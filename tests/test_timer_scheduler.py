@@ -0,0 +1,82 @@
+import threading
+import time
+import unittest
+
+from timer_scheduler import TimerScheduler
+
+
+class TestTimerScheduler(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.scheduler = TimerScheduler()
+
+    def test_call_later(self):
+        """TimerScheduler.call_later"""
+        fired = threading.Event()
+        start = time.monotonic()
+
+        self.scheduler.call_later(0.02, fired.set)
+
+        self.assertTrue(fired.wait(5))
+        self.assertGreaterEqual(time.monotonic() - start, 0.019)
+
+    def test_call_later_order(self):
+        """TimerScheduler.call_later.order"""
+        order = []
+        done = threading.Event()
+
+        self.scheduler.call_later(0.06, lambda: (order.append('slow'), done.set()))
+        self.scheduler.call_later(0.02, lambda: order.append('fast'))
+        self.scheduler.call_later(0.02, lambda: order.append('fast2'))
+
+        self.assertTrue(done.wait(5))
+        self.assertEqual(['fast', 'fast2', 'slow'], order)
+
+    def test_cancel(self):
+        """TimerHandle.cancel"""
+        cancelled = threading.Event()
+        fired = threading.Event()
+
+        timer = self.scheduler.call_later(0.02, cancelled.set)
+        self.scheduler.call_later(0.04, fired.set)
+
+        self.assertTrue(timer.cancel())
+        self.assertTrue(fired.wait(5))
+        self.assertFalse(cancelled.is_set())
+        self.assertEqual(0, len(self.scheduler))
+
+    def test_cancel_after_fired(self):
+        """TimerHandle.cancel.after_fired"""
+        fired = threading.Event()
+        timer = self.scheduler.call_later(0, fired.set)
+        self.assertTrue(fired.wait(5))
+
+        self.assertFalse(timer.cancel())
+
+    def test_many_timers_one_thread(self):
+        """TimerScheduler.call_later.many_timers_one_thread"""
+        threads_before = threading.active_count()
+
+        timers = [self.scheduler.call_later(60, lambda: None) for _ in range(0, 500)]
+
+        self.assertEqual(500, len(self.scheduler))
+        self.assertLessEqual(threading.active_count(), threads_before + 1)
+
+        for timer in timers:
+            timer.cancel()
+
+    def test_callback_error(self):
+        """TimerScheduler._run.callback_error"""
+        fired = threading.Event()
+
+        def broken():
+            raise RuntimeError('Broken callback')
+
+        with self.assertLogs(level='ERROR'):
+            self.scheduler.call_later(0, broken)
+            self.scheduler.call_later(0.01, fired.set)
+            self.assertTrue(fired.wait(5))
+
+
+if __name__ == '__main__':
+    unittest.main()